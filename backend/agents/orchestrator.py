@@ -60,7 +60,8 @@ class RAGOrchestrator:
                 'query_analysis': query_analysis,
                 'max_results': 5,
                 'threshold': 0.7,
-                'priority_documents': uploaded_documents
+                'priority_documents': uploaded_documents,
+                'session_id': workflow_data.get('session_id')
             })
             agent_status['retrieval'] = 'completed'
             
@@ -137,7 +138,8 @@ class RAGOrchestrator:
                 'query_analysis': query_analysis,
                 'max_results': 5,
                 'threshold': 0.3,  # Very low threshold for better retrieval
-                'priority_documents': uploaded_documents
+                'priority_documents': uploaded_documents,
+                'session_id': workflow_data.get('session_id')
             })
             agent_status['retrieval'] = 'completed'
             
@@ -1,22 +1,29 @@
 import sys
 import os
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional
 
 # Add the backend directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.base_agent import BaseAgent
-from rag.vector_store import ChromaDBVectorStore
+from rag.base_vector_store import VectorStore
+from rag.lexical_index import is_identifier_query
+from rag.session_index import SessionIndexes
+from utils.config import RAGConfig
 
 class KnowledgeRetrievalAgent(BaseAgent):
     """Agent responsible for retrieving relevant knowledge from the vector store"""
     
-    def __init__(self, vector_store: ChromaDBVectorStore):
+    def __init__(self, vector_store: VectorStore, session_indexes: Optional[SessionIndexes] = None):
         super().__init__(
             name="Knowledge Retrieval Agent",
             description="Retrieves relevant documents and information from the knowledge base"
         )
         self.vector_store = vector_store
+        # Per-session upload indexes; without them uploads are expected in vector_store
+        self.session_indexes = session_indexes
+        self._search_executor = None
     
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Retrieve relevant knowledge based on the query"""
@@ -25,14 +32,73 @@ class KnowledgeRetrievalAgent(BaseAgent):
         max_results = input_data.get('max_results', 5)
         threshold = input_data.get('threshold', 0.3)  # Very low threshold for better retrieval
         priority_documents = input_data.get('priority_documents', [])
+        filters = input_data.get('filters')
+        priority_boost = input_data.get('priority_boost', RAGConfig.PRIORITY_DOCUMENT_BOOST)
+        priority_k = input_data.get('priority_k', RAGConfig.PRIORITY_DOCUMENT_K)
+        # Compound questions may be split into sub-queries that are searched together
+        queries = input_data.get('queries') or [query]
         
-        # Perform similarity search with priority documents
-        search_results = self.vector_store.similarity_search(
-            query=query,
-            k=max_results,
-            threshold=threshold,
-            priority_documents=priority_documents
-        )
+        retrieval_mode = input_data.get('retrieval_mode', RAGConfig.RETRIEVAL_MODE)
+        if self.vector_store.lexical_index is None:
+            retrieval_mode = 'vector'
+        
+        # The session's uploads live in their own in-memory index, searched next to the global one
+        session_store = self.session_indexes.get_session(input_data['session_id']) \
+            if self.session_indexes is not None and input_data.get('session_id') else None
+        global_priority = None if self.session_indexes is not None else priority_documents
+        
+        def lexical_search(q):
+            results_per_store = self._fan_out(
+                lambda: self.vector_store.lexical_search(q, max_results, filters, global_priority, priority_boost),
+                (lambda: session_store.lexical_search(q, max_results, filters, priority_documents, priority_boost)) if session_store else None
+            )
+            return results_per_store[0] if len(results_per_store) == 1 else self._merge_query_results(results_per_store)
+        
+        # Identifier lookups (course codes, roll numbers, form names) skip the embedding model
+        search_results = []
+        if retrieval_mode != 'vector' and len(queries) == 1 and is_identifier_query(queries[0]):
+            search_results = lexical_search(queries[0])
+            if search_results:
+                retrieval_mode = 'lexical'
+        
+        if retrieval_mode == 'lexical' and not search_results:
+            search_results = self._merge_query_results([lexical_search(q) for q in queries])
+        elif retrieval_mode != 'lexical':
+            # Encode once and search the global and session indexes concurrently
+            query_embeddings = self.vector_store.embedding_manager.embed_queries(queries) if session_store else None
+            vector_results_per_store = self._fan_out(
+                lambda: self.vector_store.similarity_search_batch(
+                    queries=queries,
+                    k=max_results,
+                    threshold=threshold,
+                    filters=filters,
+                    priority_documents=global_priority,
+                    priority_boost=priority_boost,
+                    priority_k=priority_k,
+                    query_embeddings=query_embeddings
+                ),
+                (lambda: session_store.similarity_search_batch(
+                    queries=queries,
+                    k=priority_k if priority_documents else max_results,
+                    threshold=threshold,
+                    filters=filters,
+                    priority_documents=priority_documents,
+                    priority_boost=priority_boost,
+                    query_embeddings=query_embeddings
+                )) if session_store else None
+            )
+            if len(vector_results_per_store) == 1:
+                vector_results = vector_results_per_store[0]
+            else:
+                vector_results = [self._merge_query_results(list(per_store)) for per_store in zip(*vector_results_per_store)]
+            
+            if retrieval_mode == 'hybrid':
+                lexical_results = [lexical_search(q) for q in queries]
+                search_results = self._fuse_results(vector_results + lexical_results)[:max_results * len(queries)]
+            elif len(queries) > 1:
+                search_results = self._merge_query_results(vector_results)
+            else:
+                search_results = vector_results[0]
         
         # Process and rank results
         processed_results = self._process_search_results(search_results, query_analysis)
@@ -47,12 +113,72 @@ class KnowledgeRetrievalAgent(BaseAgent):
             'information_sufficiency': sufficiency,
             'search_metadata': {
                 'max_results_requested': max_results,
+                'queries': queries,
+                'retrieval_mode': retrieval_mode,
+                'priority_documents': len(priority_documents or []),
                 'similarity_threshold': threshold,
                 'query_domains': query_analysis.get('domains', []),
                 'query_intent': query_analysis.get('intent', '')
             }
         }
     
+    def _fan_out(self, global_search: Callable[[], Any], session_search: Optional[Callable[[], Any]] = None) -> List[Any]:
+        """Run the global search and, if given, the session search in parallel, returning both results"""
+        if not session_search:
+            return [global_search()]
+        if self._search_executor is None:
+            self._search_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='retrieval-session-search')
+        session_future = self._search_executor.submit(session_search)
+        return [global_search(), session_future.result()]
+    
+    def _merge_query_results(self, results_per_query: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Merge per-query results, keeping the best-scoring copy of each chunk
+        
+        Lexical hits carry no cosine similarity, so their BM25 score breaks ties.
+        """
+        def score(result):
+            return (result['similarity_score'] * result['priority_boost'],
+                    result.get('lexical_score', 0.0) * result['priority_boost'])
+        
+        best = {}
+        for results in results_per_query:
+            for result in results:
+                key = (result['metadata'].get('source'), result['metadata'].get('chunk_index'), result['content'])
+                if key not in best or score(result) > score(best[key]):
+                    best[key] = result
+        
+        merged = sorted(best.values(), key=score, reverse=True)
+        for i, result in enumerate(merged):
+            result['rank'] = i + 1
+        return merged
+    
+    def _fuse_results(self, result_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Combine ranked lists with reciprocal rank fusion
+        
+        Each chunk scores sum(1 / (RRF_K + rank)) over the lists it appears in,
+        multiplied by its priority boost. A chunk's similarity_score is its
+        cosine similarity; chunks only the lexical index found keep 0.0, so
+        relevance and sufficiency never rest on a BM25 match alone.
+        """
+        fused = {}
+        for results in result_lists:
+            for position, result in enumerate(results):
+                key = (result['metadata'].get('source'), result['metadata'].get('chunk_index'), result['content'])
+                entry = fused.get(key)
+                if entry is None:
+                    entry = fused[key] = {**result, 'fusion_score': 0.0}
+                elif 'lexical_score' in entry and 'lexical_score' not in result:
+                    # Take the cosine similarity from the vector hit
+                    entry.update({k: v for k, v in result.items() if k != 'rank'})
+                elif 'lexical_score' in result:
+                    entry['lexical_score'] = max(entry.get('lexical_score', 0.0), result['lexical_score'])
+                entry['fusion_score'] += 1.0 / (RAGConfig.RRF_K + position + 1)
+        
+        merged = sorted(fused.values(), key=lambda x: -x['fusion_score'] * x['priority_boost'])
+        for i, result in enumerate(merged):
+            result['rank'] = i + 1
+        return merged
+    
     def _process_search_results(self, search_results: List[Dict[str, Any]], query_analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Process and enhance search results"""
         processed_results = []
@@ -74,11 +200,13 @@ class KnowledgeRetrievalAgent(BaseAgent):
                 'source': result['metadata']['source'],
                 'category': result['metadata']['category']
             }
+            if 'fusion_score' in result:
+                processed_result['fusion_score'] = result['fusion_score']
             
             processed_results.append(processed_result)
         
-        # Sort by relevance score
-        processed_results.sort(key=lambda x: x['relevance_score'], reverse=True)
+        # Sort by relevance score, keeping rank fusion order for hybrid results
+        processed_results.sort(key=lambda x: (x.get('fusion_score', 0.0), x['relevance_score']), reverse=True)
         
         return processed_results
     
@@ -231,7 +231,8 @@ class TaskDecomposer:
                 parameters={
                     'query': query,
                     'max_results': 5,
-                    'threshold': 0.7
+                    'threshold': 0.7,
+                    'session_id': session_id
                 },
                 dependencies=[f"task_{task_counter - 1}"],
                 priority=2
@@ -29,6 +29,8 @@ class TaskExecutor:
         self.synthesis_agent = None
         self.generation_agent = None
         self.conversation_agent = None
+        # RAG service whose knowledge base and session upload indexes retrieval searches
+        self.rag_service = None
         
         # Task execution context
         self.execution_context = {}
@@ -38,23 +40,26 @@ class TaskExecutor:
         """Set callback function for progress updates"""
         self.progress_callback = callback
     
+    def set_rag_service(self, rag_service):
+        """Search the RAG service's vector store and per-session upload indexes during retrieval"""
+        if rag_service is not self.rag_service:
+            self.rag_service = rag_service
+            self.retrieval_agent = None
+    
     async def _initialize_agents(self):
         """Initialize agents when needed"""
         if self.query_agent is None:
             self.query_agent = QueryUnderstandingAgent()
         if self.retrieval_agent is None:
-            # Import and initialize vector store with required parameters
-            from rag.vector_store import ChromaDBVectorStore
-            from rag.embeddings import EmbeddingManager
-            
-            # Initialize embedding manager
-            embedding_manager = EmbeddingManager()
-            
-            # Initialize vector store with proper parameters
-            store_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'vector_store')
-            vector_store = ChromaDBVectorStore(store_path=store_path, embedding_manager=embedding_manager)
-            
-            self.retrieval_agent = KnowledgeRetrievalAgent(vector_store)
+            if self.rag_service is not None and self.rag_service.is_initialized:
+                self.retrieval_agent = KnowledgeRetrievalAgent(self.rag_service.vector_store, self.rag_service.session_indexes)
+            else:
+                # Reuse the process-wide model and vector store shared with the RAG service;
+                # without the service there are no session upload indexes to search
+                from rag.resource_registry import resource_registry
+                from utils.config import RAGConfig
+                
+                self.retrieval_agent = KnowledgeRetrievalAgent(resource_registry.get_vector_store(RAGConfig))
         if self.synthesis_agent is None:
             self.synthesis_agent = ContextSynthesisAgent()
         if self.generation_agent is None:
@@ -340,7 +345,8 @@ class TaskExecutor:
         retrieval_result = await self.retrieval_agent.process({
             'query': query,
             'max_results': 10,
-            'threshold': 0.5
+            'threshold': 0.5,
+            'session_id': params.get('session_id')
         })
         
         # Store result with proper key for context flow
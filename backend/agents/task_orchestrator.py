@@ -16,6 +16,10 @@ class TaskOrchestrator:
         self.task_decomposer = TaskDecomposer()
         self.task_executor = TaskExecutor()
         self.active_sessions = {}  # Track active sessions
+    
+    def set_rag_service(self, rag_service):
+        """Search the RAG service's knowledge base and session uploads during retrieval tasks"""
+        self.task_executor.set_rag_service(rag_service)
         
     async def process_query_with_tasks(self, 
                                      query: str,
@@ -5,6 +5,7 @@ import logging
 from werkzeug.utils import secure_filename
 import tempfile
 import shutil
+import zipfile
 
 # Configure logging for this module
 logger = logging.getLogger(__name__)
@@ -14,6 +15,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from rag.rag_service import RAGService
 from rag.document_loader import DocumentLoader
+from rag.warmup import ServiceWarmup, ServiceWarmingUp
+from utils.config import RAGConfig
 import asyncio
 import uuid
 import datetime
@@ -24,6 +27,11 @@ rag_bp = Blueprint('rag', __name__)
 # Global RAG service instance
 rag_service = None
 
+# Background initialization shared by app start-up and early requests
+rag_warmup = ServiceWarmup()
+
+ALLOWED_UPLOAD_EXTENSIONS = {'.pdf', '.doc', '.docx', '.txt', '.md', '.json', '.csv', '.xlsx', '.xls', '.pptx', '.ppt'}
+
 def init_rag_service():
     """Initialize the RAG service"""
     global rag_service
@@ -33,17 +41,34 @@ def init_rag_service():
         # Note: We'll initialize it when the first request comes in
         # to avoid blocking the Flask startup
 
-async def ensure_rag_initialized():
-    """Ensure RAG service is initialized"""
+def _create_rag_service():
+    """Return the global RAG service for the warm-up thread to initialize, creating it once
+    
+    A failed initialize stops its background threads, so a retry reuses the same instance.
+    """
     global rag_service
     if rag_service is None:
         logger.info("Creating new RAG service instance...")
         rag_service = RAGService()
+    return rag_service
+
+def start_rag_warmup() -> bool:
+    """Load models and indexes in the background (no-op if a warm-up is running or done)"""
+    return rag_warmup.start(_create_rag_service, RAGConfig.WARMUP_QUERIES)
+
+async def ensure_rag_initialized():
+    """Ensure RAG service is initialized, joining the background warm-up rather than initializing again"""
+    if rag_warmup.is_ready:
+        return
     
-    if not rag_service.is_initialized:
-        logger.info("Initializing RAG service...")
-        await rag_service.initialize()
-        logger.info("RAG service initialized successfully")
+    start_rag_warmup()
+    logger.info("Waiting for RAG warm-up to finish...")
+    finished = await asyncio.get_event_loop().run_in_executor(None, rag_warmup.wait, RAGConfig.WARMUP_REQUEST_TIMEOUT)
+    if not finished:
+        raise ServiceWarmingUp('RAG system is still warming up, please retry shortly')
+    if not rag_warmup.is_ready:
+        raise RuntimeError(f"RAG initialization failed: {rag_warmup.error}")
+    logger.info("RAG service initialized successfully")
 
 @rag_bp.route('/chat', methods=['POST'])
 def chat():
@@ -98,6 +123,8 @@ def chat():
         finally:
             loop.close()
             
+    except ServiceWarmingUp as e:
+        return jsonify({'error': str(e), 'status': 'initializing'}), 503
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
@@ -206,6 +233,8 @@ def rebuild_knowledge_base():
         finally:
             loop.close()
             
+    except ServiceWarmingUp as e:
+        return jsonify({'error': str(e), 'status': 'initializing'}), 503
     except Exception as e:
         logger.error(f"Error rebuilding knowledge base: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
@@ -236,26 +265,43 @@ def health_check():
     """Health check for RAG system"""
     try:
         logger.info("RAG health check endpoint accessed")
-        if rag_service is None:
+        warmup_status = rag_warmup.get_status()
+        if rag_warmup.state == 'not_started':
             logger.info("RAG service not created")
             return jsonify({
                 'status': 'not_initialized',
-                'message': 'RAG service not created'
+                'ready': False,
+                'message': 'RAG service not created',
+                'warmup': warmup_status
             })
         
-        if not rag_service.is_initialized:
+        if rag_warmup.state == 'failed':
+            logger.warning("RAG warm-up failed")
+            return jsonify({
+                'status': 'error',
+                'ready': False,
+                'message': 'RAG system failed to initialize',
+                'error': rag_warmup.error,
+                'warmup': warmup_status
+            }), 503
+        
+        if not rag_warmup.is_ready:
             logger.info("RAG system is initializing")
             return jsonify({
                 'status': 'initializing',
+                'ready': False,
                 'message': 'RAG system is initializing',
-                'error': rag_service.initialization_error
-            })
+                'error': rag_service.initialization_error if rag_service else None,
+                'warmup': warmup_status
+            }), 503
         
         logger.info("RAG system is healthy")
         return jsonify({
             'status': 'healthy',
+            'ready': True,
             'message': 'RAG system is operational',
-            'system_status': rag_service.get_system_status()
+            'system_status': rag_service.get_system_status(),
+            'warmup': warmup_status
         })
         
     except Exception as e:
@@ -296,25 +342,25 @@ def upload_document():
         session_id = request.form.get('session_id', str(uuid.uuid4()))
         
         # Validate file type
-        allowed_extensions = {'.pdf', '.doc', '.docx', '.txt', '.md', '.json', '.csv', '.xlsx', '.xls', '.pptx', '.ppt'}
         file_ext = os.path.splitext(file.filename)[1].lower()
-        if file_ext not in allowed_extensions:
+        if file_ext not in ALLOWED_UPLOAD_EXTENSIONS:
             logger.warning(f"Unsupported file type: {file_ext}")
             return jsonify({'error': f'Unsupported file type: {file_ext}'}), 400
         
         # Secure filename
         filename = secure_filename(file.filename)
         
-        # Create temporary file
+        # Create temporary file; the ingestion job removes it when it finishes
         temp_dir = tempfile.mkdtemp()
         temp_file_path = os.path.join(temp_dir, filename)
+        queued = False
         
         try:
             # Save uploaded file
             file.save(temp_file_path)
             logger.info(f"File saved to temporary location: {temp_file_path}")
             
-            # Run async processing
+            # Run async initialization
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             
@@ -322,36 +368,203 @@ def upload_document():
                 # Ensure RAG is initialized
                 logger.info("Ensuring RAG service is initialized for document upload...")
                 loop.run_until_complete(ensure_rag_initialized())
-                
-                # Process the document
-                logger.info(f"Processing uploaded document: {filename}")
-                result = loop.run_until_complete(
-                    rag_service.upload_document(temp_file_path, session_id, filename)
-                )
-                
-                logger.info(f"Document {filename} processed successfully")
+            finally:
+                loop.close()
+            
+            # Parsing, embedding and indexing happen in the background
+            job = rag_service.submit_upload(temp_file_path, session_id, filename, cleanup_dir=temp_dir)
+            queued = True
+            
+            if job['deduplicated'] and job['status'] == 'completed':
+                logger.info(f"Document {filename} already indexed as {job['document_id']}")
                 return jsonify({
                     'status': 'success',
-                    'message': f'Document "{filename}" uploaded and processed successfully',
-                    'document_id': result['document_id'],
+                    'message': f'Document "{filename}" was already uploaded and is available for queries',
+                    'job_id': job['job_id'],
+                    'document_id': job['document_id'],
                     'filename': filename,
                     'session_id': session_id,
-                    'chunks_created': result.get('chunks_created', 0)
+                    'deduplicated': True
                 })
-                
+            
+            logger.info(f"Document {filename} queued as job {job['job_id']}")
+            return jsonify({
+                'status': 'queued',
+                'message': f'Document "{filename}" uploaded and queued for processing',
+                'job_id': job['job_id'],
+                'document_id': job['document_id'],
+                'filename': filename,
+                'session_id': session_id,
+                'deduplicated': job['deduplicated'],
+                'status_url': f"/api/rag/upload/jobs/{job['job_id']}"
+            }), 202
+            
+        finally:
+            if not queued:
+                # Clean up temporary file
+                try:
+                    shutil.rmtree(temp_dir)
+                    logger.info(f"Cleaned up temporary directory: {temp_dir}")
+                except Exception as e:
+                    logger.warning(f"Failed to clean up temporary directory {temp_dir}: {e}")
+            
+    except ServiceWarmingUp as e:
+        return jsonify({'error': str(e), 'status': 'initializing'}), 503
+    except Exception as e:
+        logger.error(f"Error uploading document: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+def _unique_upload_path(upload_dir: str, filename: str, used_names: set) -> str:
+    """Path in upload_dir for filename, numbering repeats so members never overwrite each other"""
+    name = filename
+    counter = 1
+    while name in used_names:
+        stem, ext = os.path.splitext(filename)
+        name = f"{stem}_{counter}{ext}"
+        counter += 1
+    used_names.add(name)
+    return os.path.join(upload_dir, name)
+
+def _save_bulk_upload(files, upload_dir: str):
+    """Save uploaded files, expanding ZIP archives, into upload_dir
+    
+    Returns (saved (file_path, filename) pairs, skipped entries with reasons).
+    Archive members are streamed to disk one at a time and never extracted by
+    their stored path, so a crafted archive cannot write outside upload_dir.
+    """
+    saved, skipped = [], []
+    used_names = set()
+    total_bytes = 0
+    
+    def admit(filename: str, original: str) -> bool:
+        file_ext = os.path.splitext(filename)[1].lower()
+        if not filename:
+            skipped.append({'filename': original, 'reason': 'Invalid filename'})
+            return False
+        if file_ext not in ALLOWED_UPLOAD_EXTENSIONS:
+            skipped.append({'filename': filename, 'reason': f'Unsupported file type: {file_ext}'})
+            return False
+        if len(saved) >= RAGConfig.BULK_UPLOAD_MAX_FILES:
+            skipped.append({'filename': filename, 'reason': f'More than {RAGConfig.BULK_UPLOAD_MAX_FILES} files'})
+            return False
+        return True
+    
+    def reserve(filename: str, size: int) -> bool:
+        nonlocal total_bytes
+        if total_bytes + size > RAGConfig.BULK_UPLOAD_MAX_BYTES:
+            skipped.append({'filename': filename, 'reason': 'Bulk upload size limit reached'})
+            return False
+        total_bytes += size
+        return True
+    
+    for file in files:
+        if os.path.splitext(file.filename)[1].lower() != '.zip':
+            filename = secure_filename(file.filename)
+            # Name, type and count are checked before anything touches the disk, and a
+            # declared size over the limit is refused without saving; the budget is
+            # charged with the size actually written
+            if not admit(filename, file.filename):
+                continue
+            if total_bytes + (file.content_length or 0) > RAGConfig.BULK_UPLOAD_MAX_BYTES:
+                skipped.append({'filename': filename, 'reason': 'Bulk upload size limit reached'})
+                continue
+            file_path = _unique_upload_path(upload_dir, filename, used_names)
+            file.save(file_path)
+            if not reserve(filename, os.path.getsize(file_path)):
+                os.remove(file_path)
+                continue
+            saved.append((file_path, filename))
+            continue
+        
+        with zipfile.ZipFile(file.stream) as archive:
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                filename = secure_filename(os.path.basename(member.filename))
+                if not admit(filename, member.filename) or not reserve(filename, member.file_size):
+                    continue
+                file_path = _unique_upload_path(upload_dir, filename, used_names)
+                with archive.open(member) as source, open(file_path, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                saved.append((file_path, filename))
+    
+    return saved, skipped
+
+@rag_bp.route('/upload/bulk', methods=['POST'])
+def upload_documents_bulk():
+    """Upload several documents, or one ZIP archive of them, and ingest them as one batch"""
+    try:
+        logger.info("Bulk document upload endpoint accessed")
+        
+        files = [file for file in request.files.getlist('files') + request.files.getlist('file') if file.filename]
+        if not files:
+            logger.warning("No files provided in bulk upload request")
+            return jsonify({'error': 'No files provided'}), 400
+        
+        # Get session ID
+        session_id = request.form.get('session_id', str(uuid.uuid4()))
+        
+        # The ingestion batch removes the directory once every file is processed
+        temp_dir = tempfile.mkdtemp()
+        queued = False
+        
+        try:
+            # Run async initialization
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            
+            try:
+                logger.info("Ensuring RAG service is initialized for bulk upload...")
+                loop.run_until_complete(ensure_rag_initialized())
             finally:
                 loop.close()
-                
-        finally:
-            # Clean up temporary file
+            
             try:
-                shutil.rmtree(temp_dir)
-                logger.info(f"Cleaned up temporary directory: {temp_dir}")
-            except Exception as e:
-                logger.warning(f"Failed to clean up temporary directory {temp_dir}: {e}")
+                saved, skipped = _save_bulk_upload(files, temp_dir)
+            except zipfile.BadZipFile as e:
+                return jsonify({'error': f'Invalid ZIP archive: {str(e)}'}), 400
+            
+            if not saved:
+                return jsonify({'error': 'No supported documents in upload', 'skipped': skipped}), 400
+            
+            bulk = rag_service.submit_bulk_upload(saved, session_id, cleanup_dir=temp_dir, skipped=skipped)
+            queued = True
             
+            logger.info(f"Bulk upload of {len(saved)} files queued as job {bulk['job_id']} ({len(skipped)} skipped)")
+            return jsonify({
+                'status': 'queued',
+                'message': f'{len(saved)} documents uploaded and queued for processing',
+                'job_id': bulk['job_id'],
+                'session_id': session_id,
+                'files': [{'filename': job['filename'], 'job_id': job['job_id'], 'document_id': job['document_id']} for job in bulk['files']],
+                'skipped': skipped,
+                'status_url': f"/api/rag/upload/jobs/{bulk['job_id']}"
+            }), 202
+            
+        finally:
+            if not queued:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            
+    except ServiceWarmingUp as e:
+        return jsonify({'error': str(e), 'status': 'initializing'}), 503
     except Exception as e:
-        logger.error(f"Error uploading document: {str(e)}", exc_info=True)
+        logger.error(f"Error in bulk upload: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@rag_bp.route('/upload/jobs/<job_id>', methods=['GET'])
+def get_upload_job(job_id):
+    """Get parse, embed and index progress of a queued upload"""
+    try:
+        if rag_service is None or not rag_service.is_initialized:
+            return jsonify({'error': 'RAG system not initialized'}), 503
+        
+        job = rag_service.get_upload_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+        
+    except Exception as e:
+        logger.error(f"Error getting upload job {job_id}: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @rag_bp.route('/upload/<document_id>', methods=['DELETE'])
@@ -369,10 +582,11 @@ def remove_uploaded_document(document_id):
             logger.info("Ensuring RAG service is initialized for document removal...")
             loop.run_until_complete(ensure_rag_initialized())
             
-            # Remove the document
-            logger.info(f"Removing document: {document_id}")
+            # Remove the session's reference, or the whole document without a session
+            session_id = request.args.get('session_id')
+            logger.info(f"Removing document: {document_id} (session: {session_id or 'all'})")
             result = loop.run_until_complete(
-                rag_service.remove_uploaded_document(document_id)
+                rag_service.remove_uploaded_document(document_id, session_id)
             )
             
             if result['success']:
@@ -381,7 +595,8 @@ def remove_uploaded_document(document_id):
                     'status': 'success',
                     'message': 'Document removed successfully',
                     'document_id': document_id,
-                    'chunks_removed': result.get('chunks_removed', 0)
+                    'chunks_removed': result.get('chunks_removed', 0),
+                    'remaining_references': result.get('remaining_references', 0)
                 })
             else:
                 logger.warning(f"Failed to remove document {document_id}: {result.get('error', 'Unknown error')}")
@@ -390,6 +605,8 @@ def remove_uploaded_document(document_id):
         finally:
             loop.close()
             
+    except ServiceWarmingUp as e:
+        return jsonify({'error': str(e), 'status': 'initializing'}), 503
     except Exception as e:
         logger.error(f"Error removing document {document_id}: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
@@ -426,6 +643,8 @@ def get_uploaded_documents():
         finally:
             loop.close()
             
+    except ServiceWarmingUp as e:
+        return jsonify({'error': str(e), 'status': 'initializing'}), 503
     except Exception as e:
         logger.error(f"Error getting uploaded documents: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
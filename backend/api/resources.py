@@ -7,12 +7,18 @@ from typing import List, Dict, Any
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.data_loader import data_loader
+from utils.config import RAGConfig
+from rag.document_loader import DocumentLoader
+from pathlib import Path
 import mimetypes
 import base64
 
 resources_bp = Blueprint('resources', __name__)
 
-RESOURCES_DIR = os.path.join('data', 'knowledge', 'resources')
+RESOURCES_DIR = os.path.join(RAGConfig.KNOWLEDGE_BASE_PATH, 'resources')
+
+# Extracts PDF and Word text for previews through the same cache as ingestion
+preview_loader = DocumentLoader(RESOURCES_DIR)
 
 def get_file_info(file_path: str) -> Dict[str, Any]:
     """Get information about a file"""
@@ -213,11 +219,11 @@ def view_resource_file(filename):
             except Exception as e:
                 content = f"Error reading text file: {str(e)}"
         
-        elif file_type == 'pdf':
-            content = "PDF files cannot be displayed as text. Please download the file to view it."
-        
-        elif file_type == 'word':
-            content = "Word documents cannot be displayed as text. Please download the file to view it."
+        elif file_type in ['pdf', 'word']:
+            try:
+                content = preview_loader.load_document(Path(file_path))['content']
+            except Exception as e:
+                content = f"Error extracting text: {str(e)}"
         
         elif file_type == 'image':
             try:
@@ -14,6 +14,8 @@ logger = logging.getLogger(__name__)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.task_orchestrator import task_orchestrator
+from rag.warmup import ServiceWarmingUp
+import api.rag as rag_api
 
 # Create blueprint
 task_workflow_bp = Blueprint('task_workflow', __name__)
@@ -49,6 +51,10 @@ def chat_with_tasks():
         asyncio.set_event_loop(loop)
         
         try:
+            # Retrieval searches the RAG service's indexes, including this session's uploads
+            loop.run_until_complete(rag_api.ensure_rag_initialized())
+            task_orchestrator.set_rag_service(rag_api.rag_service)
+            
             # Process the query with task-based workflow
             logger.info("Processing query with task-based workflow...")
             result = loop.run_until_complete(
@@ -78,6 +84,8 @@ def chat_with_tasks():
         finally:
             loop.close()
             
+    except ServiceWarmingUp as e:
+        return jsonify({'error': str(e), 'status': 'initializing'}), 503
     except Exception as e:
         logger.error(f"Error in task-based chat endpoint: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
@@ -117,6 +125,10 @@ def chat_with_tasks_stream():
         asyncio.set_event_loop(loop)
         
         try:
+            # Retrieval searches the RAG service's indexes, including this session's uploads
+            loop.run_until_complete(rag_api.ensure_rag_initialized())
+            task_orchestrator.set_rag_service(rag_api.rag_service)
+            
             # Process the query with task-based workflow
             logger.info("Processing query with streaming task-based workflow...")
             result = loop.run_until_complete(
@@ -147,6 +159,8 @@ def chat_with_tasks_stream():
         finally:
             loop.close()
             
+    except ServiceWarmingUp as e:
+        return jsonify({'error': str(e), 'status': 'initializing'}), 503
     except Exception as e:
         logger.error(f"Error in task-based streaming chat endpoint: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
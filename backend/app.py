@@ -81,6 +81,14 @@ app.register_blueprint(question_paper_bp)
 app.register_blueprint(resources_bp)
 app.register_blueprint(placements_bp)
 
+# Load models and indexes in the background so no request pays the cold start.
+# Under the debug reloader only the serving child process warms up.
+from api.rag import start_rag_warmup
+from utils.config import RAGConfig
+
+if RAGConfig.WARMUP_ON_STARTUP and (os.environ.get('FLASK_ENV') != 'development' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    start_rag_warmup()
+
 @app.route('/')
 def home():
     logger.info("Home endpoint accessed")
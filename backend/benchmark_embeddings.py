@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PyTorch and ONNX Runtime embedding backends
+
+For each backend, reports sentences/sec and p50/p99 batch latency on
+query-sized inputs (one short sentence per call) and chunk-sized inputs
+(CHUNK_SIZE characters, EMBEDDING_BATCH_SIZE per call). ONNX variants are also
+checked against the PyTorch embeddings with the cosine tolerance the ONNX
+backend promises.
+"""
+
+import argparse
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config import RAGConfig
+from rag.embeddings import EmbeddingManager
+from rag.onnx_embedder import COSINE_TOLERANCE
+
+QUERIES = [
+    "What is the process for organizing events?",
+    "attendance requirements",
+    "leave application procedure",
+    "academic calendar for the semester",
+    "assignment submission format",
+    "course schedule for CS301",
+    "exam rules and regulations",
+    "placement training schedule"
+]
+
+def make_chunks(count: int, size: int):
+    """Chunk-sized texts built from the sample queries"""
+    words = " ".join(QUERIES).split()
+    chunks = []
+    for i in range(count):
+        text = []
+        while sum(len(word) + 1 for word in text) < size:
+            text.append(words[(len(text) * 7 + i) % len(words)])
+        chunks.append(" ".join(text))
+    return chunks
+
+def time_batches(model, batches, batch_size: int):
+    latencies = []
+    for batch in batches:
+        start = time.perf_counter()
+        model.encode(batch, batch_size=batch_size, convert_to_numpy=True)
+        latencies.append((time.perf_counter() - start) * 1000)
+    sentences = sum(len(batch) for batch in batches)
+    return sentences / (sum(latencies) / 1000), np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def run_benchmark(args):
+    chunks = make_chunks(args.chunks, RAGConfig.CHUNK_SIZE)
+    query_batches = [[QUERIES[i % len(QUERIES)]] for i in range(args.queries)]
+    chunk_batches = [chunks[i:i + RAGConfig.EMBEDDING_BATCH_SIZE] for i in range(0, len(chunks), RAGConfig.EMBEDDING_BATCH_SIZE)]
+
+    backends = [('torch', EmbeddingManager(RAGConfig.EMBEDDING_MODEL, query_cache_size=0))]
+    for quantize in (False, True):
+        backends.append((f"onnx-{'int8' if quantize else 'float32'}", EmbeddingManager(
+            RAGConfig.EMBEDDING_MODEL, query_cache_size=0, backend='onnx', onnx_model_dir=RAGConfig.EMBEDDING_ONNX_PATH,
+            onnx_quantize=quantize, onnx_threads=args.threads
+        )))
+
+    reference = backends[0][1].model.encode(QUERIES + chunks, convert_to_numpy=True)
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+
+    print(f"{'backend':<14}{'input':<8}{'sent/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'min cos':>10}{'mean cos':>10}")
+    for label, embedding_manager in backends:
+        model = embedding_manager.model
+        # Warm up so one-time graph initialization is not timed
+        model.encode(QUERIES, convert_to_numpy=True)
+
+        embeddings = model.encode(QUERIES + chunks, convert_to_numpy=True)
+        cosine = np.sum(reference * embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True), axis=1)
+
+        for input_label, batches, batch_size in (('query', query_batches, 1), ('chunk', chunk_batches, RAGConfig.EMBEDDING_BATCH_SIZE)):
+            rate, p50, p99 = time_batches(model, batches, batch_size)
+            print(f"{label:<14}{input_label:<8}{rate:>10.1f}{p50:>10.2f}{p99:>10.2f}{cosine.min():>10.5f}{cosine.mean():>10.5f}")
+
+        if label != 'torch':
+            variant = label.split('-', 1)[1]
+            status = 'OK' if cosine.min() >= COSINE_TOLERANCE[variant] else 'FAILED'
+            print(f"  tolerance {COSINE_TOLERANCE[variant]} for {variant}: {status}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', type=int, default=200, help='single-query calls to time')
+    parser.add_argument('--chunks', type=int, default=256, help='chunk-sized texts to embed')
+    parser.add_argument('--threads', type=int, default=RAGConfig.EMBEDDING_ONNX_THREADS, help='ONNX Runtime intra-op threads (0 = default)')
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark NumPy vector store storage modes against exact float32 search
+
+Reports index memory, query latency and recall@k relative to float32 for each
+storage mode. The knowledge base is embedded once; --replicas adds noisy
+copies of every chunk to simulate a larger corpus.
+"""
+
+import argparse
+import sys
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config import RAGConfig
+from rag.embeddings import EmbeddingManager
+from rag.document_loader import DocumentLoader
+from rag.numpy_vector_store import NumpyVectorStore
+
+SAMPLE_QUERIES = [
+    "What is the process for organizing events?",
+    "attendance requirements",
+    "leave application procedure",
+    "academic calendar for the semester",
+    "assignment submission format",
+    "course schedule for CS301",
+    "exam rules and regulations",
+    "placement training schedule"
+]
+
+# (label, dtype, quantization)
+STORAGE_MODES = [
+    ('float32', 'float32', 'none'),
+    ('float16', 'float16', 'none'),
+    ('int8+rescore', 'float32', 'int8'),
+    ('binary+rescore', 'float32', 'binary')
+]
+
+def build_corpus(embedding_manager: EmbeddingManager, replicas: int, noise: float, seed: int = 0):
+    """Chunk and embed the knowledge base, then append noisy replicas"""
+    store = NumpyVectorStore(tempfile.mkdtemp(), embedding_manager)
+    loader = DocumentLoader(RAGConfig.KNOWLEDGE_BASE_PATH)
+    chunks, metadatas = [], []
+    for _, chunk, metadata in store.iter_chunks(loader.iter_documents(), RAGConfig.CHUNK_SIZE, RAGConfig.CHUNK_OVERLAP):
+        chunks.append(chunk)
+        metadatas.append(metadata)
+
+    base = embedding_manager.embed_batch(chunks, batch_size=RAGConfig.EMBEDDING_BATCH_SIZE)
+    rng = np.random.default_rng(seed)
+    vectors, all_chunks, all_metadatas = [base], list(chunks), [dict(m, replica=0) for m in metadatas]
+    for replica in range(1, replicas + 1):
+        vectors.append(base + rng.normal(scale=noise, size=base.shape).astype(np.float32))
+        all_chunks.extend(chunks)
+        all_metadatas.extend(dict(m, replica=replica) for m in metadatas)
+
+    embeddings = np.vstack(vectors)
+    ids = [f"bench_{i}" for i in range(len(embeddings))]
+    return ids, all_chunks, embeddings, all_metadatas
+
+def result_key(metadata):
+    return metadata['source'], metadata['chunk_index'], metadata['replica']
+
+def run_benchmark(args):
+    embedding_manager = EmbeddingManager(RAGConfig.EMBEDDING_MODEL)
+    print(f"Embedding knowledge base with {args.replicas} noisy replica(s)...")
+    ids, chunks, embeddings, metadatas = build_corpus(embedding_manager, args.replicas, args.noise)
+    queries = [embedding_manager.embed_query(query) for query in SAMPLE_QUERIES]
+    print(f"Corpus: {len(ids)} chunks x {embeddings.shape[1]} dims, {len(queries)} queries, k={args.k}")
+
+    reference = None
+    print(f"\n{'mode':<16}{'resident MB':>12}{'p50 ms':>10}{'p99 ms':>10}{'recall@k':>10}")
+    for label, dtype, quantization in STORAGE_MODES:
+        store = NumpyVectorStore(tempfile.mkdtemp(), embedding_manager, dtype=dtype, quantization=quantization,
+                                 rescore_multiplier=args.rescore_multiplier)
+        store._write_chunks(ids, chunks, embeddings, metadatas)
+        store.flush()
+
+        latencies, results = [], []
+        for _ in range(args.repeats):
+            for query_vector in queries:
+                start = time.perf_counter()
+                matches = store._query(query_vector, args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                results.append({result_key(metadata) for _, metadata, _ in matches})
+
+        if reference is None:
+            reference = results
+        recall = np.mean([len(found & expected) / max(len(expected), 1) for found, expected in zip(results, reference)])
+
+        stats = store.get_statistics()
+        resident = stats['code_bytes'] if quantization != 'none' else stats['matrix_bytes']
+        print(f"{label:<16}{resident / 1e6:>12.2f}{np.percentile(latencies, 50):>10.3f}"
+              f"{np.percentile(latencies, 99):>10.3f}{recall:>10.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--replicas', type=int, default=20, help='noisy copies of each chunk to add')
+    parser.add_argument('--noise', type=float, default=0.02, help='standard deviation of replica noise')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=20, help='passes over the query set')
+    parser.add_argument('--rescore-multiplier', type=int, default=RAGConfig.NUMPY_STORE_RESCORE_MULTIPLIER)
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,416 @@
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional, Callable
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+import logging
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag.embeddings import EmbeddingManager
+from rag.document_loader import DocumentLoader
+from rag.lexical_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+class VectorStore(ABC):
+    """Interface shared by every vector store backend
+
+    Chunking, batched embedding and result ranking live here; backends only
+    implement storage, raw nearest-neighbour queries and metadata lookups.
+    """
+
+    def __init__(self, embedding_manager: EmbeddingManager, collection_name: str = "documents",
+                 embedding_batch_size: int = 64, write_batch_size: int = 1000, ingest_batch_size: int = 512):
+        self.embedding_manager = embedding_manager
+        self.collection_name = collection_name
+        self.embedding_batch_size = embedding_batch_size
+        self.write_batch_size = write_batch_size
+        self.ingest_batch_size = ingest_batch_size
+        self._search_executor = None
+        # Optional BM25 index kept in step with every chunk write and delete
+        self.lexical_index: Optional[BM25Index] = None
+
+    @property
+    def backend_name(self) -> str:
+        return self.__class__.__name__
+
+    def add_documents(self, documents: Iterable[Dict[str, Any]], chunk_size: int = 1000, chunk_overlap: int = 200,
+                      progress: Optional[Callable[[int], None]] = None) -> Dict[str, List[str]]:
+        """Add documents to the vector store with chunking
+
+        Documents may be any iterable, including a lazy generator. Chunks are
+        embedded and upserted in bounded batches as they are produced, so peak
+        memory does not grow with the size of the input.
+
+        Returns the chunk IDs written, grouped by document source.
+        """
+        return self.add_chunks(self.iter_chunks(documents, chunk_size, chunk_overlap), progress=progress)
+
+    def add_chunks(self, chunks: Iterable[Tuple[str, str, Dict[str, Any]]],
+                   progress: Optional[Callable[[int], None]] = None) -> Dict[str, List[str]]:
+        """Embed and upsert (chunk_id, chunk, metadata) tuples in bounded batches
+
+        progress, if given, is called with the running total of chunks written
+        after each batch. Returns the chunk IDs written, grouped by source.
+        """
+        try:
+            chunk_ids_by_source: Dict[str, List[str]] = {}
+            batch_ids, batch_chunks, batch_metadatas = [], [], []
+            total_chunks = 0
+
+            for chunk_id, chunk, metadata in chunks:
+                batch_ids.append(chunk_id)
+                batch_chunks.append(chunk)
+                batch_metadatas.append(metadata)
+                chunk_ids_by_source.setdefault(metadata['source'], []).append(chunk_id)
+
+                if len(batch_ids) >= self.ingest_batch_size:
+                    self._ingest_batch(batch_ids, batch_chunks, batch_metadatas)
+                    total_chunks += len(batch_ids)
+                    batch_ids, batch_chunks, batch_metadatas = [], [], []
+                    if progress is not None:
+                        progress(total_chunks)
+
+            if batch_ids:
+                self._ingest_batch(batch_ids, batch_chunks, batch_metadatas)
+                total_chunks += len(batch_ids)
+                if progress is not None:
+                    progress(total_chunks)
+
+            self.flush()
+            if self.lexical_index is not None:
+                self.lexical_index.flush()
+
+            if total_chunks:
+                logger.info(f"Added {total_chunks} document chunks to {self.backend_name}")
+            else:
+                logger.warning("No document chunks to add")
+
+            return chunk_ids_by_source
+
+        except Exception as e:
+            logger.error(f"Error adding documents to {self.backend_name}: {e}")
+            raise
+
+    def iter_chunks(self, documents: Iterable[Dict[str, Any]], chunk_size: int = 1000, chunk_overlap: int = 200) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Split documents into chunks, yielding (chunk_id, chunk, metadata) lazily"""
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+        )
+
+        for doc in documents:
+            # Split document into chunks; loaders may pre-split it into sections
+            # (e.g. table row groups) that each carry their own metadata
+            chunks = []
+            for section in doc.get('sections') or [{'content': doc['content']}]:
+                section_metadata = section.get('metadata') or {}
+                chunks.extend((chunk, section_metadata) for chunk in text_splitter.split_text(section['content']))
+            source = str(doc.get('source', 'unknown'))
+
+            for i, (chunk, section_metadata) in enumerate(chunks):
+                metadata = self._build_chunk_metadata(doc, chunk, i, len(chunks))
+                metadata.update(section_metadata)
+                yield self._chunk_id(source, i, chunk), chunk, metadata
+
+    def _ingest_batch(self, ids: List[str], chunks: List[str], metadatas: List[Dict[str, Any]]):
+        """Embed one batch of chunks and write it to the store"""
+        # Encode the batch in length-sorted sub-batches
+        embeddings = self.embedding_manager.embed_batch(chunks, batch_size=self.embedding_batch_size)
+        self._write_chunks(ids, chunks, embeddings, metadatas)
+        if self.lexical_index is not None:
+            self.lexical_index.add(ids, chunks, metadatas)
+
+    @staticmethod
+    def _chunk_id(source: str, chunk_index: int, chunk: str) -> str:
+        """Derive a stable chunk ID from the document source and chunk content"""
+        digest = hashlib.sha1(f"{source}\x00{chunk}".encode('utf-8')).hexdigest()[:20]
+        return f"chunk_{digest}_{chunk_index}"
+
+    def _build_chunk_metadata(self, doc: Dict[str, Any], chunk: str, chunk_index: int, total_chunks: int) -> Dict[str, Any]:
+        """Prepare chunk metadata - only str, int, float, bool, or None values are stored"""
+        original_meta = doc.get('metadata', {})
+        metadata = {
+            'source': str(doc.get('source', 'unknown')),
+            'title': str(doc.get('title', 'Untitled')),
+            'category': str(doc.get('category', 'general')),
+            'chunk_index': int(chunk_index),
+            'total_chunks': int(total_chunks),
+            'chunk_size': int(len(chunk)),
+            'document_type': str(doc.get('document_type', 'text'))
+        }
+
+        # Add flattened original metadata as separate fields
+        if isinstance(original_meta, dict):
+            for key, value in original_meta.items():
+                if isinstance(value, (str, int, float, bool)) or value is None:
+                    metadata[f'meta_{key}'] = value
+                else:
+                    metadata[f'meta_{key}'] = str(value)
+
+        return metadata
+
+    def similarity_search(self, query: str, k: int = 5, threshold: float = 0.7, priority_documents: List[str] = None,
+                          filters: Optional[Dict[str, Any]] = None, priority_boost: float = 1.2,
+                          priority_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search for similar documents"""
+        return self.similarity_search_batch([query], k, threshold, filters, priority_documents, priority_boost, priority_k)[0]
+
+    def similarity_search_batch(self, queries: List[str], k: int = 5, threshold: float = 0.7,
+                                filters: Optional[Dict[str, Any]] = None, priority_documents: List[str] = None,
+                                priority_boost: float = 1.2, priority_k: Optional[int] = None,
+                                query_embeddings: Optional[np.ndarray] = None) -> List[List[Dict[str, Any]]]:
+        """Search for several queries at once, returning one result list per query
+
+        Queries not in the query cache are encoded in a single model call and
+        the index is searched once for the whole batch. Filters use the ChromaDB
+        where syntax and are applied inside the index query.
+
+        When priority documents are given, a second query restricted to them
+        runs alongside the global one, so their best priority_k chunks (k by
+        default) are always candidates. Priority scores are multiplied by
+        priority_boost when ranking.
+
+        query_embeddings, if given, are used instead of encoding the queries,
+        so one encoding can be shared by searches over several stores.
+        """
+        if not queries:
+            return []
+
+        try:
+            # Generate query embeddings (repeated queries are served from the query cache)
+            if query_embeddings is None:
+                query_embeddings = self.embedding_manager.embed_queries(queries)
+
+            if priority_documents:
+                matches = self._query_with_priority(query_embeddings, k, filters, priority_documents, priority_k or k)
+            else:
+                matches = self._query_batch(query_embeddings, k, filters)
+            processed_results = [
+                self._rank_matches(query_matches, threshold, priority_documents, priority_boost) for query_matches in matches
+            ]
+
+            logger.info(f"{self.backend_name} search for {len(queries)} queries returned "
+                        f"{[len(results) for results in processed_results]} results above threshold {threshold}")
+            return processed_results
+
+        except Exception as e:
+            logger.error(f"Error in {self.backend_name} similarity search: {e}")
+            return [[] for _ in queries]
+
+    def _query_with_priority(self, query_embeddings: np.ndarray, k: int, filters: Optional[Dict[str, Any]],
+                             priority_documents: List[str], priority_k: int) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+        """Run the global query and a query restricted to priority documents concurrently, then merge them"""
+        clauses = [{key: value} for key, value in (filters or {}).items()]
+        clauses.append({'meta_document_id': {'$in': list(priority_documents)}})
+        priority_where = clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+        if self._search_executor is None:
+            self._search_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"{self.backend_name}-search")
+        priority_future = self._search_executor.submit(self._query_batch, query_embeddings, priority_k, priority_where)
+        global_matches = self._query_batch(query_embeddings, k, filters)
+        priority_matches = priority_future.result()
+
+        merged = []
+        for global_query_matches, priority_query_matches in zip(global_matches, priority_matches):
+            seen = set()
+            query_matches = []
+            for doc, metadata, score in priority_query_matches + global_query_matches:
+                key = (metadata.get('source'), metadata.get('chunk_index'), doc)
+                if key not in seen:
+                    seen.add(key)
+                    query_matches.append((doc, metadata, score))
+            merged.append(query_matches)
+        return merged
+
+    def lexical_search(self, query: str, k: int = 5, filters: Optional[Dict[str, Any]] = None,
+                       priority_documents: List[str] = None, priority_boost: float = 1.2) -> List[Dict[str, Any]]:
+        """Search the BM25 index without embedding the query
+
+        Results have the same shape as similarity_search, ranked by BM25 score
+        (boosted for priority documents). The BM25 score is kept as lexical_score;
+        similarity_score is 0.0 because no cosine similarity was computed, so a
+        lexical hit never passes for a close semantic match.
+        """
+        if self.lexical_index is None:
+            return []
+
+        try:
+            hits = self.lexical_index.search(query, k, filters, self.matches_where)
+            results = self._rank_matches([(doc, metadata, score) for _, doc, metadata, score in hits],
+                                         float('-inf'), priority_documents, priority_boost)
+            for result in results:
+                result['lexical_score'] = result['similarity_score']
+                result['similarity_score'] = 0.0
+
+            logger.info(f"Lexical search returned {len(results)} results")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in lexical search: {e}")
+            return []
+
+    @staticmethod
+    def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+        """Evaluate a ChromaDB-style where filter against chunk metadata
+
+        Supports plain equality, $eq, $ne, $in, $nin, $and and $or.
+        """
+        if not where:
+            return True
+
+        for key, condition in where.items():
+            if key == '$and':
+                if not all(VectorStore.matches_where(metadata, clause) for clause in condition):
+                    return False
+            elif key == '$or':
+                if not any(VectorStore.matches_where(metadata, clause) for clause in condition):
+                    return False
+            elif isinstance(condition, dict):
+                value = metadata.get(key)
+                for operator, operand in condition.items():
+                    if operator == '$eq' and value != operand:
+                        return False
+                    if operator == '$ne' and value == operand:
+                        return False
+                    if operator == '$in' and value not in operand:
+                        return False
+                    if operator == '$nin' and value in operand:
+                        return False
+                    if operator not in ('$eq', '$ne', '$in', '$nin'):
+                        raise ValueError(f"Unsupported where operator: {operator}")
+            elif metadata.get(key) != condition:
+                return False
+
+        return True
+
+    def _rank_matches(self, matches: List[Tuple[str, Dict[str, Any], float]], threshold: float,
+                      priority_documents: List[str] = None, priority_boost: float = 1.2) -> List[Dict[str, Any]]:
+        """Apply the similarity threshold and rank priority documents by their boosted score"""
+        processed_results = []
+        for i, (doc, metadata, similarity_score) in enumerate(matches):
+            if similarity_score >= threshold:
+                # Check if this is a priority document (upload metadata is stored flattened as meta_document_id)
+                is_priority = False
+                if priority_documents:
+                    doc_id = metadata.get('document_id') or metadata.get('meta_document_id') or ''
+                    is_priority = any(priority_doc in doc_id for priority_doc in priority_documents)
+
+                processed_results.append({
+                    'content': doc,
+                    'metadata': metadata,
+                    'similarity_score': float(similarity_score),
+                    'rank': i + 1,
+                    'is_priority': is_priority,
+                    'priority_boost': priority_boost if is_priority else 1.0  # Boost priority documents
+                })
+
+        # Merge uploaded documents into the ranking by boosted similarity
+        if priority_documents:
+            processed_results.sort(key=lambda x: -x['similarity_score'] * x['priority_boost'])
+            for i, result in enumerate(processed_results):
+                result['rank'] = i + 1
+
+        return processed_results
+
+    def rebuild_index(self, knowledge_base_path: str):
+        """Rebuild the entire index from knowledge base"""
+        try:
+            logger.info(f"Rebuilding {self.backend_name} index...")
+
+            self.reset_collection()
+
+            # Stream documents straight into the index
+            loader = DocumentLoader(knowledge_base_path)
+            chunk_ids_by_source = self.add_documents(loader.iter_documents())
+
+            if chunk_ids_by_source:
+                logger.info(f"Rebuilt {self.backend_name} index with {len(chunk_ids_by_source)} documents")
+            else:
+                logger.warning("No documents found in knowledge base")
+
+        except Exception as e:
+            logger.error(f"Error rebuilding {self.backend_name} index: {e}")
+            raise
+
+    def flush(self):
+        """Persist buffered writes; backends that write through can ignore this"""
+        pass
+
+    def _lexical_remove(self, ids: List[str]):
+        """Mirror a chunk deletion into the BM25 index"""
+        if self.lexical_index is not None:
+            self.lexical_index.remove(ids)
+            self.lexical_index.flush()
+
+    def _lexical_remove_where(self, metadata_key: str, metadata_value: Any):
+        """Mirror a metadata deletion into the BM25 index"""
+        if self.lexical_index is not None:
+            self.lexical_index.remove_where(metadata_key, metadata_value)
+            self.lexical_index.flush()
+
+    def _lexical_upsert(self, ids: List[str], chunks: List[str], metadatas: List[Dict[str, Any]]):
+        """Mirror a single-chunk update into the BM25 index"""
+        if self.lexical_index is not None:
+            self.lexical_index.add(ids, chunks, metadatas)
+            self.lexical_index.flush()
+
+    def _lexical_clear(self):
+        if self.lexical_index is not None:
+            self.lexical_index.clear()
+            self.lexical_index.flush()
+
+    @abstractmethod
+    def _write_chunks(self, ids: List[str], chunks: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """Upsert chunks with their float32 embeddings"""
+
+    def _query(self, query_embedding: np.ndarray, k: int, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Dict[str, Any], float]]:
+        """Return up to k (content, metadata, cosine similarity) tuples, best first"""
+        return self._query_batch(np.asarray(query_embedding).reshape(1, -1), k, where)[0]
+
+    @abstractmethod
+    def _query_batch(self, query_embeddings: np.ndarray, k: int,
+                     where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+        """Run one index query for a (n_queries, dim) matrix, returning per-query match lists"""
+
+    @abstractmethod
+    def get_document_count(self) -> int:
+        """Get the number of chunks in the store"""
+
+    @abstractmethod
+    def reset_collection(self):
+        """Drop every chunk"""
+
+    @abstractmethod
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the vector store"""
+
+    @abstractmethod
+    def delete_documents(self, document_ids: List[str]) -> bool:
+        """Delete specific chunks from the store"""
+
+    @abstractmethod
+    def update_document(self, document_id: str, new_content: str, new_metadata: Dict[str, Any]) -> bool:
+        """Re-embed and replace a single chunk"""
+
+    @abstractmethod
+    def get_collection_info(self) -> Dict[str, Any]:
+        """Get detailed information about the underlying collection"""
+
+    @abstractmethod
+    def delete_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> bool:
+        """Delete chunks that match specific metadata criteria"""
+
+    @abstractmethod
+    def delete_documents_by_metadata_values(self, metadata_key: str, metadata_values: List[str]) -> int:
+        """Delete chunks whose metadata value is any of metadata_values in one pass, returning how many were deleted"""
+
+    @abstractmethod
+    def get_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> List[Dict[str, Any]]:
+        """Get chunks that match specific metadata criteria"""
@@ -1,8 +1,19 @@
+import hashlib
 import json
 import csv
+import atexit
+import itertools
+import multiprocessing
 import os
-from typing import List, Dict, Any
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import logging
 
@@ -10,35 +21,258 @@ import logging
 import pdfplumber  # pdfplumber for PDF files
 from docx import Document  # python-docx for Word documents
 from pptx import Presentation  # python-pptx for PowerPoint files
+from openpyxl import load_workbook  # openpyxl for streaming Excel reads
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import RAGConfig
+from rag.extraction_cache import ExtractionCache
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+def _load_document_timed(knowledge_base_path: str, file_path: Path, loader_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Parse one file and time it; runs inside pool workers, so it must never raise"""
+    start_time = time.perf_counter()
+    try:
+        document = DocumentLoader(knowledge_base_path, **(loader_options or {})).load_document(file_path)
+        error = None
+    except Exception as e:
+        document = None
+        error = str(e)
+    
+    return {
+        'source': str(file_path),
+        'document': document,
+        'error': error,
+        'parse_seconds': time.perf_counter() - start_time
+    }
+
+def _extract_pdf_pages(file_path: str, page_numbers: List[int]) -> List[Tuple[int, str]]:
+    """Extract the text of the given 1-based pages; runs inside pool workers"""
+    pages = []
+    with pdfplumber.open(file_path) as pdf:
+        for page_number in page_numbers:
+            page = pdf.pages[page_number - 1]
+            pages.append((page_number, page.extract_text() or ''))
+            page.flush_cache()
+    return pages
+
+# Parser pools shared by every loader in the process, one per worker count. Workers
+# are spawned rather than forked, so they never inherit the locks, threads and open
+# SQLite connections of the serving process, and stay alive between loads.
+_process_pools: Dict[int, ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the long-lived pool with the given number of worker processes"""
+    with _process_pools_lock:
+        pool = _process_pools.get(workers)
+        if pool is None:
+            pool = _process_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return pool
+
+def discard_process_pool(pool: ProcessPoolExecutor):
+    """Forget a pool whose worker died, so the next load starts a fresh one"""
+    with _process_pools_lock:
+        for workers, existing in list(_process_pools.items()):
+            if existing is pool:
+                del _process_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@atexit.register
+def shutdown_process_pools():
+    """Stop every parser pool"""
+    with _process_pools_lock:
+        pools = list(_process_pools.values())
+        _process_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
 class DocumentLoader:
-    """Loads and processes documents from the knowledge base"""
+    """Loads and processes documents from the knowledge base
+    
+    Tabular loaders can also return 'sections': row groups that each repeat the
+    column header and fit in table_row_group_chars, so every chunk carries
+    its own header instead of the splitter cutting one long table string.
+    PDFs are split into one section per page so chunks record their page.
     
-    def __init__(self, knowledge_base_path: str):
+    Loaded documents are cached by file content hash, so unchanged files are
+    never parsed twice. Bump LOADER_VERSION whenever a loader's output changes.
+    """
+    
+    LOADER_VERSION = 3
+    
+    def __init__(self, knowledge_base_path: str, table_row_group_chars: int = RAGConfig.TABLE_ROW_GROUP_CHARS,
+                 pdf_workers: int = RAGConfig.PDF_PAGE_WORKERS, pdf_parallel_min_pages: int = RAGConfig.PDF_PARALLEL_MIN_PAGES,
+                 extraction_cache_path: Optional[str] = RAGConfig.EXTRACTION_CACHE_PATH if RAGConfig.EXTRACTION_CACHE_ENABLED else None,
+                 extraction_cache_max_bytes: int = RAGConfig.EXTRACTION_CACHE_MAX_BYTES):
         self.knowledge_base_path = Path(knowledge_base_path)
+        self.table_row_group_chars = table_row_group_chars
+        self.pdf_workers = pdf_workers
+        self.pdf_parallel_min_pages = pdf_parallel_min_pages
+        self.extraction_cache_path = extraction_cache_path
+        self.extraction_cache_max_bytes = extraction_cache_max_bytes
+        self._extraction_cache: Optional[ExtractionCache] = None
         self.supported_formats = ['.txt', '.json', '.csv', '.md', '.pdf', '.docx', '.doc', '.xlsx', '.xls', '.pptx', '.ppt']
+        # Per-file outcome and parse timing of the most recent load_documents call
+        self.last_load_report: List[Dict[str, Any]] = []
+    
+    def list_document_files(self) -> List[Path]:
+        """List supported files in the knowledge base in a stable order"""
+        return sorted(
+            file_path for file_path in self.knowledge_base_path.rglob('*')
+            if file_path.is_file() and file_path.suffix.lower() in self.supported_formats
+        )
     
-    def load_all_documents(self) -> List[Dict[str, Any]]:
+    def load_all_documents(self, workers: int = 1) -> List[Dict[str, Any]]:
         """Load all documents from the knowledge base"""
-        documents = []
+        return self.load_documents(self.list_document_files(), workers=workers)
+    
+    def load_documents(self, file_paths: List[Path], workers: int = 1) -> List[Dict[str, Any]]:
+        """Load the given files, parsing them across a process pool when workers > 1
         
-        for file_path in self.knowledge_base_path.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
-                try:
-                    doc = self.load_document(file_path)
-                    if doc:
-                        documents.append(doc)
-                except Exception as e:
-                    logger.error(f"Error loading {file_path}: {e}")
-                    print(f"Error loading {file_path}: {e}")
+        Documents come back in the order of file_paths. A file that fails to parse
+        is logged and skipped without affecting the others.
+        """
+        documents = list(self.iter_documents(file_paths, workers=workers))
         
+        total_seconds = sum(entry['parse_seconds'] for entry in self.last_load_report)
+        logger.info(f"Loaded {len(documents)}/{len(file_paths)} documents with {workers} worker(s), {total_seconds:.2f}s total parse time")
         return documents
     
+    def iter_documents(self, file_paths: Optional[List[Path]] = None, workers: int = 1) -> Iterator[Dict[str, Any]]:
+        """Yield documents one at a time in file order
+        
+        Only a bounded window of files is parsed ahead of the consumer, so memory
+        stays flat regardless of how many files the knowledge base holds.
+        """
+        if file_paths is None:
+            file_paths = self.list_document_files()
+        
+        self.last_load_report = []
+        for outcome in self._iter_load_outcomes(file_paths, workers):
+            self.last_load_report.append({
+                'source': outcome['source'],
+                'status': 'error' if outcome['error'] else 'loaded',
+                'error': outcome['error'],
+                'parse_seconds': round(outcome['parse_seconds'], 4)
+            })
+            logger.debug(f"Parsed {outcome['source']} in {outcome['parse_seconds']:.3f}s")
+            
+            if outcome['error']:
+                logger.error(f"Error loading {outcome['source']}: {outcome['error']}")
+                print(f"Error loading {outcome['source']}: {outcome['error']}")
+            elif outcome['document']:
+                yield outcome['document']
+    
+    def _iter_load_outcomes(self, file_paths: List[Path], workers: int) -> Iterator[Dict[str, Any]]:
+        """Parse files serially or in a process pool, yielding outcomes in input order"""
+        if workers <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                yield _load_document_timed(str(self.knowledge_base_path), file_path, self._loader_options(self.pdf_workers))
+            return
+        
+        # Keep at most two files per worker in flight so parsed text can't pile up
+        window = workers * 2
+        pending = deque()
+        remaining = iter(file_paths)
+        # Files are already spread across processes, so PDFs are extracted page by page in-process
+        worker_options = self._loader_options(pdf_workers=1)
+        
+        executor = get_process_pool(workers)
+        
+        def submit(file_path: Path):
+            nonlocal executor
+            try:
+                return executor.submit(_load_document_timed, str(self.knowledge_base_path), file_path, worker_options)
+            except BrokenProcessPool:
+                # An earlier crash broke the pool; the remaining files go to a fresh one
+                discard_process_pool(executor)
+                executor = get_process_pool(workers)
+                return executor.submit(_load_document_timed, str(self.knowledge_base_path), file_path, worker_options)
+        
+        for file_path in itertools.islice(remaining, window):
+            pending.append((file_path, submit(file_path)))
+        
+        try:
+            while pending:
+                file_path, future = pending.popleft()
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. a crash inside a parser)
+                    outcome = {'source': str(file_path), 'document': None, 'error': str(e), 'parse_seconds': 0.0}
+                
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    pending.append((next_path, submit(next_path)))
+                
+                yield outcome
+        finally:
+            # A consumer that stops early leaves no queued parses behind in the shared pool
+            for _, future in pending:
+                future.cancel()
+    
+    def _loader_options(self, pdf_workers: int) -> Dict[str, Any]:
+        """Constructor arguments for loaders running the actual parsing"""
+        return {
+            'table_row_group_chars': self.table_row_group_chars,
+            'pdf_workers': pdf_workers,
+            'pdf_parallel_min_pages': self.pdf_parallel_min_pages,
+            'extraction_cache_path': self.extraction_cache_path,
+            'extraction_cache_max_bytes': self.extraction_cache_max_bytes
+        }
+    
+    @property
+    def extraction_cache(self) -> Optional[ExtractionCache]:
+        """The extraction cache, opened on first use in each process"""
+        if self._extraction_cache is None and self.extraction_cache_path:
+            try:
+                self._extraction_cache = ExtractionCache(self.extraction_cache_path, max_bytes=self.extraction_cache_max_bytes)
+            except Exception as e:
+                logger.error(f"Error opening extraction cache {self.extraction_cache_path}: {e}")
+                self.extraction_cache_path = None
+        return self._extraction_cache
+    
     def load_document(self, file_path: Path) -> Dict[str, Any]:
-        """Load a single document based on its file type"""
+        """Load a single document, from the extraction cache when its content was parsed before"""
+        file_path = Path(file_path)
+        cache = self.extraction_cache
+        if cache is None:
+            return self._parse_document(file_path)
+        
+        content_hash = self.hash_file(file_path)
+        # Row grouping changes the sections, so it is part of the version
+        loader_version = f"{self.LOADER_VERSION}:{self.table_row_group_chars}"
+        document = cache.get_document(content_hash, loader_version)
+        if document is None:
+            document = self._parse_document(file_path)
+            cache.put_document(content_hash, loader_version, document)
+            return document
+        
+        # The same content may have been parsed under another name
+        cached_source = Path(document['source'])
+        if document.get('title') == cached_source.stem:
+            document['title'] = file_path.stem
+        document['source'] = str(file_path)
+        stat = file_path.stat()
+        document['metadata'].update({'file_size': stat.st_size, 'last_modified': stat.st_mtime})
+        return document
+    
+    @staticmethod
+    def hash_file(file_path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _parse_document(self, file_path: Path) -> Dict[str, Any]:
+        """Parse a single document based on its file type"""
         suffix = file_path.suffix.lower()
         
         if suffix == '.json':
@@ -85,14 +319,7 @@ class DocumentLoader:
         df = pd.read_csv(file_path)
         
         # Convert DataFrame to structured text
-        content_lines = []
-        for _, row in df.iterrows():
-            line_parts = []
-            for col, value in row.items():
-                if pd.notna(value):
-                    line_parts.append(f"{col}: {value}")
-            content_lines.append(" | ".join(line_parts))
-        
+        content_lines = self._flatten_rows(df)
         content = "\n".join(content_lines)
         
         return {
@@ -100,6 +327,7 @@ class DocumentLoader:
             'title': file_path.stem,
             'category': 'data',
             'content': content,
+            'sections': self._row_group_sections("Columns: " + " | ".join(df.columns.astype(str)), content_lines),
             'metadata': {
                 'file_type': 'csv',
                 'columns': list(df.columns),
@@ -144,26 +372,52 @@ class DocumentLoader:
         }
     
     def _load_pdf(self, file_path: Path) -> Dict[str, Any]:
-        """Load PDF document"""
+        """Load PDF document
+        
+        Page text is looked up in the extraction cache by file content hash and
+        page number, so pages extracted before (e.g. by an interrupted load) are
+        not extracted again. Large PDFs spread the remaining pages across
+        pdf_workers processes.
+        """
         try:
-            content_lines = []
-            page_count = 0
-            
+            cache = self.extraction_cache
             with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text()
-                    if text and text.strip():
-                        content_lines.append(f"--- Page {page_num} ---")
-                        content_lines.append(text)
-                    page_count += 1
+                page_count = len(pdf.pages)
+                page_keys = self._page_keys(self.hash_file(file_path), page_count) if cache else []
+                cached = cache.get_pages(page_keys) if cache else {}
+                missing = [page_number for page_number in range(1, page_count + 1)
+                           if not cache or page_keys[page_number - 1] not in cached]
+                
+                if self.pdf_workers > 1 and len(missing) >= self.pdf_parallel_min_pages:
+                    extracted = self._extract_pages_parallel(file_path, missing)
+                else:
+                    extracted = {}
+                    for page_number in missing:
+                        page = pdf.pages[page_number - 1]
+                        extracted[page_number] = page.extract_text() or ''
+                        page.flush_cache()
+            
+            if cache and extracted:
+                cache.put_pages({page_keys[page_number - 1]: text for page_number, text in extracted.items()})
+            
+            content_lines = []
+            sections = []
+            for page_number in range(1, page_count + 1):
+                text = extracted[page_number] if page_number in extracted else cached[page_keys[page_number - 1]]
+                if text and text.strip():
+                    page_text = f"--- Page {page_number} ---\n{text}"
+                    content_lines.append(page_text)
+                    sections.append({'content': page_text, 'metadata': {'page': page_number}})
             
             content = "\n".join(content_lines)
+            logger.debug(f"Extracted {len(missing)}/{page_count} pages of {file_path.name} ({page_count - len(missing)} cached)")
             
             return {
                 'source': str(file_path),
                 'title': file_path.stem,
                 'category': 'document',
                 'content': content,
+                'sections': sections or None,
                 'metadata': {
                     'file_type': 'pdf',
                     'pages': page_count,
@@ -175,6 +429,33 @@ class DocumentLoader:
             logger.error(f"Error loading PDF {file_path}: {e}")
             raise
     
+    def _extract_pages_parallel(self, file_path: Path, page_numbers: List[int]) -> Dict[int, str]:
+        """Extract pages across a process pool, each worker taking a contiguous run of pages"""
+        workers = min(self.pdf_workers, len(page_numbers))
+        # A few runs per worker keeps the pool busy when some pages are much heavier than others
+        run_size = max(1, -(-len(page_numbers) // (workers * 4)))
+        runs = [page_numbers[start:start + run_size] for start in range(0, len(page_numbers), run_size)]
+        
+        extracted: Dict[int, str] = {}
+        executor = get_process_pool(self.pdf_workers)
+        try:
+            for pages in executor.map(_extract_pdf_pages, itertools.repeat(str(file_path)), runs):
+                extracted.update(pages)
+        except BrokenProcessPool:
+            discard_process_pool(executor)
+            raise
+        return extracted
+    
+    @staticmethod
+    def _page_keys(content_hash: str, page_count: int) -> List[str]:
+        """Extraction cache keys for the pages of a file
+        
+        Keys name the file and page position rather than the page's content
+        stream: the text also depends on the fonts and form XObjects the page
+        draws, so pages with identical streams can read differently.
+        """
+        return [f"{content_hash}:{page_number}:pdfplumber-{pdfplumber.__version__}" for page_number in range(1, page_count + 1)]
+    
     def _load_word(self, file_path: Path) -> Dict[str, Any]:
         """Load Word document (.docx)"""
         try:
@@ -216,51 +497,97 @@ class DocumentLoader:
             raise
     
     def _load_excel(self, file_path: Path) -> Dict[str, Any]:
-        """Load Excel document"""
+        """Load Excel document
+        
+        .xlsx workbooks are opened once in openpyxl read-only mode and read row by
+        row, so no sheet is ever materialized as a DataFrame. Legacy .xls files
+        go through pandas.
+        """
         try:
-            # Read all sheets
-            excel_file = pd.ExcelFile(file_path)
-            content_lines = []
-            
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                content_lines.append(f"--- Sheet: {sheet_name} ---")
-                
-                # Add column headers
-                if not df.empty:
-                    content_lines.append("Columns: " + " | ".join(df.columns.astype(str)))
-                    
-                    # Add data rows (limit to first 100 rows to avoid huge content)
-                    for idx, row in df.head(100).iterrows():
-                        row_data = []
-                        for col, value in row.items():
-                            if pd.notna(value):
-                                row_data.append(f"{col}: {value}")
-                        if row_data:
-                            content_lines.append(" | ".join(row_data))
-                    
-                    if len(df) > 100:
-                        content_lines.append(f"... and {len(df) - 100} more rows")
+            if file_path.suffix.lower() == '.xls':
+                sheets = pd.read_excel(file_path, sheet_name=None)
+                sheet_groups = (
+                    (sheet_name, self._iter_row_groups(
+                        f"Sheet: {sheet_name} | Columns: " + " | ".join(df.columns.astype(str)),
+                        self._flatten_rows(df), {'sheet': str(sheet_name)}
+                    ))
+                    for sheet_name, df in sheets.items()
+                )
+                return self._build_spreadsheet_document(file_path, sheet_groups)
             
-            content = "\n".join(content_lines)
-            
-            return {
-                'source': str(file_path),
-                'title': file_path.stem,
-                'category': 'spreadsheet',
-                'content': content,
-                'metadata': {
-                    'file_type': 'xlsx',
-                    'sheets': excel_file.sheet_names,
-                    'total_sheets': len(excel_file.sheet_names),
-                    'file_size': file_path.stat().st_size,
-                    'last_modified': file_path.stat().st_mtime
-                }
-            }
+            workbook = load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                return self._build_spreadsheet_document(
+                    file_path,
+                    ((worksheet.title, self._read_sheet_rows(worksheet)) for worksheet in workbook.worksheets)
+                )
+            finally:
+                workbook.close()
         except Exception as e:
             logger.error(f"Error loading Excel file {file_path}: {e}")
             raise
     
+    def _read_sheet_rows(self, worksheet) -> Iterator[Dict[str, Any]]:
+        """Yield a read-only worksheet's rows as row group sections, streaming them from iter_rows"""
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        
+        columns = [str(value) if value is not None else f"Unnamed: {i}" for i, value in enumerate(header)]
+        lines = (
+            " | ".join(f"{column}: {value}" for column, value in zip(columns, row) if value is not None and value != '')
+            for row in rows
+        )
+        yield from self._iter_row_groups(
+            f"Sheet: {worksheet.title} | Columns: " + " | ".join(columns), lines, {'sheet': str(worksheet.title)}
+        )
+    
+    def _build_spreadsheet_document(self, file_path: Path, sheet_groups) -> Dict[str, Any]:
+        """Assemble a spreadsheet document from (sheet name, row group sections) pairs
+        
+        Row groups are the only copy of the rows that is kept; 'content' just
+        outlines the sheets and their columns. With row grouping disabled each
+        sheet arrives as one group, which goes into 'content' instead.
+        """
+        grouped = self.table_row_group_chars > 0
+        content_lines = []
+        sections = []
+        sheet_names = []
+        total_rows = 0
+        
+        for sheet_name, groups in sheet_groups:
+            sheet_names.append(sheet_name)
+            content_lines.append(f"--- Sheet: {sheet_name} ---")
+            
+            sheet_rows = 0
+            for section in groups:
+                if not grouped:
+                    content_lines.append(section['content'])
+                else:
+                    if not sheet_rows:
+                        # Every group starts with the sheet's header line
+                        content_lines.append(section['content'][:section['content'].find("\n")])
+                    sections.append(section)
+                sheet_rows = section['metadata']['row_end']
+            total_rows += sheet_rows
+        
+        return {
+            'source': str(file_path),
+            'title': file_path.stem,
+            'category': 'spreadsheet',
+            'content': "\n".join(content_lines),
+            'sections': sections or None,
+            'metadata': {
+                'file_type': 'xlsx',
+                'sheets': sheet_names,
+                'total_sheets': len(sheet_names),
+                'rows': total_rows,
+                'file_size': file_path.stat().st_size,
+                'last_modified': file_path.stat().st_mtime
+            }
+        }
+    
     def _load_powerpoint(self, file_path: Path) -> Dict[str, Any]:
         """Load PowerPoint document"""
         try:
@@ -305,6 +632,65 @@ class DocumentLoader:
             logger.error(f"Error loading PowerPoint file {file_path}: {e}")
             raise
 
+    @staticmethod
+    def _flatten_rows(df: pd.DataFrame) -> List[str]:
+        """Render each row as "column: value | ..." skipping missing cells
+        
+        Works one column at a time on object arrays instead of iterating rows,
+        which keeps large tables fast.
+        """
+        lines = np.full(len(df), '', dtype=object)
+        has_content = np.zeros(len(df), dtype=bool)
+        for position, column in enumerate(df.columns):
+            values = df.iloc[:, position]
+            present = values.notna().to_numpy()
+            if not present.any():
+                continue
+            cells = (f"{column}: " + values[present].astype(str)).to_numpy(dtype=object)
+            lines[present] = np.where(has_content[present], lines[present] + " | " + cells, cells)
+            has_content |= present
+        return lines.tolist()
+    
+    def _row_group_sections(self, header: str, lines: List[str], metadata: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Pack consecutive rows into sections of at most table_row_group_chars, each starting with the header
+        
+        Returns None when row grouping is disabled, so the whole table is split as plain text.
+        """
+        if self.table_row_group_chars <= 0:
+            return None
+        return list(self._iter_row_groups(header, lines, metadata))
+    
+    def _iter_row_groups(self, header: str, lines: Iterable[str], metadata: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield row group sections as lines arrive, holding at most one group in memory
+        
+        Empty lines are skipped but still count towards row numbers. With row
+        grouping disabled every line goes into a single group.
+        """
+        max_chars = self.table_row_group_chars if self.table_row_group_chars > 0 else float('inf')
+        group, first_row, last_row, size = [], 0, 0, len(header)
+        
+        for row, line in enumerate(lines):
+            if not line:
+                continue
+            if group and size + len(line) + 1 > max_chars:
+                yield self._row_group(header, group, first_row, last_row, metadata)
+                group, size = [], len(header)
+            if not group:
+                first_row = row
+            group.append(line)
+            last_row = row
+            size += len(line) + 1
+        
+        if group:
+            yield self._row_group(header, group, first_row, last_row, metadata)
+    
+    @staticmethod
+    def _row_group(header: str, group: List[str], first_row: int, last_row: int, metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            'content': header + "\n" + "\n".join(group),
+            'metadata': {**(metadata or {}), 'row_start': first_row + 1, 'row_end': last_row + 1}
+        }
+    
     def _flatten_json(self, obj: Any, prefix: str = '') -> str:
         """Flatten JSON object into readable text optimized for LLM understanding"""
         if isinstance(obj, dict):
@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, List
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class Histogram:
+    """Counts of observed values in power-of-two buckets (1, 2, 4, ...)"""
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value: int):
+        bucket = 1
+        while bucket < value:
+            bucket *= 2
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.total += value
+        self.count += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'buckets': {f"<={bucket}": count for bucket, count in sorted(self._counts.items())},
+            'mean': round(self.total / self.count, 2) if self.count else 0
+        }
+
+class MicroBatchEmbedder:
+    """Coalesces concurrent encode calls into shared model batches
+
+    Callers submit small lists of texts and get a Future back. A worker thread
+    takes the first waiting request, keeps collecting more for up to
+    max_wait_ms or until max_batch_size texts are queued, runs one encode call
+    and hands each caller its own rows.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Histogram()
+        self._queue_depths = Histogram()
+        self._requests = 0
+        self._batches = 0
+        self._wait_seconds = 0.0
+
+        self._worker = threading.Thread(target=self._run, name='embedding-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for encoding; the Future resolves to a (len(texts), dim) array"""
+        future = Future()
+        self._queue.put((list(texts), future, time.perf_counter()))
+        return future
+
+    def encode_now(self, texts: List[str]) -> np.ndarray:
+        """Encode through the batcher, waiting for the result"""
+        if len(texts) >= self.max_batch_size:
+            # Already a full batch, so waiting for company only adds latency
+            return self.encode(texts)
+        return self.submit(texts).result()
+
+    def _run(self):
+        while True:
+            requests = [self._queue.get()]
+            queued_texts = len(requests[0][0])
+            deadline = time.perf_counter() + self.max_wait
+
+            while queued_texts < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                requests.append(request)
+                queued_texts += len(request[0])
+
+            self._run_batch(requests, queued_texts)
+
+    def _run_batch(self, requests, queued_texts: int):
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._queue_depths.observe(len(requests) + self._queue.qsize())
+            self._batch_sizes.observe(queued_texts)
+            self._requests += len(requests)
+            self._batches += 1
+            self._wait_seconds += sum(started - enqueued for _, _, enqueued in requests)
+
+        try:
+            texts = [text for request_texts, _, _ in requests for text in request_texts]
+            embeddings = np.asarray(self.encode(texts), dtype=np.float32)
+            offset = 0
+            for request_texts, future, _ in requests:
+                future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+        except Exception as e:
+            logger.error(f"Error encoding micro-batch of {queued_texts} texts: {e}")
+            for _, future, _ in requests:
+                if not future.done():
+                    future.set_exception(e)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'queue_depth': self._queue.qsize(),
+                'requests': self._requests,
+                'batches': self._batches,
+                'mean_wait_ms': round(self._wait_seconds / self._requests * 1000, 3) if self._requests else 0,
+                'batch_size_histogram': self._batch_sizes.to_dict(),
+                'queue_depth_histogram': self._queue_depths.to_dict()
+            }
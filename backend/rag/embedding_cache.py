@@ -0,0 +1,207 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Persistent, content-addressed embedding cache backed by SQLite
+
+    Entries are keyed by (model name, hash of the whitespace-normalized text) and
+    evicted least-recently-used once the cache grows past max_entries.
+    """
+
+    # SQLite caps the number of bound parameters per statement
+    _QUERY_PAGE_SIZE = 500
+
+    def __init__(self, cache_path: str, max_entries: int = 200000):
+        self.cache_path = Path(cache_path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        # Create directory if it doesn't exist
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._connection = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_name TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model_name, text_hash)
+            )
+        ''')
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)'
+        )
+        self._connection.commit()
+        logger.info(f"Embedding cache opened at {self.cache_path}")
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Hash text after collapsing whitespace, which the tokenizer ignores anyway"""
+        normalized = ' '.join(text.split())
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up embeddings for texts, returning None for every miss"""
+        hashes = [self.hash_text(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            unique_hashes = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique_hashes), self._QUERY_PAGE_SIZE):
+                page = unique_hashes[start:start + self._QUERY_PAGE_SIZE]
+                placeholders = ','.join('?' * len(page))
+                rows = self._connection.execute(
+                    f'SELECT text_hash, embedding FROM embeddings WHERE model_name = ? AND text_hash IN ({placeholders})',
+                    [model_name, *page]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32)
+
+            if found:
+                # Touch hits so LRU eviction keeps popular entries
+                now = time.time()
+                self._connection.executemany(
+                    'UPDATE embeddings SET last_access = ? WHERE model_name = ? AND text_hash = ?',
+                    [(now, model_name, text_hash) for text_hash in found]
+                )
+                self._connection.commit()
+
+            results = [found.get(text_hash) for text_hash in hashes]
+            hit_count = sum(1 for result in results if result is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+
+        return results
+
+    def put_many(self, model_name: str, texts: List[str], embeddings: np.ndarray):
+        """Store embeddings for texts and evict the least recently used overflow"""
+        if not texts:
+            return
+
+        now = time.time()
+        rows = [
+            (model_name, self.hash_text(text), np.asarray(embedding, dtype=np.float32).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+        with self._lock:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO embeddings (model_name, text_hash, embedding, last_access) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            self._evict_overflow()
+            self._connection.commit()
+
+    def _evict_overflow(self):
+        """Delete least recently used entries beyond max_entries (caller holds the lock)"""
+        count = self._connection.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                'DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)',
+                (overflow,)
+            )
+            self.evictions += overflow
+            logger.info(f"Evicted {overflow} entries from embedding cache")
+
+    def clear(self):
+        """Remove every cached embedding"""
+        with self._lock:
+            self._connection.execute('DELETE FROM embeddings')
+            self._connection.commit()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the embedding cache"""
+        with self._lock:
+            count, total_bytes = self._connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings'
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            'cache_path': str(self.cache_path),
+            'entries': count,
+            'max_entries': self.max_entries,
+            'embedding_bytes': total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions
+        }
+
+class QueryEmbeddingCache:
+    """Bounded in-memory LRU cache of query embeddings with a time-to-live
+
+    Keys are (model name, whitespace-normalized query text), so repeated
+    questions skip model inference entirely. Case is kept, since cased models
+    embed "US" and "us" differently.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        # Tokenizers split on whitespace, so runs of spaces or newlines don't change the embedding
+        return ' '.join(query.split())
+
+    def get(self, model_name: str, query: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for a query, or None on a miss or expiry"""
+        key = (model_name, self.normalize(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, model_name: str, query: str, embedding: np.ndarray):
+        key = (model_name, self.normalize(query))
+        # Cached arrays are shared between callers, so keep them read-only
+        embedding.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (embedding, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get hit/miss counters for the query cache"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -1,21 +1,92 @@
 from sentence_transformers import SentenceTransformer
-from typing import List, Union
+from typing import List, Union, Optional, Callable
 import numpy as np
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag.embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from rag.onnx_embedder import OnnxEmbedder
+from rag.embedding_batcher import MicroBatchEmbedder
 
 class EmbeddingManager:
-    """Manages text embeddings for the RAG system"""
+    """Manages text embeddings for the RAG system
+    
+    The inference backend is either 'torch' (SentenceTransformer) or 'onnx'
+    (ONNX Runtime, optionally int8-quantized), which produces embeddings
+    compatible with the PyTorch model within onnx_embedder.COSINE_TOLERANCE.
+    """
+    
+    BACKENDS = ('torch', 'onnx')
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", cache: Optional[EmbeddingCache] = None,
+                 query_cache_size: int = 1024, query_cache_ttl: float = 3600, backend: str = 'torch',
+                 onnx_model_dir: str = "data/onnx_models", onnx_quantize: bool = True, onnx_threads: int = 0,
+                 micro_batch_size: int = 0, micro_batch_wait_ms: float = 5.0):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unsupported embedding backend: {backend}")
+        
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
+        self.backend = backend
+        if backend == 'onnx':
+            self.model = OnnxEmbedder(model_name, onnx_model_dir, quantize=onnx_quantize, num_threads=onnx_threads)
+            # Keep cached vectors from different numeric backends apart
+            self.cache_key = f"{model_name}@onnx-{self.model.variant}"
+        else:
+            self.model = SentenceTransformer(model_name)
+            self.cache_key = model_name
         self.dimension = self.model.get_sentence_embedding_dimension()
+        self.cache = cache
+        self.query_cache = QueryEmbeddingCache(query_cache_size, query_cache_ttl) if query_cache_size > 0 else None
+        # Concurrent small encode calls (mostly queries) share model batches when enabled
+        self.batcher = MicroBatchEmbedder(self._encode_direct, micro_batch_size, micro_batch_wait_ms) if micro_batch_size > 0 else None
+    
+    def _encode_direct(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the model, through the micro-batcher when it is enabled"""
+        if self.batcher is not None:
+            return self.batcher.encode_now(texts)
+        return self._encode_direct(texts)
     
     def embed_text(self, text: Union[str, List[str]]) -> np.ndarray:
         """Generate embeddings for text"""
         if isinstance(text, str):
             text = [text]
         
-        embeddings = self.model.encode(text, convert_to_numpy=True)
+        if self.cache is None:
+            return self._encode(text)
+        
+        return self._embed_with_cache(text, self._encode)
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Generate a 1-D float32 embedding for a search query, served from the query cache when possible"""
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Generate a (len(queries), dimension) float32 matrix of query embeddings
+        
+        Cached queries are reused; the rest are encoded together in one model call.
+        """
+        embeddings = np.empty((len(queries), self.dimension), dtype=np.float32)
+        missing = []
+        for i, query in enumerate(queries):
+            cached = self.query_cache.get(self.cache_key, query) if self.query_cache is not None else None
+            if cached is None:
+                missing.append(i)
+            else:
+                embeddings[i] = cached
+        
+        if missing:
+            encoded = np.asarray(self.embed_text([queries[i] for i in missing]), dtype=np.float32)
+            for row, i in enumerate(missing):
+                embeddings[i] = encoded[row]
+                if self.query_cache is not None:
+                    self.query_cache.put(self.cache_key, queries[i], encoded[row].copy())
+        
         return embeddings
     
     def embed_single_text(self, text: str) -> List[float]:
@@ -38,6 +109,57 @@ class EmbeddingManager:
         """Generate embeddings for multiple documents"""
         return self.embed_text(documents)
     
+    def embed_batch(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Generate embeddings for many texts in length-sorted batches
+        
+        Texts are grouped by length so each batch pads to a similar size, and the
+        result is a single float32 matrix whose rows follow the input order.
+        """
+        if self.cache is None:
+            return self._encode_sorted(texts, batch_size)
+        
+        return self._embed_with_cache(texts, lambda misses: self._encode_sorted(misses, batch_size))
+    
+    def _embed_with_cache(self, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Serve embeddings from the cache and only run the model on misses"""
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        cached = self.cache.get_many(self.cache_key, texts)
+        
+        missing_indices = []
+        for i, embedding in enumerate(cached):
+            if embedding is None:
+                missing_indices.append(i)
+            else:
+                embeddings[i] = embedding
+        
+        if missing_indices:
+            missing_texts = [texts[i] for i in missing_indices]
+            fresh = encode(missing_texts)
+            embeddings[missing_indices] = fresh
+            self.cache.put_many(self.cache_key, missing_texts, fresh)
+        
+        return embeddings
+    
+    def _encode_sorted(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Run the model over texts in length-sorted batches"""
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return embeddings
+        
+        # Sort by length so each batch pads to roughly the same sequence length
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        
+        for start in range(0, len(texts), batch_size):
+            batch_indices = order[start:start + batch_size]
+            batch_texts = [texts[i] for i in batch_indices]
+            embeddings[batch_indices] = self.model.encode(
+                batch_texts,
+                batch_size=batch_size,
+                convert_to_numpy=True
+            )
+        
+        return embeddings
+    
     def compute_similarity(self, query_embedding: np.ndarray, doc_embeddings: np.ndarray) -> np.ndarray:
         """Compute cosine similarity between query and documents"""
         # Normalize embeddings
@@ -52,6 +174,10 @@ class EmbeddingManager:
         """Get information about the embedding model"""
         return {
             'model_name': self.model_name,
+            'backend': self.backend if self.backend == 'torch' else f"onnx-{self.model.variant}",
             'dimension': self.dimension,
-            'max_sequence_length': self.model.max_seq_length
+            'max_sequence_length': self.model.max_seq_length,
+            'cache': self.cache.get_statistics() if self.cache else None,
+            'query_cache': self.query_cache.get_statistics() if self.query_cache else None,
+            'micro_batching': self.batcher.get_statistics() if self.batcher else None
         }
@@ -0,0 +1,187 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ExtractionCache:
+    """Persistent cache of text extracted from documents, backed by SQLite
+
+    Whole loaded documents are keyed by (file content hash, loader version), so
+    a file is parsed at most once per content version whoever asks for it.
+    PDF page text is keyed by the file's content hash, the page number and
+    the pdfplumber version, so a page is never run through pdfplumber's layout
+    analysis twice for the same file.
+    Least recently used entries are evicted once the stored text exceeds
+    max_bytes. The database may be shared by the loader's worker processes.
+    """
+
+    # SQLite caps the number of bound parameters per statement
+    _QUERY_PAGE_SIZE = 500
+
+    def __init__(self, cache_path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_path = Path(cache_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.document_hits = 0
+        self.document_misses = 0
+        self.evicted_bytes = 0
+        self._lock = threading.Lock()
+
+        # Create directory if it doesn't exist
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._connection = sqlite3.connect(str(self.cache_path), timeout=30, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('''
+            CREATE TABLE IF NOT EXISTS pdf_pages (
+                fingerprint TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._connection.execute('''
+            CREATE TABLE IF NOT EXISTS documents (
+                content_hash TEXT NOT NULL,
+                loader_version TEXT NOT NULL,
+                document TEXT NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (content_hash, loader_version)
+            )
+        ''')
+        self._connection.commit()
+
+    def get_document(self, content_hash: str, loader_version: str) -> Optional[Dict[str, Any]]:
+        """Return the cached document for a file content hash, or None"""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT document FROM documents WHERE content_hash = ? AND loader_version = ?',
+                (content_hash, loader_version)
+            ).fetchone()
+            if row is None:
+                self.document_misses += 1
+                return None
+
+            self._connection.execute(
+                'UPDATE documents SET last_access = ? WHERE content_hash = ? AND loader_version = ?',
+                (time.time(), content_hash, loader_version)
+            )
+            self._connection.commit()
+            self.document_hits += 1
+        return json.loads(row[0])
+
+    def put_document(self, content_hash: str, loader_version: str, document: Dict[str, Any]):
+        """Store a loaded document and evict the least recently used overflow"""
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO documents (content_hash, loader_version, document, last_access) VALUES (?, ?, ?, ?)',
+                (content_hash, loader_version, json.dumps(document, default=str), time.time())
+            )
+            self._evict_overflow()
+            self._connection.commit()
+
+    def get_pages(self, fingerprints: List[str]) -> Dict[str, str]:
+        """Look up cached page text, returning only the hits"""
+        found: Dict[str, str] = {}
+        with self._lock:
+            unique_fingerprints = list(dict.fromkeys(fingerprints))
+            for start in range(0, len(unique_fingerprints), self._QUERY_PAGE_SIZE):
+                page = unique_fingerprints[start:start + self._QUERY_PAGE_SIZE]
+                placeholders = ','.join('?' * len(page))
+                rows = self._connection.execute(
+                    f'SELECT fingerprint, text FROM pdf_pages WHERE fingerprint IN ({placeholders})',
+                    page
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._connection.executemany(
+                    'UPDATE pdf_pages SET last_access = ? WHERE fingerprint = ?',
+                    [(now, fingerprint) for fingerprint in found]
+                )
+                self._connection.commit()
+
+            self.hits += len(found)
+            self.misses += len(unique_fingerprints) - len(found)
+        return found
+
+    def put_pages(self, pages: Dict[str, str]):
+        """Store extracted text for page fingerprints"""
+        if not pages:
+            return
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO pdf_pages (fingerprint, text, last_access) VALUES (?, ?, ?)',
+                [(fingerprint, text, now) for fingerprint, text in pages.items()]
+            )
+            self._evict_overflow()
+            self._connection.commit()
+
+    def _total_bytes(self) -> int:
+        return self._connection.execute(
+            'SELECT (SELECT COALESCE(SUM(LENGTH(text)), 0) FROM pdf_pages) + '
+            '(SELECT COALESCE(SUM(LENGTH(document)), 0) FROM documents)'
+        ).fetchone()[0]
+
+    def _evict_overflow(self):
+        """Delete least recently used entries until the cache fits max_bytes (caller holds the lock)"""
+        overflow = self._total_bytes() - self.max_bytes
+        if overflow <= 0:
+            return
+
+        entries = self._connection.execute('''
+            SELECT 'pdf_pages', rowid, LENGTH(text), last_access FROM pdf_pages
+            UNION ALL
+            SELECT 'documents', rowid, LENGTH(document), last_access FROM documents
+            ORDER BY last_access ASC
+        ''')
+        victims = {'pdf_pages': [], 'documents': []}
+        freed = 0
+        for table, rowid, size, _ in entries:
+            if freed >= overflow:
+                break
+            victims[table].append((rowid,))
+            freed += size
+
+        for table, rowids in victims.items():
+            self._connection.executemany(f'DELETE FROM {table} WHERE rowid = ?', rowids)
+        self.evicted_bytes += freed
+        logger.info(f"Evicted {freed} bytes from extraction cache")
+
+    def clear(self):
+        """Remove every cached extraction"""
+        with self._lock:
+            self._connection.execute('DELETE FROM pdf_pages')
+            self._connection.execute('DELETE FROM documents')
+            self._connection.commit()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the extraction cache"""
+        with self._lock:
+            pages = self._connection.execute('SELECT COUNT(*) FROM pdf_pages').fetchone()[0]
+            documents = self._connection.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+            total_bytes = self._total_bytes()
+
+        lookups = self.hits + self.misses
+        document_lookups = self.document_hits + self.document_misses
+        return {
+            'cache_path': str(self.cache_path),
+            'documents': documents,
+            'pdf_pages': pages,
+            'text_bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'evicted_bytes': self.evicted_bytes,
+            'document_hits': self.document_hits,
+            'document_misses': self.document_misses,
+            'document_hit_rate': self.document_hits / document_lookups if document_lookups else 0.0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
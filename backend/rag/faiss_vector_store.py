@@ -0,0 +1,394 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+import logging
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # faiss-cpu is optional and only needed for this backend
+    faiss = None
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag.embeddings import EmbeddingManager
+from rag.base_vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+class FAISSVectorStore(VectorStore):
+    """FAISS-backed vector store with selectable index types
+
+    Supported index types are 'flat' (exact), 'ivf_flat', 'ivf_pq' and 'hnsw'.
+    Vectors are L2-normalized so inner product equals cosine similarity. IVF
+    indexes are trained on the first ingest that supplies enough vectors; until
+    then new vectors wait in a small pending matrix that is searched exactly.
+    Chunk text and metadata live in a JSON side table keyed by FAISS label.
+    """
+
+    INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+
+    def __init__(self, store_path: str, embedding_manager: EmbeddingManager, collection_name: str = "documents",
+                 embedding_batch_size: int = 64, write_batch_size: int = 1000, ingest_batch_size: int = 512,
+                 index_type: str = 'flat', nlist: int = 100, nprobe: int = 10, pq_m: int = 16, pq_nbits: int = 8,
+                 hnsw_m: int = 32, ef_search: int = 64):
+        if faiss is None:
+            raise ImportError("faiss-cpu is required for the FAISS vector store backend")
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unsupported FAISS index type: {index_type}")
+
+        super().__init__(embedding_manager, collection_name, embedding_batch_size, write_batch_size, ingest_batch_size)
+        self.store_path = Path(store_path)
+        self.dimension = embedding_manager.dimension
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+
+        self.index_path = self.store_path / f"{collection_name}.{index_type}.faiss"
+        self.records_path = self.store_path / f"{collection_name}.{index_type}.records.json"
+        self.pending_path = self.store_path / f"{collection_name}.{index_type}.pending.npy"
+
+        self._lock = threading.RLock()
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._label_by_id: Dict[str, int] = {}
+        self._next_label = 0
+        self._pending_labels: List[int] = []
+        self._pending_vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        # Labels deleted from indexes that cannot remove vectors (HNSW)
+        self._tombstones = set()
+        self._dirty = False
+
+        # Create directory if it doesn't exist
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        self.index = None
+        self._load()
+
+    def _create_index(self):
+        """Build an empty index of the configured type"""
+        if self.index_type == 'flat':
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+        if self.index_type == 'hnsw':
+            hnsw = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            hnsw.hnsw.efSearch = self.ef_search
+            return faiss.IndexIDMap2(hnsw)
+
+        quantizer = faiss.IndexFlatIP(self.dimension)
+        if self.index_type == 'ivf_flat':
+            index = faiss.IndexIVFFlat(quantizer, self.dimension, self.nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, self.dimension, self.nlist, self.pq_m, self.pq_nbits, faiss.METRIC_INNER_PRODUCT)
+        index.nprobe = self.nprobe
+        return index
+
+    @property
+    def _min_training_size(self) -> int:
+        """Fewest vectors that can train the configured index"""
+        if self.index_type == 'ivf_pq':
+            return max(self.nlist, 2 ** self.pq_nbits)
+        return self.nlist
+
+    def _load(self):
+        """Read a previously saved index, side table and pending vectors"""
+        if not (self.index_path.exists() and self.records_path.exists()):
+            self.index = self._create_index()
+            logger.info(f"Created new FAISS {self.index_type} index: {self.collection_name}")
+            return
+
+        try:
+            self.index = faiss.read_index(str(self.index_path))
+            if self.index_type.startswith('ivf'):
+                faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+
+            with open(self.records_path, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+            self._records = {int(label): record for label, record in table['records'].items()}
+            self._label_by_id = {record['id']: label for label, record in self._records.items()}
+            self._next_label = table['next_label']
+            self._pending_labels = table['pending_labels']
+            self._tombstones = set(table['tombstones'])
+            if self.pending_path.exists():
+                self._pending_vectors = np.load(self.pending_path)
+
+            logger.info(f"Loaded FAISS {self.index_type} index {self.collection_name} with {len(self._records)} chunks")
+
+        except Exception as e:
+            logger.error(f"Error loading FAISS index: {e}")
+            raise
+
+    def flush(self):
+        """Train the index if it is ready, then write everything to disk"""
+        with self._lock:
+            self._train_if_ready()
+            if not self._dirty:
+                return
+
+            index_temp = self.index_path.with_suffix('.tmp')
+            records_temp = self.records_path.with_suffix('.tmp')
+            pending_temp = self.pending_path.with_suffix('.tmp.npy')
+            faiss.write_index(self.index, str(index_temp))
+            with open(records_temp, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'records': {str(label): record for label, record in self._records.items()},
+                    'next_label': self._next_label,
+                    'pending_labels': self._pending_labels,
+                    'tombstones': sorted(self._tombstones)
+                }, f)
+            np.save(pending_temp, self._pending_vectors)
+            os.replace(index_temp, self.index_path)
+            os.replace(records_temp, self.records_path)
+            os.replace(pending_temp, self.pending_path)
+            self._dirty = False
+
+    def _train_if_ready(self):
+        """Train an untrained IVF index on the pending vectors and move them into it"""
+        if self.index.is_trained or len(self._pending_labels) < self._min_training_size:
+            return
+
+        logger.info(f"Training FAISS {self.index_type} index on {len(self._pending_labels)} vectors")
+        self.index.train(self._pending_vectors)
+        self.index.add_with_ids(self._pending_vectors, np.array(self._pending_labels, dtype=np.int64))
+        self._pending_labels = []
+        self._pending_vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        self._dirty = True
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return np.ascontiguousarray(embeddings / np.maximum(norms, 1e-12))
+
+    def _write_chunks(self, ids: List[str], chunks: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """Upsert chunks; an existing ID is removed and re-added under a new label"""
+        vectors = self._normalize(embeddings)
+
+        with self._lock:
+            replaced = [self._label_by_id[chunk_id] for chunk_id in ids if chunk_id in self._label_by_id]
+            if replaced:
+                self._remove_labels(replaced)
+
+            labels = np.arange(self._next_label, self._next_label + len(ids), dtype=np.int64)
+            self._next_label += len(ids)
+            for label, chunk_id, chunk, metadata in zip(labels, ids, chunks, metadatas):
+                self._records[int(label)] = {'id': chunk_id, 'document': chunk, 'metadata': metadata}
+                self._label_by_id[chunk_id] = int(label)
+
+            if self.index.is_trained:
+                self.index.add_with_ids(vectors, labels)
+            else:
+                self._pending_labels.extend(int(label) for label in labels)
+                self._pending_vectors = np.concatenate([self._pending_vectors, vectors])
+
+            self._dirty = True
+
+    def _remove_labels(self, labels: List[int]):
+        """Drop labels from the side table and the index (caller holds the lock)"""
+        label_set = set(labels)
+        for label in labels:
+            record = self._records.pop(label, None)
+            if record:
+                self._label_by_id.pop(record['id'], None)
+
+        if self._pending_labels:
+            keep = np.array([label not in label_set for label in self._pending_labels], dtype=bool)
+            self._pending_labels = [label for label in self._pending_labels if label not in label_set]
+            self._pending_vectors = self._pending_vectors[keep]
+
+        if self.index_type == 'hnsw':
+            # HNSW graphs cannot delete, so hide the labels until the next compaction
+            self._tombstones.update(label_set)
+            if len(self._tombstones) > max(1000, self.index.ntotal // 4):
+                self._compact()
+        else:
+            self.index.remove_ids(np.array(labels, dtype=np.int64))
+
+        self._dirty = True
+
+    def _compact(self):
+        """Rebuild the HNSW graph from its live vectors to purge tombstones"""
+        live_labels = np.array(sorted(self._records.keys() - set(self._pending_labels)), dtype=np.int64)
+        vectors = np.vstack([self.index.reconstruct(int(label)) for label in live_labels]) if len(live_labels) else None
+
+        self.index = self._create_index()
+        if vectors is not None:
+            self.index.add_with_ids(vectors, live_labels)
+        self._tombstones = set()
+        logger.info(f"Compacted FAISS HNSW index to {len(live_labels)} vectors")
+
+    def _query_batch(self, query_embeddings: np.ndarray, k: int,
+                     where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+        """Top-k search for every query over the FAISS index plus any vectors still awaiting training
+
+        All queries go through one index.search call. With a where filter the
+        search over-fetches and widens until each query has k matching results
+        or the whole index has been scanned.
+        """
+        query_vectors = self._normalize(np.asarray(query_embeddings).reshape(-1, self.dimension))
+
+        with self._lock:
+            allowed = None
+            if where:
+                allowed = {label for label, record in self._records.items() if self.matches_where(record['metadata'], where)}
+
+            candidates: List[List[Tuple[float, int]]] = [[] for _ in query_vectors]
+            if self.index.ntotal and (allowed is None or allowed):
+                fetch = min(k + len(self._tombstones), self.index.ntotal)
+                if allowed is not None:
+                    fetch = min(max(fetch, 4 * k), self.index.ntotal)
+
+                while True:
+                    scores, labels = self.index.search(query_vectors, fetch)
+                    for i in range(len(query_vectors)):
+                        candidates[i] = [
+                            (float(score), int(label)) for score, label in zip(scores[i], labels[i])
+                            if label != -1 and int(label) not in self._tombstones
+                            and (allowed is None or int(label) in allowed)
+                        ]
+                    if allowed is None or fetch >= self.index.ntotal or all(len(found) >= k for found in candidates):
+                        break
+                    fetch = min(fetch * 4, self.index.ntotal)
+
+            if self._pending_labels:
+                pending_scores = self._pending_vectors @ query_vectors.T
+                for i in range(len(query_vectors)):
+                    candidates[i].extend(
+                        (score, label) for score, label in zip(pending_scores[:, i].tolist(), self._pending_labels)
+                        if allowed is None or label in allowed
+                    )
+
+            results = []
+            for query_candidates in candidates:
+                query_candidates.sort(key=lambda candidate: -candidate[0])
+                results.append([
+                    (self._records[label]['document'], self._records[label]['metadata'], score)
+                    for score, label in query_candidates[:k]
+                    if label in self._records
+                ])
+            return results
+
+    def _labels_matching(self, metadata_key: str, metadata_value: Any) -> List[int]:
+        with self._lock:
+            return [label for label, record in self._records.items() if record['metadata'].get(metadata_key) == metadata_value]
+
+    def get_document_count(self) -> int:
+        """Get the number of documents in the store"""
+        return len(self._records)
+
+    def reset_collection(self):
+        """Drop every chunk"""
+        with self._lock:
+            self.index = self._create_index()
+            self._records = {}
+            self._label_by_id = {}
+            self._pending_labels = []
+            self._pending_vectors = np.zeros((0, self.dimension), dtype=np.float32)
+            self._tombstones = set()
+            self._dirty = True
+            self.flush()
+        self._lexical_clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the vector store"""
+        return {
+            'backend': self.backend_name,
+            'index_type': self.index_type,
+            'total_documents': self.get_document_count(),
+            'indexed_vectors': int(self.index.ntotal),
+            'pending_vectors': len(self._pending_labels),
+            'tombstones': len(self._tombstones),
+            'is_trained': bool(self.index.is_trained),
+            'collection_name': self.collection_name,
+            'embedding_dimension': self.dimension,
+            'store_path': str(self.store_path),
+            'faiss_version': faiss.__version__,
+            'query_cache': self.embedding_manager.query_cache.get_statistics() if self.embedding_manager.query_cache else None
+        }
+
+    def delete_documents(self, document_ids: List[str]) -> bool:
+        """Delete specific documents from the store"""
+        try:
+            with self._lock:
+                labels = [self._label_by_id[chunk_id] for chunk_id in document_ids if chunk_id in self._label_by_id]
+                if labels:
+                    self._remove_labels(labels)
+                    self.flush()
+            self._lexical_remove(document_ids)
+            logger.info(f"Deleted {len(labels)} documents from FAISS index")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting documents from FAISS index: {e}")
+            return False
+
+    def update_document(self, document_id: str, new_content: str, new_metadata: Dict[str, Any]) -> bool:
+        """Update a specific document in the store"""
+        try:
+            embedding = self.embedding_manager.embed_text(new_content)
+            self._write_chunks([document_id], [new_content], embedding, [new_metadata])
+            self.flush()
+            self._lexical_upsert([document_id], [new_content], [new_metadata])
+            logger.info(f"Updated document {document_id} in FAISS index")
+            return True
+        except Exception as e:
+            logger.error(f"Error updating document {document_id} in FAISS index: {e}")
+            return False
+
+    def get_collection_info(self) -> Dict[str, Any]:
+        """Get detailed information about the FAISS index"""
+        return {
+            'name': self.collection_name,
+            'count': self.get_document_count(),
+            'metadata': {'space': 'cosine', 'index_type': self.index_type},
+            'embedding_function': 'custom'
+        }
+
+    def delete_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> bool:
+        """Delete documents that match specific metadata criteria"""
+        try:
+            with self._lock:
+                labels = self._labels_matching(metadata_key, metadata_value)
+                if not labels:
+                    logger.info(f"No documents found with {metadata_key}={metadata_value}")
+                    return False
+                self._remove_labels(labels)
+                self.flush()
+            self._lexical_remove_where(metadata_key, metadata_value)
+            logger.info(f"Deleted {len(labels)} documents with {metadata_key}={metadata_value}")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting documents by metadata: {e}")
+            return False
+
+    def delete_documents_by_metadata_values(self, metadata_key: str, metadata_values: List[str]) -> int:
+        """Delete chunks whose metadata value is any of metadata_values in one index update"""
+        try:
+            values = set(metadata_values)
+            with self._lock:
+                labels = [label for label, record in self._records.items() if record['metadata'].get(metadata_key) in values]
+                ids = [self._records[label]['id'] for label in labels]
+                if labels:
+                    self._remove_labels(labels)
+                    self.flush()
+            self._lexical_remove(ids)
+            logger.info(f"Deleted {len(labels)} documents matching {len(values)} values of {metadata_key}")
+            return len(labels)
+        except Exception as e:
+            logger.error(f"Error deleting documents by metadata values: {e}")
+            return 0
+
+    def get_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> List[Dict[str, Any]]:
+        """Get documents that match specific metadata criteria"""
+        with self._lock:
+            documents = [
+                {'content': self._records[label]['document'], 'metadata': self._records[label]['metadata'], 'id': self._records[label]['id']}
+                for label in self._labels_matching(metadata_key, metadata_value)
+            ]
+        logger.info(f"Retrieved {len(documents)} documents with {metadata_key}={metadata_value}")
+        return documents
@@ -0,0 +1,183 @@
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any
+import logging
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag.document_loader import DocumentLoader
+
+logger = logging.getLogger(__name__)
+
+class KnowledgeBaseSync:
+    """Incrementally syncs the knowledge base folder into the vector store
+
+    A JSON manifest records each indexed file's mtime, size, content hash and
+    chunk IDs, so a sync only re-chunks changed files and deletes the chunks of
+    removed ones.
+    """
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, vector_store, knowledge_base_path: str, manifest_path: str,
+                 chunk_size: int = 1000, chunk_overlap: int = 200, loader_workers: int = 1):
+        self.vector_store = vector_store
+        self.knowledge_base_path = knowledge_base_path
+        self.manifest_path = Path(manifest_path)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.loader_workers = loader_workers
+        self._sync_lock = threading.Lock()
+
+    def sync(self, full: bool = False) -> Dict[str, Any]:
+        """Bring the vector store in line with the knowledge base
+
+        With full=True the collection is cleared and every file re-ingested.
+        """
+        # Concurrent callers share one store, so syncs run one at a time
+        with self._sync_lock:
+            start_time = time.time()
+            manifest = self._load_manifest()
+
+            if full or not self._manifest_matches(manifest):
+                if not full:
+                    logger.info("Knowledge base manifest missing or stale, performing full sync")
+                self.vector_store.reset_collection()
+                manifest = self._empty_manifest()
+            elif not manifest.get('uploads_purged'):
+                self._purge_legacy_uploads(manifest)
+
+            indexed_files: Dict[str, Dict[str, Any]] = manifest['files']
+            loader = DocumentLoader(self.knowledge_base_path)
+
+            current_files = {str(file_path): file_path for file_path in loader.list_document_files()}
+            removed = [source for source in indexed_files if source not in current_files]
+            changed: Dict[str, Dict[str, Any]] = {}
+            unchanged = 0
+
+            for source, file_path in current_files.items():
+                stat = file_path.stat()
+                entry = indexed_files.get(source)
+                if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                    unchanged += 1
+                    continue
+
+                content_hash = DocumentLoader.hash_file(file_path)
+                if entry and entry['hash'] == content_hash:
+                    # Touched but not modified, only refresh the stat fields
+                    entry.update({'mtime': stat.st_mtime, 'size': stat.st_size})
+                    unchanged += 1
+                    continue
+
+                changed[source] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': content_hash}
+
+            # Drop chunks for removed and changed files
+            stale_ids = []
+            for source in removed:
+                stale_ids.extend(indexed_files.pop(source)['chunk_ids'])
+            for source in changed:
+                entry = indexed_files.pop(source, None)
+                if entry:
+                    stale_ids.extend(entry['chunk_ids'])
+            if stale_ids:
+                self.vector_store.delete_documents(stale_ids)
+
+            # Stream changed files through parsing, chunking, embedding and upsert
+            loaded_sources = []
+
+            def changed_documents():
+                for doc in loader.iter_documents([current_files[source] for source in changed], workers=self.loader_workers):
+                    loaded_sources.append(doc['source'])
+                    yield doc
+
+            chunk_ids_by_source = {}
+            if changed:
+                chunk_ids_by_source = self.vector_store.add_documents(
+                    changed_documents(),
+                    chunk_size=self.chunk_size,
+                    chunk_overlap=self.chunk_overlap
+                )
+
+            for source in loaded_sources:
+                indexed_files[source] = {
+                    **changed[source],
+                    'chunk_ids': chunk_ids_by_source.get(source, [])
+                }
+
+            self._save_manifest(manifest)
+
+            summary = {
+                'added_or_updated': len(loaded_sources),
+                'parse_report': loader.last_load_report,
+                'removed': len(removed),
+                'unchanged': unchanged,
+                'failed': len(changed) - len(loaded_sources),
+                'chunks_deleted': len(stale_ids),
+                'chunks_written': sum(len(ids) for ids in chunk_ids_by_source.values()),
+                'duration_seconds': round(time.time() - start_time, 3)
+            }
+            logger.info(f"Knowledge base sync complete: {summary}")
+            return summary
+
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {
+            'version': self.MANIFEST_VERSION,
+            'collection_name': self.vector_store.collection_name,
+            'backend': self.vector_store.backend_name,
+            'embedding_model': self.vector_store.embedding_manager.model_name,
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.chunk_overlap,
+            # A fresh collection holds no uploads from before they moved to session indexes
+            'uploads_purged': True,
+            'files': {}
+        }
+
+    def _purge_legacy_uploads(self, manifest: Dict[str, Any]):
+        """Delete uploads that older versions wrote into the shared store, once per store
+
+        The manifest only records the purge once no uploaded chunks are left,
+        so a failed delete is retried on the next sync.
+        """
+        deleted = self.vector_store.delete_documents_by_metadata_values('meta_source_type', ['uploaded'])
+        if not self.vector_store.get_documents_by_metadata('meta_source_type', 'uploaded'):
+            manifest['uploads_purged'] = True
+            logger.info(f"Purged {deleted} legacy uploaded chunks from the shared store")
+
+    def _manifest_matches(self, manifest: Dict[str, Any]) -> bool:
+        """Check the manifest was built with the current settings and store"""
+        expected = self._empty_manifest()
+        for key in ('version', 'collection_name', 'backend', 'embedding_model', 'chunk_size', 'chunk_overlap'):
+            if manifest.get(key) != expected[key]:
+                return False
+
+        # A wiped store invalidates whatever the manifest remembers
+        if manifest['files'] and self.vector_store.get_document_count() == 0:
+            return False
+        # So does a lexical index that was never built, e.g. right after it was enabled
+        lexical_index = self.vector_store.lexical_index
+        if manifest['files'] and lexical_index is not None and lexical_index.get_document_count() == 0:
+            return False
+        return True
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read knowledge base manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        """Write the manifest atomically so a crash never leaves it half written"""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.manifest_path)
@@ -0,0 +1,344 @@
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import logging
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag.document_loader import DocumentLoader
+
+logger = logging.getLogger(__name__)
+
+class IngestionJob:
+    """One uploaded file moving through parsing, embedding and indexing"""
+
+    def __init__(self, file_path: str, filename: str, metadata: Dict[str, Any], cleanup_dir: Optional[str] = None):
+        self.job_id = str(uuid.uuid4())
+        self.file_path = file_path
+        self.filename = filename
+        self.metadata = metadata
+        self.cleanup_dir = cleanup_dir
+        self.file_size = os.path.getsize(file_path)
+        self.bulk: Optional['BulkIngestion'] = None
+
+        self.status = 'queued'
+        self.error = None
+        self.chunks_total = 0
+        self.chunks_indexed = 0
+        self.batch_files = 1
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.parsed_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def elapsed(start, end):
+            if start is None:
+                return None
+            return round((end or time.time()) - start, 3)
+
+        return {
+            'job_id': self.job_id,
+            'filename': self.filename,
+            'document_id': self.metadata.get('document_id'),
+            'session_id': self.metadata.get('session_id'),
+            'status': self.status,
+            'error': self.error,
+            'progress': {
+                'parsed': self.parsed_at is not None,
+                'chunks_total': self.chunks_total,
+                'chunks_indexed': self.chunks_indexed
+            },
+            'batch_files': self.batch_files,
+            'timings': {
+                'queued_seconds': elapsed(self.submitted_at, self.started_at),
+                'parse_seconds': elapsed(self.started_at, self.parsed_at or self.finished_at),
+                'index_seconds': elapsed(self.parsed_at, self.finished_at)
+            }
+        }
+
+class BulkIngestion:
+    """Several uploaded files submitted together and ingested as one batch"""
+
+    def __init__(self, jobs: List[IngestionJob], cleanup_dir: Optional[str] = None, skipped: Optional[List[Dict[str, Any]]] = None):
+        self.job_id = str(uuid.uuid4())
+        self.jobs = jobs
+        self.cleanup_dir = cleanup_dir
+        self.skipped = skipped or []
+        self.submitted_at = time.time()
+        self._lock = threading.Lock()
+        self._remaining = len(jobs)
+        self._done = threading.Event()
+        for job in jobs:
+            job.bulk = self
+        if not jobs:
+            self._done.set()
+
+    def job_finished(self):
+        """Called once per finished file; the last one removes the shared upload directory"""
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last:
+            if self.cleanup_dir:
+                shutil.rmtree(self.cleanup_dir, ignore_errors=True)
+            self._done.set()
+
+    @property
+    def is_finished(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def finished_at(self) -> Optional[float]:
+        if not self.is_finished:
+            return None
+        return max((job.finished_at for job in self.jobs), default=self.submitted_at)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        files = [job.to_dict() for job in self.jobs]
+        counts: Dict[str, int] = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+
+        if not self.is_finished:
+            status = 'queued' if counts.get('queued') == len(self.jobs) else 'processing'
+        elif counts.get('completed') == len(self.jobs):
+            status = 'completed'
+        elif counts.get('completed'):
+            status = 'partial'
+        else:
+            status = 'failed'
+
+        return {
+            'job_id': self.job_id,
+            'status': status,
+            'files_total': len(self.jobs),
+            'files_by_status': counts,
+            'chunks_total': sum(job.chunks_total for job in self.jobs),
+            'chunks_indexed': sum(job.chunks_indexed for job in self.jobs),
+            'files': files,
+            'skipped': self.skipped,
+            'elapsed_seconds': round((self.finished_at or time.time()) - self.submitted_at, 3)
+        }
+
+class IngestionQueue:
+    """Background ingestion of uploaded documents
+
+    A fixed pool of worker threads bounds how much parsing and embedding runs
+    next to live queries. Each worker takes the oldest queued job and, for up
+    to coalesce_wait_ms, gathers more small jobs behind it, so a burst of
+    uploads is chunked, embedded and written in shared batches.
+
+    Bulk submissions enter the queue as one batch. Files in a batch are parsed
+    across loader_workers processes and their chunks streamed straight into
+    shared embedding batches.
+
+    Job states: queued -> parsing -> indexing -> completed | failed.
+    Embedding and store writes interleave per batch, so indexing progress is
+    reported in chunks written.
+    """
+
+    def __init__(self, vector_store, chunk_size: int = 1000, chunk_overlap: int = 200, workers: int = 2, loader_workers: int = 1,
+                 coalesce_max_files: int = 16, coalesce_max_bytes: int = 4 * 1024 * 1024,
+                 coalesce_wait_ms: float = 50.0, job_ttl: int = 3600,
+                 on_finish: Optional[Callable[[IngestionJob], None]] = None):
+        self.vector_store = vector_store
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.loader_workers = loader_workers
+        self.coalesce_max_files = coalesce_max_files
+        self.coalesce_max_bytes = coalesce_max_bytes
+        self.coalesce_wait = coalesce_wait_ms / 1000
+        self.job_ttl = job_ttl
+        # Called with each job as it completes or fails, before waiters are woken
+        self.on_finish = on_finish
+
+        # Each queue item is a list of jobs that must be ingested together
+        self._queue: "queue.Queue[List[IngestionJob]]" = queue.Queue()
+        self._jobs: Dict[str, Any] = {}
+        self._jobs_lock = threading.Lock()
+        self._stats = {'completed': 0, 'failed': 0, 'batches': 0, 'chunks_indexed': 0}
+
+        self._stopped = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f'ingestion-worker-{i}', daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, file_path: str, filename: str, metadata: Dict[str, Any], cleanup_dir: Optional[str] = None) -> IngestionJob:
+        """Queue a saved file for ingestion; metadata is merged into the document's metadata
+
+        cleanup_dir, if given, is removed once the job finishes.
+        """
+        job = IngestionJob(file_path, filename, metadata, cleanup_dir)
+        with self._jobs_lock:
+            self._prune_finished_jobs()
+            self._jobs[job.job_id] = job
+        self._queue.put([job])
+        logger.info(f"Queued ingestion job {job.job_id} for {filename}")
+        return job
+
+    def submit_bulk(self, files: List[Tuple[str, str, Dict[str, Any]]], cleanup_dir: Optional[str] = None,
+                    skipped: Optional[List[Dict[str, Any]]] = None) -> BulkIngestion:
+        """Queue (file_path, filename, metadata) files to be ingested as a single batch
+
+        cleanup_dir, if given, is removed once every file has finished.
+        """
+        bulk = BulkIngestion([IngestionJob(file_path, filename, metadata) for file_path, filename, metadata in files],
+                             cleanup_dir=cleanup_dir, skipped=skipped)
+        with self._jobs_lock:
+            self._prune_finished_jobs()
+            self._jobs[bulk.job_id] = bulk
+            for job in bulk.jobs:
+                self._jobs[job.job_id] = job
+        if bulk.jobs:
+            self._queue.put(bulk.jobs)
+        elif cleanup_dir:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
+        logger.info(f"Queued bulk ingestion {bulk.job_id} with {len(bulk.jobs)} files")
+        return bulk
+
+    def stop(self):
+        """Stop the worker threads once they finish their current batch; jobs still queued are abandoned"""
+        self._stopped = True
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def get_job(self, job_id: str):
+        """Return the IngestionJob or BulkIngestion with this ID, if it is still tracked"""
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def _prune_finished_jobs(self):
+        """Forget finished jobs older than job_ttl (caller holds the lock)"""
+        cutoff = time.time() - self.job_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.is_finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            jobs = list(item)
+            queued_bytes = sum(job.file_size for job in jobs)
+            deadline = time.perf_counter() + self.coalesce_wait
+
+            while len(jobs) < self.coalesce_max_files and queued_bytes < self.coalesce_max_bytes:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Leave the stop signal for the outer loop
+                    self._queue.put(None)
+                    break
+                jobs.extend(item)
+                queued_bytes += sum(job.file_size for job in item)
+
+            try:
+                self._ingest(jobs)
+            except Exception as e:
+                logger.error(f"Error ingesting batch of {len(jobs)} uploads: {e}")
+                for job in jobs:
+                    if not job.is_finished:
+                        self._finish(job, 'failed', str(e))
+
+    def _ingest(self, jobs: List[IngestionJob]):
+        """Parse the jobs' files in parallel and stream their chunks into shared embedding batches"""
+        started = time.time()
+        jobs_by_source = {str(Path(job.file_path)): job for job in jobs}
+        for job in jobs:
+            job.status = 'parsing'
+            job.started_at = started
+            job.batch_files = len(jobs)
+
+        # Documents are loaded by full path, so the loader's base directory is never used
+        loader = DocumentLoader(str(Path(jobs[0].file_path).parent))
+        offsets: List[Tuple[IngestionJob, int, int]] = []
+        chunks_produced = 0
+
+        def chunks():
+            nonlocal chunks_produced
+            documents = loader.iter_documents(list(jobs_by_source), workers=self.loader_workers)
+            for document in documents:
+                job = jobs_by_source[document['source']]
+                document['metadata'].update(job.metadata)
+                job.parsed_at = time.time()
+
+                job_chunks = list(self.vector_store.iter_chunks([document], self.chunk_size, self.chunk_overlap))
+                job.chunks_total = len(job_chunks)
+                job.status = 'indexing'
+                offsets.append((job, chunks_produced, len(job_chunks)))
+                chunks_produced += len(job_chunks)
+                yield from job_chunks
+
+        def progress(chunks_written: int):
+            for job, offset, count in offsets:
+                job.chunks_indexed = min(max(chunks_written - offset, 0), count)
+
+        self.vector_store.add_chunks(chunks(), progress=progress)
+
+        with self._jobs_lock:
+            self._stats['batches'] += 1
+            self._stats['chunks_indexed'] += chunks_produced
+
+        errors = {entry['source']: entry['error'] for entry in loader.last_load_report if entry['error']}
+        for source, job in jobs_by_source.items():
+            if job.status == 'indexing':
+                self._finish(job, 'completed')
+            else:
+                logger.error(f"Error parsing upload {job.filename}: {errors.get(source)}")
+                self._finish(job, 'failed', errors.get(source, 'Document could not be parsed'))
+        logger.info(f"Ingested {len(offsets)}/{len(jobs)} upload(s) as {chunks_produced} chunks in one batch")
+
+    def _finish(self, job: IngestionJob, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        if job.cleanup_dir:
+            shutil.rmtree(job.cleanup_dir, ignore_errors=True)
+        with self._jobs_lock:
+            self._stats[status] += 1
+        if self.on_finish is not None:
+            try:
+                self.on_finish(job)
+            except Exception as e:
+                logger.error(f"Error in ingestion finish callback for {job.job_id}: {e}")
+        job._done.set()
+        if job.bulk is not None:
+            job.bulk.job_finished()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._jobs_lock:
+            active = sum(1 for job in self._jobs.values() if isinstance(job, IngestionJob) and not job.is_finished)
+            return {
+                'workers': 0 if self._stopped else len(self._workers),
+                'queue_depth': self._queue.qsize(),
+                'active_jobs': active,
+                'tracked_jobs': len(self._jobs),
+                **self._stats
+            }
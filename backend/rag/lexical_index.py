@@ -0,0 +1,222 @@
+import heapq
+import json
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Letters and digits, keeping hyphenated or slashed codes such as "Form-16" together
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+
+# Course codes (CS301), roll numbers (21CS045, 2021001234) and form names (Form-16)
+IDENTIFIER_PATTERN = re.compile(r"^(?=.*\d)[a-z0-9]+(?:[-/][a-z0-9]+)*$")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'i', 'in', 'is', 'it',
+    'me', 'my', 'of', 'on', 'or', 'show', 'the', 'to', 'what', 'when', 'where', 'which', 'who', 'with'
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def is_identifier_query(query: str, min_ratio: float = 0.5) -> bool:
+    """True when at least min_ratio of the query's tokens look like identifiers"""
+    tokens = tokenize(query)
+    if not tokens:
+        return False
+    identifiers = sum(1 for token in tokens if IDENTIFIER_PATTERN.match(token))
+    return identifiers / len(tokens) >= min_ratio
+
+class BM25Index:
+    """Okapi BM25 inverted index over chunk text, persisted in SQLite
+
+    Postings map each term to {chunk_id: term frequency}; chunk text and
+    metadata are kept alongside so lexical-only queries can be answered
+    without touching the vector store or the embedding model. On disk each
+    chunk is one row with its text, metadata and term counts, and flush
+    writes only the chunks added or removed since the previous flush.
+    Without an index_path the index lives only in memory.
+    """
+
+    INDEX_VERSION = 2
+
+    def __init__(self, index_path: Optional[str], k1: float = 1.5, b: float = 0.75, min_match: float = 0.5):
+        self.index_path = Path(index_path) if index_path else None
+        self.k1 = k1
+        self.b = b
+        # Share of the query's idf weight a chunk must contain to be returned at all
+        self.min_match = min_match
+
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        # Chunks changed since the last flush: their term counts, or None once removed
+        self._pending: Dict[str, Optional[Dict[str, int]]] = {}
+        self._cleared = False
+        self._connection: Optional[sqlite3.Connection] = None
+
+        if self.index_path is not None:
+            self._load()
+
+    def _load(self):
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.index_path), timeout=30, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            if self._connection.execute('PRAGMA user_version').fetchone()[0] != self.INDEX_VERSION:
+                self._connection.execute('DROP TABLE IF EXISTS chunks')
+                self._connection.execute(f'PRAGMA user_version = {self.INDEX_VERSION}')
+            self._connection.execute('''
+                CREATE TABLE IF NOT EXISTS chunks (
+                    chunk_id TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    terms TEXT NOT NULL
+                )
+            ''')
+            self._connection.commit()
+
+            for chunk_id, content, metadata, terms in self._connection.execute(
+                    'SELECT chunk_id, content, metadata, terms FROM chunks'):
+                self._index_chunk(chunk_id, content, json.loads(metadata), json.loads(terms))
+            logger.info(f"Loaded lexical index with {len(self._records)} chunks and {len(self._postings)} terms")
+        except Exception as e:
+            logger.error(f"Error loading lexical index {self.index_path}: {e}")
+            self._connection = None
+
+    def flush(self):
+        """Write the chunks changed since the last flush to disk in one transaction"""
+        with self._lock:
+            if self._connection is None or not (self._pending or self._cleared):
+                return
+            with self._connection:
+                if self._cleared:
+                    self._connection.execute('DELETE FROM chunks')
+                self._connection.executemany(
+                    'DELETE FROM chunks WHERE chunk_id = ?',
+                    [(chunk_id,) for chunk_id, terms in self._pending.items() if terms is None]
+                )
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO chunks (chunk_id, content, metadata, terms) VALUES (?, ?, ?, ?)',
+                    [
+                        (chunk_id, self._records[chunk_id]['content'],
+                         json.dumps(self._records[chunk_id]['metadata'], default=str), json.dumps(terms))
+                        for chunk_id, terms in self._pending.items() if terms is not None
+                    ]
+                )
+            self._pending.clear()
+            self._cleared = False
+
+    def add(self, ids: List[str], chunks: List[str], metadatas: List[Dict[str, Any]]):
+        """Index chunks, replacing any existing entries with the same IDs"""
+        with self._lock:
+            self._remove(chunk_id for chunk_id in ids if chunk_id in self._records)
+            for chunk_id, chunk, metadata in zip(ids, chunks, metadatas):
+                term_counts = dict(Counter(tokenize(chunk)))
+                self._index_chunk(chunk_id, chunk, metadata, term_counts)
+                self._pending[chunk_id] = term_counts
+
+    def _index_chunk(self, chunk_id: str, chunk: str, metadata: Dict[str, Any], term_counts: Dict[str, int]):
+        for term, count in term_counts.items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+        length = sum(term_counts.values())
+        self._lengths[chunk_id] = length
+        self._total_length += length
+        self._records[chunk_id] = {'content': chunk, 'metadata': metadata}
+
+    def remove(self, ids: Iterable[str]):
+        """Drop chunks from the index"""
+        with self._lock:
+            self._remove(ids)
+
+    def remove_where(self, metadata_key: str, metadata_value: Any):
+        """Drop chunks whose metadata matches a key/value pair"""
+        with self._lock:
+            self._remove([chunk_id for chunk_id, record in self._records.items()
+                          if record['metadata'].get(metadata_key) == metadata_value])
+
+    def _remove(self, ids: Iterable[str]):
+        for chunk_id in list(ids):
+            record = self._records.pop(chunk_id, None)
+            if record is None:
+                continue
+            for term in set(tokenize(record['content'])):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._lengths.pop(chunk_id, 0)
+            self._pending[chunk_id] = None
+
+    def clear(self):
+        with self._lock:
+            self._postings, self._lengths, self._records = {}, {}, {}
+            self._total_length = 0
+            self._pending.clear()
+            self._cleared = True
+
+    def search(self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None,
+               matches_where=None) -> List[Tuple[str, str, Dict[str, Any], float]]:
+        """Return up to k (chunk_id, content, metadata, BM25 score) tuples, best first
+
+        Chunks containing less than min_match of the query's idf weight are
+        dropped, so a single common word never makes an off-topic chunk a hit.
+        Query terms missing from the index weigh as much as the rarest term.
+        matches_where evaluates the optional where filter against chunk metadata.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            document_count = len(self._records)
+            if not terms or not document_count:
+                return []
+
+            average_length = self._total_length / document_count
+            scores: Dict[str, float] = {}
+            matched: Dict[str, float] = {}
+            query_weight = 0.0
+            for term in terms:
+                postings = self._postings.get(term) or {}
+                idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                query_weight += idf
+                for chunk_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+                    matched[chunk_id] = matched.get(chunk_id, 0.0) + idf
+
+            floor = self.min_match * query_weight
+            scores = {chunk_id: score for chunk_id, score in scores.items() if matched[chunk_id] >= floor}
+
+            if where and matches_where is not None:
+                ranked = sorted(scores.items(), key=lambda item: -item[1])
+            else:
+                ranked = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            results = []
+            for chunk_id, score in ranked:
+                record = self._records[chunk_id]
+                if where and matches_where is not None and not matches_where(record['metadata'], where):
+                    continue
+                results.append((chunk_id, record['content'], record['metadata'], score))
+                if len(results) >= k:
+                    break
+            return results
+
+    def get_document_count(self) -> int:
+        return len(self._records)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'chunks': len(self._records),
+            'terms': len(self._postings),
+            'average_chunk_terms': round(self._total_length / len(self._records), 1) if self._records else 0,
+            'index_path': str(self.index_path) if self.index_path else None
+        }
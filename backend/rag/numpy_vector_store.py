@@ -0,0 +1,442 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+import logging
+
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag.embeddings import EmbeddingManager
+from rag.base_vector_store import VectorStore
+from rag.quantization import SCORE_BLOCK_ROWS, quantize_int8, int8_scores, quantize_binary, hamming_scores
+
+logger = logging.getLogger(__name__)
+
+class NumpyVectorStore(VectorStore):
+    """In-process vector store doing exact cosine search over one embedding matrix
+
+    Embeddings are L2-normalized on write and kept in a single float32 or
+    float16 matrix, persisted as an .npy file that is memory-mapped on startup.
+    Chunk text and metadata live in a JSON side table next to it. Search is a
+    matrix-vector product followed by an argpartition top-k.
+
+    With quantization set to 'int8' or 'binary', only compact codes are held in
+    RAM. A first pass scores every code, then the best k * rescore_multiplier
+    candidates are rescored exactly against the memory-mapped full-precision
+    matrix, which the OS pages in on demand.
+    """
+
+    SUPPORTED_DTYPES = ('float32', 'float16')
+    QUANTIZATION_MODES = ('none', 'int8', 'binary')
+
+    def __init__(self, store_path: str, embedding_manager: EmbeddingManager, collection_name: str = "documents",
+                 embedding_batch_size: int = 64, write_batch_size: int = 1000, ingest_batch_size: int = 512,
+                 dtype: str = 'float32', quantization: str = 'none', rescore_multiplier: int = 10):
+        super().__init__(embedding_manager, collection_name, embedding_batch_size, write_batch_size, ingest_batch_size)
+        if dtype not in self.SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        if quantization not in self.QUANTIZATION_MODES:
+            raise ValueError(f"Unsupported quantization mode: {quantization}")
+
+        self.store_path = Path(store_path)
+        self.dtype = np.dtype(dtype)
+        self.dimension = embedding_manager.dimension
+        self.matrix_path = self.store_path / f"{collection_name}.npy"
+        self.records_path = self.store_path / f"{collection_name}.records.json"
+        self.quantization = quantization
+        self.rescore_multiplier = rescore_multiplier
+        self.codes_path = self.store_path / f"{collection_name}.{quantization}.codes.npy"
+        self.scales_path = self.store_path / f"{collection_name}.{quantization}.scales.npy"
+
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, self.dimension), dtype=self.dtype)
+        self._buffer: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._dirty = False
+
+        # Quantized codes cover rows [0, len(self._codes)); newer rows are scored exactly
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._stale_code_rows = set()
+
+        # Create directory if it doesn't exist
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Memory-map a previously saved matrix and read its side table"""
+        if not (self.matrix_path.exists() and self.records_path.exists()):
+            logger.info(f"Created new NumPy vector store: {self.collection_name}")
+            return
+
+        try:
+            matrix = np.load(self.matrix_path, mmap_mode='r')
+            with open(self.records_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+
+            if matrix.shape != (len(records['ids']), self.dimension) or matrix.dtype != self.dtype:
+                logger.warning(f"NumPy vector store at {self.matrix_path} does not match current settings, starting empty")
+                return
+
+            self._matrix = matrix
+            self._ids = records['ids']
+            self._documents = records['documents']
+            self._metadatas = records['metadatas']
+            self._row_by_id = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._load_codes()
+            logger.info(f"Loaded NumPy vector store {self.collection_name} with {len(self._ids)} chunks")
+
+        except Exception as e:
+            logger.error(f"Error loading NumPy vector store: {e}")
+            raise
+
+    def flush(self):
+        """Write the matrix and side table to disk if they changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            matrix_temp = self.matrix_path.with_suffix('.tmp.npy')
+            records_temp = self.records_path.with_suffix('.tmp')
+            np.save(matrix_temp, np.ascontiguousarray(self._matrix))
+            with open(records_temp, 'w', encoding='utf-8') as f:
+                json.dump({'ids': self._ids, 'documents': self._documents, 'metadatas': self._metadatas}, f)
+            os.replace(matrix_temp, self.matrix_path)
+            os.replace(records_temp, self.records_path)
+            self._dirty = False
+
+            if self.quantization != 'none':
+                self._refresh_codes()
+                self._save_codes()
+                # Serve full-precision rows from the memory map so only the codes stay resident
+                self._matrix = np.load(self.matrix_path, mmap_mode='r')
+                self._buffer = None
+
+    def _load_codes(self):
+        """Load persisted codes, re-quantizing if they are missing or out of date"""
+        if self.quantization == 'none':
+            return
+
+        if self.codes_path.exists():
+            codes = np.load(self.codes_path)
+            scales = np.load(self.scales_path) if self.quantization == 'int8' and self.scales_path.exists() else None
+            if len(codes) == len(self._ids) and (self.quantization != 'int8' or (scales is not None and len(scales) == len(codes))):
+                self._codes, self._scales = codes, scales
+                return
+
+        self._refresh_codes()
+        self._save_codes()
+
+    def _quantize(self, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.quantization == 'int8':
+            return quantize_int8(vectors)
+        return quantize_binary(vectors), None
+
+    def _refresh_codes(self):
+        """Quantize rows appended or rewritten since the last refresh (caller holds the lock)"""
+        if self._codes is None:
+            self._codes, self._scales = self._quantize(self._matrix[:0])
+
+        for row in sorted(self._stale_code_rows):
+            if row < len(self._codes):
+                codes, scales = self._quantize(self._matrix[row:row + 1])
+                self._codes[row] = codes[0]
+                if scales is not None:
+                    self._scales[row] = scales[0]
+        self._stale_code_rows = set()
+
+        start = len(self._codes)
+        for block_start in range(start, len(self._matrix), SCORE_BLOCK_ROWS):
+            codes, scales = self._quantize(self._matrix[block_start:block_start + SCORE_BLOCK_ROWS])
+            self._codes = np.concatenate([self._codes, codes])
+            if scales is not None:
+                self._scales = np.concatenate([self._scales, scales])
+
+    def _save_codes(self):
+        codes_temp = self.codes_path.with_suffix('.tmp.npy')
+        np.save(codes_temp, self._codes)
+        os.replace(codes_temp, self.codes_path)
+        if self._scales is not None:
+            scales_temp = self.scales_path.with_suffix('.tmp.npy')
+            np.save(scales_temp, self._scales)
+            os.replace(scales_temp, self.scales_path)
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def _write_chunks(self, ids: List[str], chunks: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """Upsert chunks, overwriting rows for IDs that already exist"""
+        vectors = self._normalize(embeddings).astype(self.dtype)
+
+        with self._lock:
+            new_rows = []
+            updated_rows = []
+
+            for i, chunk_id in enumerate(ids):
+                row = self._row_by_id.get(chunk_id)
+                if row is None:
+                    self._row_by_id[chunk_id] = len(self._ids)
+                    self._ids.append(chunk_id)
+                    self._documents.append(chunks[i])
+                    self._metadatas.append(metadatas[i])
+                    new_rows.append(i)
+                else:
+                    self._documents[row] = chunks[i]
+                    self._metadatas[row] = metadatas[i]
+                    updated_rows.append((row, i))
+                    self._stale_code_rows.add(row)
+
+            old_count = len(self._matrix)
+            buffer = self._writable_buffer(old_count + len(new_rows))
+            for row, i in updated_rows:
+                buffer[row] = vectors[i]
+            buffer[old_count:old_count + len(new_rows)] = vectors[new_rows]
+
+            self._matrix = buffer[:old_count + len(new_rows)]
+            self._dirty = True
+
+    def _writable_buffer(self, rows: int) -> np.ndarray:
+        """Return an in-memory buffer holding the current matrix with room for rows
+
+        Capacity doubles on growth so appending batches stays amortized O(1)
+        per row; the read-only memory map is copied into RAM on first write.
+        """
+        if self._buffer is not None and len(self._buffer) >= rows:
+            return self._buffer
+
+        capacity = max(rows, 2 * len(self._matrix), 1024)
+        buffer = np.empty((capacity, self.dimension), dtype=self.dtype)
+        buffer[:len(self._matrix)] = self._matrix
+        self._buffer = buffer
+        return buffer
+
+    def _query_batch(self, query_embeddings: np.ndarray, k: int,
+                     where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+        """Top-k cosine search for every query, exact or quantized first pass plus exact rescoring
+
+        Exact search scores all queries with one matrix-matrix product. Rows
+        failing the where filter are masked out before top-k selection.
+        """
+        with self._lock:
+            # Writers append to and assign into the side lists in place, so score
+            # against copies cut to the rows of the matrix taken here
+            matrix = self._matrix
+            documents, metadatas = self._documents[:len(matrix)], self._metadatas[:len(matrix)]
+            codes, scales = self._codes, self._scales
+
+        query_vectors = self._normalize(np.asarray(query_embeddings).reshape(-1, self.dimension))
+        mask = np.fromiter((self.matches_where(metadata, where) for metadata in metadatas), dtype=bool,
+                           count=len(metadatas)) if where else None
+
+        if self.quantization == 'none' or codes is None:
+            scores = self._score(matrix, query_vectors, mask)
+            results = []
+            for column in range(len(query_vectors)):
+                column_scores = scores[:, column]
+                top_rows = self._top_k(column_scores, k)
+                results.append([(documents[row], metadatas[row], float(column_scores[row])) for row in top_rows])
+            return results
+
+        results = []
+        for query_vector in query_vectors:
+            rows, exact_scores = self._rescored_candidates(matrix, codes, scales, query_vector, k, mask)
+            order = self._top_k(exact_scores, k)
+            results.append([(documents[rows[i]], metadatas[rows[i]], float(exact_scores[i])) for i in order])
+        return results
+
+    def _rescored_candidates(self, matrix: np.ndarray, codes: np.ndarray, scales: Optional[np.ndarray],
+                             query_vector: np.ndarray, k: int,
+                             mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Shortlist rows on their codes, then score the shortlist exactly
+
+        Rows added after the codes were last refreshed are always shortlisted.
+        """
+        coded_rows = min(len(codes), len(matrix))
+        if self.quantization == 'int8':
+            approximate = int8_scores(codes[:coded_rows], scales[:coded_rows], query_vector)
+        else:
+            approximate = hamming_scores(codes[:coded_rows], query_vector)
+        if mask is not None:
+            approximate = np.where(mask[:coded_rows], approximate, -np.inf)
+
+        shortlist = self._top_k(approximate, k * self.rescore_multiplier)
+        rows = np.sort(np.concatenate([shortlist, np.arange(coded_rows, len(matrix))]))
+        exact_scores = np.asarray(matrix[rows], dtype=np.float32) @ query_vector
+        if mask is not None:
+            exact_scores = np.where(mask[rows], exact_scores, -np.inf)
+        return rows, exact_scores
+
+    def _score(self, matrix: np.ndarray, query_vectors: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity of every row against normalized (n_queries, dim) query vectors"""
+        if matrix.dtype == np.float32:
+            scores = matrix @ query_vectors.T
+        else:
+            scores = np.empty((len(matrix), len(query_vectors)), dtype=np.float32)
+            for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+                block = matrix[start:start + SCORE_BLOCK_ROWS]
+                scores[start:start + len(block)] = block.astype(np.float32) @ query_vectors.T
+
+        if mask is not None:
+            scores = np.where(mask[:, None], scores, -np.inf)
+        return scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest finite scores, best first"""
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def _rows_matching(self, metadata_key: str, metadata_value: Any) -> List[int]:
+        with self._lock:
+            return [row for row, metadata in enumerate(self._metadatas) if metadata.get(metadata_key) == metadata_value]
+
+    def _delete_rows(self, rows: List[int]):
+        """Compact the matrix and side table without the given rows"""
+        with self._lock:
+            keep = np.ones(len(self._ids), dtype=bool)
+            keep[rows] = False
+            self._matrix = np.array(self._matrix[keep])
+            self._buffer = None
+            if self._codes is not None:
+                coded = keep[:len(self._codes)]
+                self._codes = self._codes[coded]
+                self._scales = self._scales[coded] if self._scales is not None else None
+                new_positions = np.cumsum(keep) - 1
+                self._stale_code_rows = {int(new_positions[row]) for row in self._stale_code_rows if keep[row]}
+            self._ids = [chunk_id for chunk_id, kept in zip(self._ids, keep) if kept]
+            self._documents = [doc for doc, kept in zip(self._documents, keep) if kept]
+            self._metadatas = [metadata for metadata, kept in zip(self._metadatas, keep) if kept]
+            self._row_by_id = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._dirty = True
+
+    def get_document_count(self) -> int:
+        """Get the number of documents in the store"""
+        return len(self._ids)
+
+    def reset_collection(self):
+        """Drop every chunk"""
+        with self._lock:
+            self._matrix = np.zeros((0, self.dimension), dtype=self.dtype)
+            self._buffer = None
+            self._codes, self._scales = None, None
+            self._stale_code_rows = set()
+            self._ids, self._documents, self._metadatas = [], [], []
+            self._row_by_id = {}
+            self._dirty = True
+            self.flush()
+        self._lexical_clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the vector store"""
+        return {
+            'backend': self.backend_name,
+            'total_documents': self.get_document_count(),
+            'collection_name': self.collection_name,
+            'embedding_dimension': self.dimension,
+            'embedding_dtype': self.dtype.name,
+            'quantization': self.quantization,
+            'matrix_bytes': int(self._matrix.nbytes),
+            'code_bytes': int(self._codes.nbytes + (self._scales.nbytes if self._scales is not None else 0)) if self._codes is not None else 0,
+            'memory_mapped': isinstance(self._matrix, np.memmap),
+            'store_path': str(self.store_path),
+            'query_cache': self.embedding_manager.query_cache.get_statistics() if self.embedding_manager.query_cache else None
+        }
+
+    def delete_documents(self, document_ids: List[str]) -> bool:
+        """Delete specific documents from the store"""
+        try:
+            with self._lock:
+                rows = [self._row_by_id[chunk_id] for chunk_id in document_ids if chunk_id in self._row_by_id]
+                if rows:
+                    self._delete_rows(rows)
+                    self.flush()
+            self._lexical_remove(document_ids)
+            logger.info(f"Deleted {len(rows)} documents from NumPy vector store")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting documents from NumPy vector store: {e}")
+            return False
+
+    def update_document(self, document_id: str, new_content: str, new_metadata: Dict[str, Any]) -> bool:
+        """Update a specific document in the store"""
+        try:
+            embedding = self.embedding_manager.embed_text(new_content)
+            self._write_chunks([document_id], [new_content], embedding, [new_metadata])
+            self.flush()
+            self._lexical_upsert([document_id], [new_content], [new_metadata])
+            logger.info(f"Updated document {document_id} in NumPy vector store")
+            return True
+        except Exception as e:
+            logger.error(f"Error updating document {document_id} in NumPy vector store: {e}")
+            return False
+
+    def get_collection_info(self) -> Dict[str, Any]:
+        """Get detailed information about the stored matrix"""
+        return {
+            'name': self.collection_name,
+            'count': self.get_document_count(),
+            'metadata': {'space': 'cosine', 'dtype': self.dtype.name, 'quantization': self.quantization},
+            'embedding_function': 'custom'
+        }
+
+    def delete_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> bool:
+        """Delete documents that match specific metadata criteria"""
+        try:
+            with self._lock:
+                rows = self._rows_matching(metadata_key, metadata_value)
+                if not rows:
+                    logger.info(f"No documents found with {metadata_key}={metadata_value}")
+                    return False
+                self._delete_rows(rows)
+                self.flush()
+            self._lexical_remove_where(metadata_key, metadata_value)
+            logger.info(f"Deleted {len(rows)} documents with {metadata_key}={metadata_value}")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting documents by metadata: {e}")
+            return False
+
+    def delete_documents_by_metadata_values(self, metadata_key: str, metadata_values: List[str]) -> int:
+        """Delete chunks whose metadata value is any of metadata_values in one compaction"""
+        try:
+            values = set(metadata_values)
+            with self._lock:
+                rows = [row for row, metadata in enumerate(self._metadatas) if metadata.get(metadata_key) in values]
+                ids = [self._ids[row] for row in rows]
+                if rows:
+                    self._delete_rows(rows)
+                    self.flush()
+            self._lexical_remove(ids)
+            logger.info(f"Deleted {len(rows)} documents matching {len(values)} values of {metadata_key}")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error deleting documents by metadata values: {e}")
+            return 0
+
+    def get_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> List[Dict[str, Any]]:
+        """Get documents that match specific metadata criteria"""
+        with self._lock:
+            documents = [
+                {'content': self._documents[row], 'metadata': self._metadatas[row], 'id': self._ids[row]}
+                for row in self._rows_matching(metadata_key, metadata_value)
+            ]
+        logger.info(f"Retrieved {len(documents)} documents with {metadata_key}={metadata_value}")
+        return documents
@@ -0,0 +1,162 @@
+"""
+ONNX Runtime inference for sentence-transformers models
+
+The model's transformer is exported to ONNX once and cached on disk, optionally
+with dynamic int8 weight quantization. Pooling and normalization are applied
+in NumPy using the settings recorded from the original model, so the encoder
+reproduces SentenceTransformer.encode output.
+
+Compatibility contract: every embedding must keep a cosine similarity to the
+PyTorch model's embedding of at least COSINE_TOLERANCE for its variant, so
+existing collections stay usable without re-embedding. Float32 exports only
+differ by kernel rounding; int8 dynamic quantization typically lands around
+0.99. benchmark_embeddings.py measures this for a given model.
+"""
+
+import json
+from pathlib import Path
+from typing import List, Union
+import logging
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # onnxruntime is optional and only needed for this backend
+    ort = None
+
+logger = logging.getLogger(__name__)
+
+# Minimum per-embedding cosine similarity to the PyTorch model that each export must keep
+COSINE_TOLERANCE = {'float32': 0.9999, 'int8': 0.98}
+
+POOLING_MODES = ('mean', 'cls', 'max')
+
+def quantization_available() -> bool:
+    """True when dynamic int8 quantization can run; it needs the onnx package, which onnxruntime does not install"""
+    try:
+        import onnx  # noqa: F401
+        from onnxruntime.quantization import quantize_dynamic  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def export_model(model_name: str, output_dir: Path, quantize: bool = True):
+    """Export a sentence-transformers model to ONNX with its tokenizer and pooling settings"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_name, device='cpu')
+    transformer, pooling = model[0], model[1]
+    pooling_mode = pooling.get_pooling_mode_str()
+    if pooling_mode not in POOLING_MODES:
+        raise ValueError(f"Unsupported pooling mode for ONNX export: {pooling_mode}")
+
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["ONNX export sample"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs)))[0]
+
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['token_embeddings']}
+    float_path = output_dir / 'model.onnx'
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            str(float_path),
+            input_names=input_names,
+            output_names=['token_embeddings'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(str(float_path), str(output_dir / 'model.int8.onnx'), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(str(output_dir))
+    with open(output_dir / 'embedder.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': model_name,
+            'input_names': input_names,
+            'pooling_mode': pooling_mode,
+            'normalize': any(type(module).__name__ == 'Normalize' for module in model),
+            'max_seq_length': model.max_seq_length,
+            'dimension': model.get_sentence_embedding_dimension()
+        }, f)
+    logger.info(f"Exported {model_name} to ONNX in {output_dir}")
+
+class OnnxEmbedder:
+    """Drop-in replacement for SentenceTransformer.encode backed by ONNX Runtime"""
+
+    def __init__(self, model_name: str, model_dir: str = "data/onnx_models", quantize: bool = True, num_threads: int = 0):
+        if ort is None:
+            raise ImportError("onnxruntime is required for the ONNX embedding backend")
+
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.export_dir = Path(model_dir) / model_name.replace('/', '__')
+        if quantize and not (self.export_dir / 'model.int8.onnx').exists() and not quantization_available():
+            logger.warning("int8 quantization needs the onnx package (pip install onnx), using the float32 ONNX model; "
+                           "set EMBEDDING_ONNX_QUANTIZE=false to silence this")
+            quantize = False
+        self.variant = 'int8' if quantize else 'float32'
+        model_path = self.export_dir / ('model.int8.onnx' if quantize else 'model.onnx')
+        if not model_path.exists() or not (self.export_dir / 'embedder.json').exists():
+            export_model(model_name, self.export_dir, quantize=quantize)
+
+        with open(self.export_dir / 'embedder.json', 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+        self.input_names = settings['input_names']
+        self.pooling_mode = settings['pooling_mode']
+        self.normalize = settings['normalize']
+        self.max_seq_length = settings['max_seq_length']
+        self.dimension = settings['dimension']
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(model_path), options, providers=['CPUExecutionProvider'])
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.export_dir))
+        logger.info(f"Loaded ONNX {self.variant} embedder for {model_name} ({num_threads or 'default'} threads)")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """Embed sentences, matching SentenceTransformer.encode's output shape"""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        embeddings = np.empty((len(sentences), self.dimension), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            encoded = self.tokenizer(batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors='np')
+            feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            token_embeddings = self.session.run(None, feed)[0]
+            embeddings[start:start + len(batch)] = self._pool(token_embeddings, feed['attention_mask'])
+
+        if self.normalize:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling_mode == 'cls':
+            return token_embeddings[:, 0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        if self.pooling_mode == 'max':
+            return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
@@ -0,0 +1,51 @@
+"""
+Compact embedding codes for first-pass vector search
+
+Both schemes operate on L2-normalized float32 embeddings and only produce
+approximate scores; callers rescore the best candidates with the original
+vectors.
+"""
+
+import numpy as np
+
+# Rows scored per block, which bounds temporary float32/uint8 arrays
+SCORE_BLOCK_ROWS = 65536
+
+# Number of set bits in every possible byte
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+def quantize_int8(vectors: np.ndarray):
+    """Scalar-quantize each row to int8 with its own scale
+
+    Returns (codes, scales) such that codes * scales[:, None] / 127 approximates
+    the input rows.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) if len(vectors) else np.zeros(0, dtype=np.float32)
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None] * 127), -127, 127).astype(np.int8)
+    return codes, scales
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+    """Approximate inner products between int8 codes and a float32 query"""
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+        block = codes[start:start + SCORE_BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32) @ query_vector
+    return scores * scales / 127
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Keep one sign bit per dimension, packed eight to a byte"""
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+def hamming_scores(codes: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+    """Negated Hamming distance between packed sign codes and the query's signs
+
+    Higher is better, matching the convention of similarity scores.
+    """
+    query_code = np.packbits(query_vector > 0)
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+        block = codes[start:start + SCORE_BLOCK_ROWS]
+        scores[start:start + len(block)] = -_POPCOUNT[block ^ query_code].sum(axis=1, dtype=np.int32)
+    return scores
@@ -1,7 +1,10 @@
+import asyncio
 import os
+import shutil
 import sys
 import time
-from typing import Dict, Any, Optional, List
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 
 # Add the backend directory to Python path
@@ -9,9 +12,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.config import RAGConfig
 from utils.memory import MemoryManager
-from rag.embeddings import EmbeddingManager
-from rag.vector_store import ChromaDBVectorStore
 from rag.document_loader import DocumentLoader
+from rag.resource_registry import resource_registry
+from rag.ingestion_queue import IngestionQueue, IngestionJob
+from rag.upload_registry import UploadRegistry
+from rag.upload_sweeper import UploadSweeper
+from rag.session_index import SessionIndexes
 from agents.orchestrator import RAGOrchestrator
 from agents.query_agent import QueryUnderstandingAgent
 from agents.retrieval_agent import KnowledgeRetrievalAgent
@@ -32,6 +38,11 @@ class RAGService:
         # Initialize components
         self.embedding_manager = None
         self.vector_store = None
+        self.knowledge_base_sync = None
+        self.ingestion_queue = None
+        self.upload_registry = None
+        self.session_indexes = None
+        self.upload_sweeper = None
         self.memory_manager = None
         self.orchestrator = None
         self.conversation_agent = None
@@ -42,22 +53,43 @@ class RAGService:
     
     async def initialize(self):
         """Initialize the RAG system"""
+        # Stop the workers of any earlier attempt before starting new ones
+        self.shutdown()
+        self.initialization_error = None
         try:
             logger.info("Initializing RAG system...")
             print("Initializing RAG system...")
             
-            # Initialize embedding manager
+            # Initialize embedding manager (shared with every other pipeline in the process)
             logger.info("Loading embedding model...")
             print("Loading embedding model...")
-            self.embedding_manager = EmbeddingManager(self.config.EMBEDDING_MODEL)
+            self.embedding_manager = resource_registry.get_embedding_manager(self.config)
             
             # Initialize vector store
             logger.info("Initializing vector store...")
             print("Initializing vector store...")
-            self.vector_store = ChromaDBVectorStore(
-                self.config.VECTOR_STORE_PATH,
+            self.vector_store = resource_registry.get_vector_store(self.config)
+            self.knowledge_base_sync = resource_registry.get_knowledge_base_sync(self.config)
+            
+            # Uploads are indexed per session in memory, never in the shared persistent store
+            self.upload_registry = UploadRegistry()
+            self.session_indexes = SessionIndexes(
                 self.embedding_manager,
-                self.config.CHROMADB_COLLECTION_NAME
+                max_sessions=self.config.SESSION_INDEX_MAX_SESSIONS,
+                max_bytes=self.config.SESSION_INDEX_MAX_BYTES,
+                on_evict=self._on_session_index_evicted
+            )
+            self.ingestion_queue = IngestionQueue(
+                self.session_indexes,
+                chunk_size=self.config.CHUNK_SIZE,
+                chunk_overlap=self.config.CHUNK_OVERLAP,
+                workers=self.config.INGESTION_WORKERS,
+                loader_workers=self.config.DOCUMENT_LOADER_WORKERS,
+                coalesce_max_files=self.config.INGESTION_COALESCE_MAX_FILES,
+                coalesce_max_bytes=self.config.INGESTION_COALESCE_MAX_BYTES,
+                coalesce_wait_ms=self.config.INGESTION_COALESCE_WAIT_MS,
+                job_ttl=self.config.INGESTION_JOB_TTL,
+                on_finish=self._on_upload_finished
             )
             
             # Initialize memory manager
@@ -65,6 +97,16 @@ class RAGService:
             print("Initializing memory manager...")
             self.memory_manager = MemoryManager()
             
+            # A session's uploads are dropped from its index once it goes idle
+            self.upload_sweeper = UploadSweeper(
+                self.upload_registry,
+                self.session_indexes,
+                ttl=self.config.UPLOAD_TTL,
+                interval=self.config.UPLOAD_SWEEP_INTERVAL,
+                session_activity=self._session_activity
+            )
+            self.upload_sweeper.start()
+            
             # Initialize agents
             logger.info("Initializing agents...")
             print("Initializing agents...")
@@ -84,10 +126,10 @@ class RAGService:
             # Set orchestrator in conversation agent
             self.conversation_agent.orchestrator = self.orchestrator
             
-            # Always rebuild vector store on startup to ensure latest knowledge base files are indexed
-            logger.info("Rebuilding vector store from knowledge base on startup...")
-            print("Rebuilding vector store from knowledge base on startup...")
-            await self._rebuild_vector_store()
+            # Sync only the knowledge base files that changed since the last run
+            logger.info("Syncing vector store with knowledge base on startup...")
+            print("Syncing vector store with knowledge base on startup...")
+            await self._sync_vector_store()
             
             self.is_initialized = True
             logger.info("RAG system initialized successfully!")
@@ -97,12 +139,22 @@ class RAGService:
             self.initialization_error = str(e)
             logger.error(f"Error initializing RAG system: {e}")
             print(f"Error initializing RAG system: {e}")
+            # Don't leave background threads behind for a retry to duplicate
+            self.shutdown()
             raise
     
+    def shutdown(self):
+        """Stop the background ingestion workers and upload sweeper"""
+        if self.upload_sweeper is not None:
+            self.upload_sweeper.stop()
+        if self.ingestion_queue is not None:
+            self.ingestion_queue.stop()
+        self.is_initialized = False
+    
     def _initialize_agents(self):
         """Initialize all RAG agents"""
         self.query_agent = QueryUnderstandingAgent()
-        self.retrieval_agent = KnowledgeRetrievalAgent(self.vector_store)
+        self.retrieval_agent = KnowledgeRetrievalAgent(self.vector_store, self.session_indexes)
         self.synthesis_agent = ContextSynthesisAgent()
         self.generation_agent = ResponseGenerationAgent(
             api_key=self.config.GROQ_API_KEY,
@@ -113,19 +165,17 @@ class RAGService:
     async def _build_vector_store(self):
         """Build the vector store from knowledge base"""
         try:
-            # Load documents
+            # Stream documents from the knowledge base into the vector store
             loader = DocumentLoader(self.config.KNOWLEDGE_BASE_PATH)
-            documents = loader.load_all_documents()
+            chunk_ids_by_source = self.vector_store.add_documents(
+                loader.iter_documents(workers=self.config.DOCUMENT_LOADER_WORKERS),
+                chunk_size=self.config.CHUNK_SIZE,
+                chunk_overlap=self.config.CHUNK_OVERLAP
+            )
             
-            if documents:
-                # Add documents to vector store
-                self.vector_store.add_documents(
-                    documents,
-                    chunk_size=self.config.CHUNK_SIZE,
-                    chunk_overlap=self.config.CHUNK_OVERLAP
-                )
-                logger.info(f"Vector store built with {len(documents)} documents")
-                print(f"Vector store built with {len(documents)} documents")
+            if chunk_ids_by_source:
+                logger.info(f"Vector store built with {len(chunk_ids_by_source)} documents")
+                print(f"Vector store built with {len(chunk_ids_by_source)} documents")
             else:
                 logger.warning("No documents found in knowledge base")
                 print("No documents found in knowledge base")
@@ -139,7 +189,7 @@ class RAGService:
         """Rebuild the vector store from knowledge base (clears existing data)"""
         try:
             # Rebuild the entire vector store
-            self.vector_store.rebuild_index(self.config.KNOWLEDGE_BASE_PATH)
+            self.knowledge_base_sync.sync(full=True)
             document_count = self.vector_store.get_document_count()
             logger.info(f"Vector store rebuilt with {document_count} document chunks")
             print(f"Vector store rebuilt with {document_count} document chunks")
@@ -149,6 +199,20 @@ class RAGService:
             print(f"Error rebuilding vector store: {e}")
             raise
     
+    async def _sync_vector_store(self) -> Dict[str, Any]:
+        """Incrementally sync the vector store with the knowledge base"""
+        try:
+            summary = self.knowledge_base_sync.sync()
+            document_count = self.vector_store.get_document_count()
+            logger.info(f"Vector store synced with {document_count} document chunks: {summary}")
+            print(f"Vector store synced with {document_count} document chunks")
+            return summary
+                
+        except Exception as e:
+            logger.error(f"Error syncing vector store: {e}")
+            print(f"Error syncing vector store: {e}")
+            raise
+    
     async def process_query(self, session_id: str, message: str, user_id: str = "default", uploaded_documents: List[str] = None) -> Dict[str, Any]:
         """Process a user query through the RAG system"""
         if not self.is_initialized:
@@ -182,12 +246,13 @@ class RAGService:
         try:
             logger.info("Rebuilding knowledge base...")
             print("Rebuilding knowledge base...")
-            self.vector_store.rebuild_index(self.config.KNOWLEDGE_BASE_PATH)
+            summary = self.knowledge_base_sync.sync(full=True)
             
             return {
                 'status': 'success',
                 'message': 'Knowledge base rebuilt successfully',
-                'document_count': self.vector_store.get_document_count()
+                'document_count': self.vector_store.get_document_count(),
+                'sync': summary
             }
             
         except Exception as e:
@@ -213,6 +278,11 @@ class RAGService:
         if self.is_initialized:
             status.update({
                 'vector_store': self.vector_store.get_statistics(),
+                'embedding_model': self.embedding_manager.get_model_info(),
+                'ingestion': self.ingestion_queue.get_statistics(),
+                'uploads': self.upload_registry.get_statistics(),
+                'session_indexes': self.session_indexes.get_statistics(),
+                'upload_sweeper': self.upload_sweeper.get_statistics(),
                 'memory_manager': self.memory_manager.get_sessions_info(),
                 'orchestrator': self.orchestrator.get_system_health() if self.orchestrator else None
             })
@@ -271,56 +341,153 @@ class RAGService:
         
         try:
             timeout = timeout or self.config.SESSION_TIMEOUT
+            # Sweep first, while the memory still holds the sessions' last activity
+            uploads = self.upload_sweeper.sweep(ttl=timeout)
             self.conversation_agent.cleanup_inactive_sessions(timeout)
             
             return {
                 'status': 'success',
                 'message': f'Cleaned up sessions inactive for {timeout} seconds',
-                'active_sessions': len(self.memory_manager.get_all_sessions())
+                'active_sessions': len(self.memory_manager.get_all_sessions()),
+                'uploads_reclaimed': uploads
             }
         except Exception as e:
             return {'error': str(e)}
     
+    def _session_activity(self) -> Dict[str, float]:
+        """Last activity time of every session held in conversation memory"""
+        return {session_id: session.last_activity for session_id, session in self.memory_manager.get_all_sessions().items()}
+    
+    def submit_upload(self, file_path: str, session_id: str, filename: str, cleanup_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Queue an uploaded document for background ingestion and return its job status
+        
+        A file whose content is already indexed (or being indexed) for any session
+        is not ingested again; the session just gains a reference to it.
+        """
+        if not self.is_initialized:
+            raise RuntimeError("RAG system not initialized")
+        
+        entry, created = self._register_upload(file_path, session_id, filename)
+        if not created:
+            if cleanup_dir:
+                shutil.rmtree(cleanup_dir, ignore_errors=True)
+            return self._deduplicated_status(entry, session_id, filename)
+        
+        job = self.ingestion_queue.submit(file_path, filename, self._upload_metadata(entry, session_id), cleanup_dir=cleanup_dir)
+        self.upload_registry.set_job(entry['document_id'], job.job_id)
+        return {**job.to_dict(), 'deduplicated': False}
+    
+    def submit_bulk_upload(self, files: List[Tuple[str, str]], session_id: str, cleanup_dir: Optional[str] = None,
+                           skipped: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Queue several saved (file_path, filename) uploads to be parsed, embedded and written as one batch
+        
+        Files that are already indexed, or repeat another file in the batch, are
+        referenced instead of ingested and reported under 'skipped'.
+        """
+        if not self.is_initialized:
+            raise RuntimeError("RAG system not initialized")
+        
+        skipped = list(skipped or [])
+        new_files = []
+        for file_path, filename in files:
+            entry, created = self._register_upload(file_path, session_id, filename)
+            if created:
+                new_files.append((file_path, filename, self._upload_metadata(entry, session_id)))
+            else:
+                skipped.append({'filename': filename, 'reason': 'Already uploaded', **self._deduplicated_status(entry, session_id, filename)})
+        
+        bulk = self.ingestion_queue.submit_bulk(new_files, cleanup_dir=cleanup_dir, skipped=skipped)
+        for job in bulk.jobs:
+            self.upload_registry.set_job(job.metadata['document_id'], job.job_id)
+        return bulk.to_dict()
+    
+    def _register_upload(self, file_path: str, session_id: str, filename: str) -> Tuple[Dict[str, Any], bool]:
+        """Reference the upload's content for the session; True when it still has to be ingested"""
+        content_hash = DocumentLoader.hash_file(Path(file_path))
+        entry, created = self.upload_registry.acquire(content_hash, session_id, filename, os.path.getsize(file_path))
+        
+        # Copy already embedded chunks into the session's index; every session holding them may have been evicted
+        if not created and entry['status'] == 'indexed' and \
+                not self.session_indexes.copy_document(entry['document_id'], session_id):
+            logger.info(f"Chunks of {entry['document_id']} are no longer held by any session, ingesting it again")
+            self.upload_registry.mark_pending(entry['document_id'])
+            created = True
+        return entry, created
+    
+    def _deduplicated_status(self, entry: Dict[str, Any], session_id: str, filename: str) -> Dict[str, Any]:
+        job = self.ingestion_queue.get_job(entry['job_id']) if entry['job_id'] else None
+        logger.info(f"Upload {filename} for session {session_id} matches {entry['document_id']}, reusing its chunks")
+        return {
+            'job_id': entry['job_id'],
+            'document_id': entry['document_id'],
+            'filename': filename,
+            'session_id': session_id,
+            'status': job.status if job else 'completed',
+            'deduplicated': True
+        }
+    
+    def _on_upload_finished(self, job: IngestionJob):
+        """Record the ingestion outcome for the upload's registry entry"""
+        document_id = job.metadata['document_id']
+        if job.status == 'completed':
+            self.upload_registry.mark_indexed(document_id, job.chunks_total)
+            # Sessions that uploaded the same content during ingestion get their own copy
+            entry = self.upload_registry.get(document_id) or {'sessions': {}}
+            for session_id in entry['sessions']:
+                self.session_indexes.copy_document(document_id, session_id)
+        else:
+            # Drop the entry and any partly written chunks so the next upload of this content is ingested again
+            self.upload_registry.forget(document_id)
+            self.session_indexes.delete_documents_by_metadata_values('meta_document_id', [document_id])
+    
+    def _on_session_index_evicted(self, session_id: str, document_ids: List[str]):
+        """Release the references of a session whose upload index was evicted"""
+        for document_id in document_ids:
+            self.upload_registry.release(document_id, session_id)
+        logger.info(f"Upload index of session {session_id} evicted, released {len(document_ids)} documents")
+    
+    @staticmethod
+    def _upload_metadata(entry: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Priority metadata merged into an uploaded document's metadata"""
+        return {
+            'session_id': session_id,  # The session whose index receives the chunks
+            'document_id': entry['document_id'],
+            'content_hash': entry['content_hash'],
+            'upload_priority': 'high',  # High priority for uploaded documents
+            'upload_timestamp': time.time(),
+            'source_type': 'uploaded'
+        }
+    
+    def get_upload_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the status of an ingestion job, or None if it is unknown or expired"""
+        if not self.is_initialized:
+            raise RuntimeError("RAG system not initialized")
+        
+        job = self.ingestion_queue.get_job(job_id)
+        return job.to_dict() if job else None
+    
     async def upload_document(self, file_path: str, session_id: str, filename: str) -> Dict[str, Any]:
-        """Upload and process a document for the current session"""
+        """Upload and process a document for the current session, waiting for ingestion to finish"""
         if not self.is_initialized:
             raise RuntimeError("RAG system not initialized")
         
         try:
-            # Load the document
-            loader = DocumentLoader(os.path.dirname(file_path))
-            document = loader.load_document(os.path.basename(file_path))
-            
-            # Generate unique document ID
-            document_id = f"uploaded_{session_id}_{filename}_{int(time.time())}"
-            
-            # Add session and priority metadata
-            document['metadata'].update({
-                'session_id': session_id,
-                'document_id': document_id,
-                'upload_priority': 'high',  # High priority for uploaded documents
-                'upload_timestamp': time.time(),
-                'source_type': 'uploaded'
-            })
-            
-            # Add to vector store with high priority
-            self.vector_store.add_documents(
-                [document],
-                chunk_size=self.config.CHUNK_SIZE,
-                chunk_overlap=self.config.CHUNK_OVERLAP
-            )
-            
-            # Store document info in memory manager for session tracking
-            if hasattr(self.memory_manager, 'add_uploaded_document'):
-                self.memory_manager.add_uploaded_document(session_id, document_id, filename)
+            job_status = self.submit_upload(file_path, session_id, filename)
+            job = self.ingestion_queue.get_job(job_status['job_id']) if job_status['job_id'] else None
+            if job is not None:
+                await asyncio.get_event_loop().run_in_executor(None, job.wait)
+                if job.status != 'completed':
+                    raise RuntimeError(job.error or 'Ingestion failed')
             
             logger.info(f"Document {filename} uploaded and processed successfully")
+            entry = self.upload_registry.get(job_status['document_id']) or {}
             
             return {
-                'document_id': document_id,
+                'document_id': job_status['document_id'],
                 'filename': filename,
                 'session_id': session_id,
-                'chunks_created': len(document.get('content', '').split('\n')),
+                'chunks_created': entry.get('chunk_count', 0),
+                'deduplicated': job_status['deduplicated'],
                 'status': 'success'
             }
             
@@ -332,28 +499,35 @@ class RAGService:
                 'filename': filename
             }
     
-    async def remove_uploaded_document(self, document_id: str) -> Dict[str, Any]:
-        """Remove an uploaded document from the vector store"""
+    async def remove_uploaded_document(self, document_id: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Drop a session's reference to an uploaded document, or every reference without a session
+        
+        The document's chunks are removed from the upload index of each session losing its reference.
+        """
         if not self.is_initialized:
             raise RuntimeError("RAG system not initialized")
         
         try:
-            # Remove document from vector store
-            # Note: This is a simplified approach. In production, you'd want to track document IDs more precisely
-            success = self.vector_store.delete_documents_by_metadata('document_id', document_id)
-            
-            if success:
-                logger.info(f"Document {document_id} removed successfully")
-                return {
-                    'success': True,
-                    'document_id': document_id,
-                    'chunks_removed': 1  # This would need to be tracked more precisely
-                }
-            else:
+            entry = self.upload_registry.get(document_id)
+            found, last_reference = self.upload_registry.release(document_id, session_id)
+            if not found:
                 return {
                     'success': False,
                     'error': 'Document not found or could not be removed'
                 }
+            
+            if session_id:
+                chunks_removed = self.session_indexes.remove_document(session_id, document_id)
+            else:
+                chunks_removed = self.session_indexes.delete_documents_by_metadata_values('meta_document_id', [document_id])
+            
+            logger.info(f"Removed {document_id} for session {session_id or 'all sessions'}, deleting {chunks_removed} chunks")
+            return {
+                'success': True,
+                'document_id': document_id,
+                'chunks_removed': chunks_removed,
+                'remaining_references': 0 if last_reference else len(entry['sessions']) - 1
+            }
                 
         except Exception as e:
             logger.error(f"Error removing document {document_id}: {e}")
@@ -368,14 +542,8 @@ class RAGService:
             raise RuntimeError("RAG system not initialized")
         
         try:
-            # Get documents from vector store with session metadata
-            documents = self.vector_store.get_documents_by_metadata('session_id', session_id)
-            
-            # Filter for uploaded documents only
-            uploaded_docs = [
-                doc for doc in documents 
-                if doc.get('metadata', {}).get('source_type') == 'uploaded'
-            ]
+            # Uploads are shared between sessions, so membership lives in the registry
+            uploaded_docs = self.upload_registry.get_session_documents(session_id)
             
             return {
                 'session_id': session_id,
@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+from typing import Dict, Any, Tuple
+import logging
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import RAGConfig
+from rag.embeddings import EmbeddingManager
+from rag.embedding_cache import EmbeddingCache
+from rag.base_vector_store import VectorStore
+from rag.vector_store import create_vector_store
+from rag.index_sync import KnowledgeBaseSync
+
+logger = logging.getLogger(__name__)
+
+class ResourceRegistry:
+    """Process-wide owner of the heavyweight RAG resources
+
+    Embedding models, vector stores and knowledge base syncs are built lazily
+    on first request and then shared, so the /api/rag and /api/tasks
+    pipelines use one model and one store per configuration. Construction is
+    serialized, so concurrent first requests load each resource only once.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._embedding_managers: Dict[Tuple, EmbeddingManager] = {}
+        self._vector_stores: Dict[Tuple, VectorStore] = {}
+        self._syncs: Dict[Tuple, KnowledgeBaseSync] = {}
+
+    @staticmethod
+    def _embedding_key(config) -> Tuple:
+        quantize = config.EMBEDDING_ONNX_QUANTIZE if config.EMBEDDING_BACKEND == 'onnx' else None
+        return config.EMBEDDING_MODEL, config.EMBEDDING_BACKEND, quantize
+
+    @staticmethod
+    def _store_key(config) -> Tuple:
+        store_paths = {
+            'chromadb': config.VECTOR_STORE_PATH,
+            'numpy': config.NUMPY_STORE_PATH,
+            'faiss': config.FAISS_STORE_PATH
+        }
+        store_path = os.path.abspath(store_paths.get(config.VECTOR_STORE_BACKEND, config.VECTOR_STORE_PATH))
+        return (config.VECTOR_STORE_BACKEND, store_path, config.CHROMADB_COLLECTION_NAME) + ResourceRegistry._embedding_key(config)
+
+    def get_embedding_manager(self, config=RAGConfig) -> EmbeddingManager:
+        """Return the shared embedding manager for the configured model and backend"""
+        key = self._embedding_key(config)
+        with self._lock:
+            embedding_manager = self._embedding_managers.get(key)
+            if embedding_manager is None:
+                logger.info(f"Loading embedding model {config.EMBEDDING_MODEL} ({config.EMBEDDING_BACKEND})")
+                embedding_cache = None
+                if config.EMBEDDING_CACHE_ENABLED:
+                    embedding_cache = EmbeddingCache(config.EMBEDDING_CACHE_PATH, max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES)
+                embedding_manager = EmbeddingManager(
+                    config.EMBEDDING_MODEL,
+                    cache=embedding_cache,
+                    query_cache_size=config.QUERY_CACHE_SIZE,
+                    query_cache_ttl=config.QUERY_CACHE_TTL,
+                    backend=config.EMBEDDING_BACKEND,
+                    onnx_model_dir=config.EMBEDDING_ONNX_PATH,
+                    onnx_quantize=config.EMBEDDING_ONNX_QUANTIZE,
+                    onnx_threads=config.EMBEDDING_ONNX_THREADS,
+                    micro_batch_size=config.EMBEDDING_MICRO_BATCH_SIZE,
+                    micro_batch_wait_ms=config.EMBEDDING_MICRO_BATCH_WAIT_MS
+                )
+                self._embedding_managers[key] = embedding_manager
+            return embedding_manager
+
+    def get_vector_store(self, config=RAGConfig) -> VectorStore:
+        """Return the shared vector store for the configured backend and path"""
+        key = self._store_key(config)
+        with self._lock:
+            vector_store = self._vector_stores.get(key)
+            if vector_store is None:
+                logger.info(f"Opening {config.VECTOR_STORE_BACKEND} vector store at {key[1]}")
+                vector_store = create_vector_store(config, self.get_embedding_manager(config))
+                self._vector_stores[key] = vector_store
+            return vector_store
+
+    def get_knowledge_base_sync(self, config=RAGConfig) -> KnowledgeBaseSync:
+        """Return the shared knowledge base sync for the configured vector store"""
+        key = self._store_key(config) + (os.path.abspath(config.KNOWLEDGE_BASE_PATH),)
+        with self._lock:
+            knowledge_base_sync = self._syncs.get(key)
+            if knowledge_base_sync is None:
+                knowledge_base_sync = KnowledgeBaseSync(
+                    self.get_vector_store(config),
+                    config.KNOWLEDGE_BASE_PATH,
+                    config.KNOWLEDGE_BASE_MANIFEST_PATH,
+                    chunk_size=config.CHUNK_SIZE,
+                    chunk_overlap=config.CHUNK_OVERLAP,
+                    loader_workers=config.DOCUMENT_LOADER_WORKERS
+                )
+                self._syncs[key] = knowledge_base_sync
+            return knowledge_base_sync
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'embedding_managers': [list(key) for key in self._embedding_managers],
+                'vector_stores': [list(key[:3]) for key in self._vector_stores],
+                'knowledge_base_syncs': len(self._syncs)
+            }
+
+    def clear(self):
+        """Forget every shared resource, e.g. after configuration changes"""
+        with self._lock:
+            for vector_store in self._vector_stores.values():
+                vector_store.flush()
+            self._embedding_managers.clear()
+            self._vector_stores.clear()
+            self._syncs.clear()
+
+# Shared by every service in the process
+resource_registry = ResourceRegistry()
@@ -0,0 +1,420 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Tuple, Optional
+import logging
+
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag.embeddings import EmbeddingManager
+from rag.base_vector_store import VectorStore
+from rag.lexical_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+class EphemeralVectorStore(VectorStore):
+    """In-memory vector store holding one session's uploaded chunks
+
+    Embeddings are L2-normalized into a float32 matrix searched exactly with a
+    matrix product, next to an in-memory BM25 index for lexical and hybrid
+    retrieval. Nothing is written to disk.
+    """
+
+    def __init__(self, embedding_manager: EmbeddingManager, collection_name: str = "session_uploads",
+                 embedding_batch_size: int = 64, write_batch_size: int = 1000, ingest_batch_size: int = 512):
+        super().__init__(embedding_manager, collection_name, embedding_batch_size, write_batch_size, ingest_batch_size)
+        self.dimension = embedding_manager.dimension
+        self.lexical_index = BM25Index(None)
+
+        self._lock = threading.RLock()
+        self._matrix = np.empty((0, self.dimension), dtype=np.float32)
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._text_bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held: the embedding matrix plus chunk text"""
+        return int(self._matrix.nbytes) + self._text_bytes
+
+    def _write_chunks(self, ids: List[str], chunks: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """Upsert chunks, overwriting rows for IDs that already exist"""
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        vectors = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            new_rows = []
+            for i, chunk_id in enumerate(ids):
+                row = self._row_by_id.get(chunk_id)
+                if row is None:
+                    self._row_by_id[chunk_id] = len(self._ids)
+                    self._ids.append(chunk_id)
+                    self._documents.append(chunks[i])
+                    self._metadatas.append(metadatas[i])
+                    self._text_bytes += len(chunks[i])
+                    new_rows.append(i)
+                else:
+                    self._text_bytes += len(chunks[i]) - len(self._documents[row])
+                    self._documents[row] = chunks[i]
+                    self._metadatas[row] = metadatas[i]
+                    self._matrix[row] = vectors[i]
+            if new_rows:
+                self._matrix = np.concatenate([self._matrix, vectors[new_rows]])
+
+    def _query_batch(self, query_embeddings: np.ndarray, k: int,
+                     where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+        """Exact top-k cosine search for every query, masking rows that fail the where filter"""
+        with self._lock:
+            # The side lists are mutated in place, so query copies that match the matrix
+            matrix = self._matrix
+            documents, metadatas = self._documents[:len(matrix)], self._metadatas[:len(matrix)]
+
+        query_vectors = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        query_vectors = query_vectors / np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+        scores = matrix @ query_vectors.T
+        if where:
+            mask = np.fromiter((self.matches_where(metadata, where) for metadata in metadatas), dtype=bool, count=len(metadatas))
+            scores = np.where(mask[:, None], scores, -np.inf)
+
+        results = []
+        for column in range(len(query_vectors)):
+            column_scores = scores[:, column]
+            top_k = min(k, int(np.isfinite(column_scores).sum()))
+            if top_k <= 0:
+                results.append([])
+                continue
+            candidates = np.argpartition(-column_scores, top_k - 1)[:top_k] if top_k < len(column_scores) else np.arange(len(column_scores))
+            top_rows = candidates[np.argsort(-column_scores[candidates], kind='stable')]
+            results.append([(documents[row], metadatas[row], float(column_scores[row])) for row in top_rows])
+        return results
+
+    def _delete_rows(self, rows: List[int]) -> List[str]:
+        """Drop rows from the matrix and side lists, returning their chunk IDs"""
+        with self._lock:
+            keep = np.ones(len(self._ids), dtype=bool)
+            keep[rows] = False
+            deleted = [self._ids[row] for row in rows]
+            self._text_bytes -= sum(len(self._documents[row]) for row in rows)
+            self._matrix = self._matrix[keep]
+            self._ids = [chunk_id for chunk_id, kept in zip(self._ids, keep) if kept]
+            self._documents = [document for document, kept in zip(self._documents, keep) if kept]
+            self._metadatas = [metadata for metadata, kept in zip(self._metadatas, keep) if kept]
+            self._row_by_id = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._lexical_remove(deleted)
+        return deleted
+
+    def _rows_matching(self, metadata_key: str, metadata_values) -> List[int]:
+        with self._lock:
+            return [row for row, metadata in enumerate(self._metadatas) if metadata.get(metadata_key) in metadata_values]
+
+    def copy_document(self, source: 'EphemeralVectorStore', document_id: str,
+                      metadata_updates: Optional[Dict[str, Any]] = None) -> int:
+        """Copy a document's chunks and embeddings from another session's store without re-embedding
+
+        Copied chunk metadata is updated with metadata_updates, e.g. to name the new session.
+        """
+        with source._lock:
+            rows = source._rows_matching('meta_document_id', {document_id})
+            ids = [source._ids[row] for row in rows]
+            chunks = [source._documents[row] for row in rows]
+            metadatas = [{**source._metadatas[row], **(metadata_updates or {})} for row in rows]
+            embeddings = source._matrix[rows]
+        if rows:
+            self._write_chunks(ids, chunks, embeddings, metadatas)
+            self.lexical_index.add(ids, chunks, metadatas)
+        return len(rows)
+
+    def get_document_count(self) -> int:
+        """Get the number of chunks in the store"""
+        return len(self._ids)
+
+    def reset_collection(self):
+        """Drop every chunk"""
+        with self._lock:
+            self._matrix = np.empty((0, self.dimension), dtype=np.float32)
+            self._ids, self._documents, self._metadatas = [], [], []
+            self._row_by_id = {}
+            self._text_bytes = 0
+        self._lexical_clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the store"""
+        return {
+            'backend': self.backend_name,
+            'total_documents': self.get_document_count(),
+            'documents': len({metadata.get('meta_document_id') for metadata in self._metadatas}),
+            'embedding_dimension': self.dimension,
+            'bytes': self.nbytes
+        }
+
+    def delete_documents(self, document_ids: List[str]) -> bool:
+        """Delete specific chunks from the store"""
+        with self._lock:
+            rows = [self._row_by_id[chunk_id] for chunk_id in document_ids if chunk_id in self._row_by_id]
+            if rows:
+                self._delete_rows(rows)
+        return True
+
+    def update_document(self, document_id: str, new_content: str, new_metadata: Dict[str, Any]) -> bool:
+        """Update a specific chunk in the store"""
+        try:
+            embedding = self.embedding_manager.embed_text(new_content)
+            self._write_chunks([document_id], [new_content], embedding, [new_metadata])
+            self._lexical_upsert([document_id], [new_content], [new_metadata])
+            return True
+        except Exception as e:
+            logger.error(f"Error updating document {document_id} in session store: {e}")
+            return False
+
+    def get_collection_info(self) -> Dict[str, Any]:
+        """Get detailed information about the in-memory matrix"""
+        return {
+            'name': self.collection_name,
+            'count': self.get_document_count(),
+            'metadata': {'space': 'cosine', 'dtype': 'float32', 'persistent': False},
+            'embedding_function': 'custom'
+        }
+
+    def delete_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> bool:
+        """Delete chunks that match specific metadata criteria"""
+        return self.delete_documents_by_metadata_values(metadata_key, [metadata_value]) > 0
+
+    def delete_documents_by_metadata_values(self, metadata_key: str, metadata_values: List[str]) -> int:
+        """Delete chunks whose metadata value is any of metadata_values"""
+        with self._lock:
+            rows = self._rows_matching(metadata_key, set(metadata_values))
+            if rows:
+                self._delete_rows(rows)
+        return len(rows)
+
+    def get_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> List[Dict[str, Any]]:
+        """Get chunks that match specific metadata criteria"""
+        with self._lock:
+            return [
+                {'content': self._documents[row], 'metadata': self._metadatas[row], 'id': self._ids[row]}
+                for row in self._rows_matching(metadata_key, {metadata_value})
+            ]
+
+class SessionIndexes(VectorStore):
+    """Per-session ephemeral indexes for uploaded documents, bounded by LRU
+
+    Each session's uploads live in their own EphemeralVectorStore, so uploads
+    never touch the persistent global index and a session's search needs no
+    metadata post-filtering. Written chunks are routed to the store of their
+    meta_session_id. A document already indexed for another session is copied
+    with its embeddings instead of being embedded again; each session holds
+    its own copy, counted against max_bytes.
+
+    When there are more than max_sessions stores or they hold more than
+    max_bytes, the least recently used sessions are evicted and on_evict is
+    called with (session_id, document_ids) for each.
+    """
+
+    def __init__(self, embedding_manager: EmbeddingManager, max_sessions: int = 256, max_bytes: int = 256 * 1024 * 1024,
+                 embedding_batch_size: int = 64, ingest_batch_size: int = 512,
+                 on_evict: Optional[Callable[[str, List[str]], None]] = None):
+        super().__init__(embedding_manager, "session_uploads", embedding_batch_size, ingest_batch_size=ingest_batch_size)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+
+        self._lock = threading.RLock()
+        self._stores: "OrderedDict[str, EphemeralVectorStore]" = OrderedDict()
+        self._stats = {'sessions_evicted': 0, 'bytes_evicted': 0, 'documents_copied': 0}
+
+    def get_session(self, session_id: str) -> Optional[EphemeralVectorStore]:
+        """Return the session's store, marking it recently used"""
+        with self._lock:
+            store = self._stores.get(session_id)
+            if store is not None:
+                self._stores.move_to_end(session_id)
+            return store
+
+    def _session_store(self, session_id: str) -> EphemeralVectorStore:
+        """Return the session's store, creating it if needed (caller holds the lock)"""
+        store = self._stores.get(session_id)
+        if store is None:
+            store = self._stores[session_id] = EphemeralVectorStore(
+                self.embedding_manager, f"session_{session_id}", self.embedding_batch_size,
+                ingest_batch_size=self.ingest_batch_size
+            )
+        self._stores.move_to_end(session_id)
+        return store
+
+    def _write_chunks(self, ids: List[str], chunks: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """Route each chunk to the store of the session that uploaded it"""
+        rows_by_session: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            rows_by_session.setdefault(str(metadata.get('meta_session_id')), []).append(i)
+
+        with self._lock:
+            for session_id, rows in rows_by_session.items():
+                store = self._session_store(session_id)
+                session_ids = [ids[i] for i in rows]
+                session_chunks = [chunks[i] for i in rows]
+                session_metadatas = [metadatas[i] for i in rows]
+                store._write_chunks(session_ids, session_chunks, np.asarray(embeddings)[rows], session_metadatas)
+                store.lexical_index.add(session_ids, session_chunks, session_metadatas)
+            evicted = self._evict_overflow(keep=set(rows_by_session))
+        self._notify_evicted(evicted)
+
+    def copy_document(self, document_id: str, session_id: str) -> bool:
+        """Make a document's chunks searchable in a session, copying them from any session holding them
+
+        Returns False when no session holds the document any more.
+        """
+        with self._lock:
+            target = self._stores.get(session_id)
+            if target is not None and target.get_documents_by_metadata('meta_document_id', document_id):
+                self._stores.move_to_end(session_id)
+                return True
+
+            source = next((store for owner, store in self._stores.items()
+                           if owner != session_id and store.get_documents_by_metadata('meta_document_id', document_id)), None)
+            if source is None:
+                return False
+            self._session_store(session_id).copy_document(source, document_id, {'meta_session_id': session_id})
+            self._stats['documents_copied'] += 1
+            evicted = self._evict_overflow(keep={session_id})
+        self._notify_evicted(evicted)
+        return True
+
+    def remove_document(self, session_id: str, document_id: str) -> int:
+        """Drop a document from one session's store, returning the number of chunks removed"""
+        return self.remove_references([(session_id, document_id)])
+
+    def remove_references(self, references: List[Tuple[str, str]]) -> int:
+        """Drop (session_id, document_id) pairs, discarding stores left empty"""
+        documents_by_session: Dict[str, List[str]] = {}
+        for session_id, document_id in references:
+            documents_by_session.setdefault(session_id, []).append(document_id)
+
+        removed = 0
+        with self._lock:
+            for session_id, document_ids in documents_by_session.items():
+                store = self._stores.get(session_id)
+                if store is None:
+                    continue
+                removed += store.delete_documents_by_metadata_values('meta_document_id', document_ids)
+                if not store.get_document_count():
+                    del self._stores[session_id]
+        return removed
+
+    def drop_session(self, session_id: str) -> bool:
+        """Discard a session's store"""
+        with self._lock:
+            return self._stores.pop(session_id, None) is not None
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(store.nbytes for store in self._stores.values())
+
+    def _evict_overflow(self, keep: set) -> List[Tuple[str, List[str]]]:
+        """Evict least recently used sessions outside keep until within bounds (caller holds the lock)"""
+        evicted = []
+        total_bytes = self.nbytes
+        for session_id in list(self._stores):
+            if len(self._stores) <= self.max_sessions and total_bytes <= self.max_bytes:
+                break
+            if session_id in keep:
+                continue
+            store = self._stores.pop(session_id)
+            total_bytes -= store.nbytes
+            self._stats['sessions_evicted'] += 1
+            self._stats['bytes_evicted'] += store.nbytes
+            evicted.append((session_id, sorted({metadata.get('meta_document_id') for metadata in store._metadatas})))
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} session upload indexes, {total_bytes} bytes remain")
+        return evicted
+
+    def _notify_evicted(self, evicted: List[Tuple[str, List[str]]]):
+        if self.on_evict is None:
+            return
+        for session_id, document_ids in evicted:
+            try:
+                self.on_evict(session_id, document_ids)
+            except Exception as e:
+                logger.error(f"Error in session index eviction callback for {session_id}: {e}")
+
+    def _query_batch(self, query_embeddings: np.ndarray, k: int,
+                     where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+        """Search every session's store and keep the overall top k per query"""
+        with self._lock:
+            stores = list(self._stores.values())
+        merged = [[] for _ in range(len(np.asarray(query_embeddings).reshape(-1, self.embedding_manager.dimension)))]
+        for store in stores:
+            for query_matches, store_matches in zip(merged, store._query_batch(query_embeddings, k, where)):
+                query_matches.extend(store_matches)
+        return [sorted(query_matches, key=lambda match: -match[2])[:k] for query_matches in merged]
+
+    def get_document_count(self) -> int:
+        """Get the number of chunks across every session"""
+        with self._lock:
+            return sum(store.get_document_count() for store in self._stores.values())
+
+    def reset_collection(self):
+        """Drop every session's store"""
+        with self._lock:
+            self._stores.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the session indexes"""
+        with self._lock:
+            return {
+                'backend': self.backend_name,
+                'sessions': len(self._stores),
+                'max_sessions': self.max_sessions,
+                'total_documents': self.get_document_count(),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                **self._stats
+            }
+
+    def delete_documents(self, document_ids: List[str]) -> bool:
+        """Delete specific chunks from every session"""
+        with self._lock:
+            for store in self._stores.values():
+                store.delete_documents(document_ids)
+        return True
+
+    def update_document(self, document_id: str, new_content: str, new_metadata: Dict[str, Any]) -> bool:
+        """Update a chunk in the session that uploaded it"""
+        with self._lock:
+            store = self._session_store(str(new_metadata.get('meta_session_id')))
+        return store.update_document(document_id, new_content, new_metadata)
+
+    def get_collection_info(self) -> Dict[str, Any]:
+        """Get detailed information about the session indexes"""
+        return {
+            'name': self.collection_name,
+            'count': self.get_document_count(),
+            'metadata': {'space': 'cosine', 'sessions': len(self._stores), 'persistent': False},
+            'embedding_function': 'custom'
+        }
+
+    def delete_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> bool:
+        """Delete chunks that match specific metadata criteria in every session"""
+        return self.delete_documents_by_metadata_values(metadata_key, [metadata_value]) > 0
+
+    def delete_documents_by_metadata_values(self, metadata_key: str, metadata_values: List[str]) -> int:
+        """Delete chunks whose metadata value is any of metadata_values in every session"""
+        deleted = 0
+        with self._lock:
+            for session_id, store in list(self._stores.items()):
+                deleted += store.delete_documents_by_metadata_values(metadata_key, metadata_values)
+                if not store.get_document_count():
+                    del self._stores[session_id]
+        return deleted
+
+    def get_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> List[Dict[str, Any]]:
+        """Get chunks that match specific metadata criteria across every session"""
+        with self._lock:
+            return [document for store in self._stores.values()
+                    for document in store.get_documents_by_metadata(metadata_key, metadata_value)]
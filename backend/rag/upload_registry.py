@@ -0,0 +1,154 @@
+import copy
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class UploadRegistry:
+    """Reference-counted record of uploaded documents, keyed by file content hash
+
+    Identical files uploaded in different sessions share one document ID and
+    are parsed and embedded once; each session only holds a reference. An entry is
+    'pending' while its first upload is being ingested and 'indexed' after.
+    Each reference records when its session was last active, so references of
+    idle sessions can expire. Like the session indexes holding the chunks,
+    entries live only in memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self.dedup_hits = 0
+
+    @staticmethod
+    def document_id_for(content_hash: str) -> str:
+        return f"uploaded_{content_hash[:24]}"
+
+    def acquire(self, content_hash: str, session_id: str, filename: str, file_size: int) -> Tuple[Dict[str, Any], bool]:
+        """Add a session reference to the document with this content, creating it if needed
+
+        Returns (entry, created); created is True when the caller must ingest the file.
+        """
+        document_id = self.document_id_for(content_hash)
+        now = time.time()
+        with self._lock:
+            entry = self._documents.get(document_id)
+            created = entry is None
+            if created:
+                entry = {
+                    'document_id': document_id,
+                    'content_hash': content_hash,
+                    'filename': filename,
+                    'file_size': file_size,
+                    'status': 'pending',
+                    'job_id': None,
+                    'chunk_count': 0,
+                    'created_at': now,
+                    'sessions': {}
+                }
+                self._documents[document_id] = entry
+            else:
+                self.dedup_hits += 1
+            entry['sessions'][session_id] = {'filename': filename, 'uploaded_at': now, 'last_active': now}
+            return copy.deepcopy(entry), created
+
+    def set_job(self, document_id: str, job_id: str):
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is not None:
+                entry['job_id'] = job_id
+
+    def mark_indexed(self, document_id: str, chunk_count: int):
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is not None:
+                entry.update({'status': 'indexed', 'chunk_count': chunk_count})
+
+    def mark_pending(self, document_id: str):
+        """Flag an indexed document for re-ingestion, keeping its references"""
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is not None:
+                entry.update({'status': 'pending', 'chunk_count': 0})
+
+    def forget(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Drop a document and all of its references, e.g. after its ingestion failed"""
+        with self._lock:
+            return self._documents.pop(document_id, None)
+
+    def release(self, document_id: str, session_id: Optional[str] = None) -> Tuple[bool, bool]:
+        """Drop one session's reference, or every reference when session_id is None
+
+        Returns (found, last_reference); when last_reference is True the entry
+        is gone and the caller should delete the document's chunks.
+        """
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is None or (session_id is not None and session_id not in entry['sessions']):
+                return False, False
+            if session_id is None:
+                entry['sessions'].clear()
+            else:
+                del entry['sessions'][session_id]
+            last_reference = not entry['sessions']
+            if last_reference:
+                del self._documents[document_id]
+            return True, last_reference
+
+    def expire_references(self, ttl: float, session_activity: Optional[Dict[str, float]] = None) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]]]:
+        """Drop references of sessions inactive for longer than ttl seconds
+
+        session_activity maps session IDs to their latest activity time and
+        refreshes the stored references first. Pending documents are skipped
+        while their ingestion runs. Returns the expired (session_id,
+        document_id) pairs and the entries that lost their last reference.
+        """
+        session_activity = session_activity or {}
+        cutoff = time.time() - ttl
+        expired = []
+        orphaned = []
+        with self._lock:
+            for document_id, entry in list(self._documents.items()):
+                if entry['status'] != 'indexed':
+                    continue
+                for session_id, reference in list(entry['sessions'].items()):
+                    reference['last_active'] = max(reference['last_active'], session_activity.get(session_id, 0))
+                    if reference['last_active'] < cutoff:
+                        del entry['sessions'][session_id]
+                        expired.append((session_id, document_id))
+                if not entry['sessions']:
+                    orphaned.append(self._documents.pop(document_id))
+        return expired, orphaned
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._documents.get(document_id)
+            return copy.deepcopy(entry) if entry else None
+
+    def get_session_documents(self, session_id: str) -> List[Dict[str, Any]]:
+        """Documents referenced by a session, with the filename that session uploaded"""
+        with self._lock:
+            return [
+                {
+                    'document_id': entry['document_id'],
+                    'filename': entry['sessions'][session_id]['filename'],
+                    'uploaded_at': entry['sessions'][session_id]['uploaded_at'],
+                    'status': entry['status'],
+                    'chunk_count': entry['chunk_count'],
+                    'shared_with_sessions': len(entry['sessions']) - 1
+                }
+                for entry in self._documents.values() if session_id in entry['sessions']
+            ]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            references = sum(len(entry['sessions']) for entry in self._documents.values())
+            return {
+                'documents': len(self._documents),
+                'session_references': references,
+                'dedup_hits': self.dedup_hits,
+                'chunks_shared': sum(entry['chunk_count'] * (len(entry['sessions']) - 1) for entry in self._documents.values()),
+                'bytes_not_reingested': sum(entry['file_size'] * (len(entry['sessions']) - 1) for entry in self._documents.values())
+            }
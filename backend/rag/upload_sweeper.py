@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class UploadSweeper:
+    """Periodic garbage collection of uploaded chunks whose sessions went idle
+
+    A session's copy of an upload lives as long as the session has been
+    active within ttl seconds. Every interval seconds the sweeper expires idle
+    references in the upload registry and removes the expired documents from
+    their session indexes in one bulk metadata delete per session, so upload
+    memory stays bounded in long-running deployments.
+    """
+
+    def __init__(self, upload_registry, session_indexes, ttl: float = 3600, interval: float = 300,
+                 session_activity: Optional[Callable[[], Dict[str, float]]] = None):
+        self.upload_registry = upload_registry
+        self.session_indexes = session_indexes
+        self.ttl = ttl
+        self.interval = interval
+        # Returns {session_id: last_activity} for sessions the conversation memory still knows
+        self.session_activity = session_activity
+
+        self._sweep_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            'sweeps': 0,
+            'references_expired': 0,
+            'documents_deleted': 0,
+            'chunks_reclaimed': 0,
+            'vector_bytes_reclaimed': 0,
+            'upload_bytes_reclaimed': 0,
+            'last_sweep': None,
+            'last_sweep_seconds': None
+        }
+
+    def start(self):
+        """Run sweeps in a background thread until stop() is called"""
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='upload-sweeper', daemon=True)
+        self._thread.start()
+        logger.info(f"Upload sweeper started (ttl {self.ttl}s, every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sweep()
+
+    def sweep(self, ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Expire idle references and delete their chunks now, returning what was reclaimed"""
+        ttl = self.ttl if ttl is None else ttl
+        started = time.perf_counter()
+        with self._sweep_lock:
+            try:
+                activity = self.session_activity() if self.session_activity else {}
+                expired, orphaned = self.upload_registry.expire_references(ttl, activity)
+                chunks_deleted = self.session_indexes.remove_references(expired) if expired else 0
+
+                result = {
+                    'references_expired': len(expired),
+                    'documents_deleted': len(orphaned),
+                    'chunks_reclaimed': chunks_deleted,
+                    # float32 vectors; the stored text and metadata come on top
+                    'vector_bytes_reclaimed': chunks_deleted * self.session_indexes.embedding_manager.dimension * 4,
+                    'upload_bytes_reclaimed': sum(entry['file_size'] for entry in orphaned)
+                }
+                for key, value in result.items():
+                    self._stats[key] += value
+                self._stats['sweeps'] += 1
+                self._stats['last_sweep'] = time.time()
+                self._stats['last_sweep_seconds'] = round(time.perf_counter() - started, 3)
+
+                if expired:
+                    logger.info(f"Upload sweep expired {len(expired)} session references, deleting {chunks_deleted} chunks; "
+                                f"{len(orphaned)} documents are no longer referenced")
+                return result
+            except Exception as e:
+                logger.error(f"Error sweeping expired uploads: {e}")
+                return {'error': str(e)}
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._sweep_lock:
+            return {
+                'ttl': self.ttl,
+                'interval': self.interval,
+                'running': self._thread is not None and self._thread.is_alive(),
+                **self._stats
+            }
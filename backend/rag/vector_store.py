@@ -2,26 +2,28 @@ import chromadb
 import numpy as np
 import os
 import sys
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from pathlib import Path
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 import logging
 
 # Add the backend directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from rag.embeddings import EmbeddingManager
-from rag.document_loader import DocumentLoader
+from rag.base_vector_store import VectorStore
+from rag.numpy_vector_store import NumpyVectorStore
+from rag.faiss_vector_store import FAISSVectorStore
+from rag.lexical_index import BM25Index
 
 logger = logging.getLogger(__name__)
 
-class ChromaDBVectorStore:
+class ChromaDBVectorStore(VectorStore):
     """ChromaDB-based vector store for document storage and retrieval"""
     
-    def __init__(self, store_path: str, embedding_manager: EmbeddingManager, collection_name: str = "documents"):
+    def __init__(self, store_path: str, embedding_manager: EmbeddingManager, collection_name: str = "documents",
+                 embedding_batch_size: int = 64, write_batch_size: int = 1000, ingest_batch_size: int = 512):
+        super().__init__(embedding_manager, collection_name, embedding_batch_size, write_batch_size, ingest_batch_size)
         self.store_path = Path(store_path)
-        self.embedding_manager = embedding_manager
-        self.collection_name = collection_name
         self.client = None
         self.collection = None
         
@@ -55,175 +57,56 @@ class ChromaDBVectorStore:
             logger.error(f"Error initializing ChromaDB: {e}")
             raise
     
-    def add_documents(self, documents: List[Dict[str, Any]], chunk_size: int = 1000, chunk_overlap: int = 200):
-        """Add documents to the vector store with chunking"""
-        try:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
-                length_function=len,
+    def _write_chunks(self, ids: List[str], chunks: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """Write chunks to the collection in bounded pages
+        
+        Chunk IDs are content-derived, so upsert keeps re-ingestion idempotent.
+        """
+        for start in range(0, len(ids), self.write_batch_size):
+            end = start + self.write_batch_size
+            self.collection.upsert(
+                documents=chunks[start:end],
+                embeddings=embeddings[start:end].tolist(),
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
             )
-            
-            all_chunks = []
-            all_embeddings = []
-            all_metadatas = []
-            all_ids = []
-            
-            chunk_counter = 0
-            
-            for doc in documents:
-                # Split document into chunks
-                chunks = text_splitter.split_text(doc['content'])
-                
-                for i, chunk in enumerate(chunks):
-                    # Generate embedding for chunk
-                    embedding = self.embedding_manager.embed_single_text(chunk)
-                    
-                    # Prepare metadata - ChromaDB only accepts str, int, float, bool, or None
-                    original_meta = doc.get('metadata', {})
-                    metadata = {
-                        'source': str(doc.get('source', 'unknown')),
-                        'title': str(doc.get('title', 'Untitled')),
-                        'category': str(doc.get('category', 'general')),
-                        'chunk_index': int(i),
-                        'total_chunks': int(len(chunks)),
-                        'chunk_size': int(len(chunk)),
-                        'document_type': str(doc.get('document_type', 'text'))
-                    }
-                    
-                    # Add flattened original metadata as separate fields
-                    if isinstance(original_meta, dict):
-                        for key, value in original_meta.items():
-                            if isinstance(value, (str, int, float, bool)) or value is None:
-                                metadata[f'meta_{key}'] = value
-                            else:
-                                metadata[f'meta_{key}'] = str(value)
-                    
-                    # Generate unique ID for the chunk
-                    chunk_id = f"chunk_{chunk_counter}_{doc.get('source', 'unknown')}_{i}"
-                    
-                    all_chunks.append(chunk)
-                    all_embeddings.append(embedding)
-                    all_metadatas.append(metadata)
-                    all_ids.append(chunk_id)
-                    
-                    chunk_counter += 1
-            
-            if all_chunks:
-                # Ensure embeddings are in the correct format for ChromaDB
-                # ChromaDB expects embeddings to be a list of lists, where each inner list is an embedding
-                formatted_embeddings = []
-                for embedding in all_embeddings:
-                    if isinstance(embedding, list):
-                        # If it's already a list of floats, use it as is
-                        if len(embedding) > 0 and isinstance(embedding[0], (int, float)):
-                            formatted_embeddings.append(embedding)
-                        else:
-                            # If it's nested, flatten it
-                            flattened = []
-                            for item in embedding:
-                                if isinstance(item, list):
-                                    flattened.extend(item)
-                                else:
-                                    flattened.append(item)
-                            formatted_embeddings.append([float(x) for x in flattened])
-                    else:
-                        # If it's not a list, convert it to the expected format
-                        formatted_embeddings.append([float(x) for x in embedding])
-                
-                # Add all chunks to ChromaDB collection
-                self.collection.add(
-                    documents=all_chunks,
-                    embeddings=formatted_embeddings,
-                    metadatas=all_metadatas,
-                    ids=all_ids
-                )
-                
-                logger.info(f"Added {len(all_chunks)} document chunks to ChromaDB collection")
-            else:
-                logger.warning("No document chunks to add")
-                
-        except Exception as e:
-            logger.error(f"Error adding documents to ChromaDB: {e}")
-            raise
     
-    def similarity_search(self, query: str, k: int = 5, threshold: float = 0.7, priority_documents: List[str] = None) -> List[Dict[str, Any]]:
-        """Search for similar documents using ChromaDB"""
-        try:
-            # Generate query embedding
-            query_embedding = self.embedding_manager.embed_single_text(query)
-            
-            # Ensure query embedding is in the right format for ChromaDB (list of lists)
-            # ChromaDB expects query_embeddings to be a list of lists, where each inner list is an embedding
-            if isinstance(query_embedding, list):
-                # Check if it's already properly formatted
-                if len(query_embedding) > 0 and isinstance(query_embedding[0], (int, float)):
-                    # It's a flat list of floats, wrap it in another list
-                    query_embedding = [query_embedding]
-                elif len(query_embedding) > 0 and isinstance(query_embedding[0], list):
-                    # It's already a list of lists, use as is
-                    pass
-                else:
-                    # Flatten and wrap
-                    flattened = []
-                    for item in query_embedding:
-                        if isinstance(item, list):
-                            flattened.extend(item)
-                        else:
-                            flattened.append(item)
-                    query_embedding = [[float(x) for x in flattened]]
-            else:
-                # If it's not a list, convert it to the expected format
-                query_embedding = [[float(x) for x in query_embedding]]
-            
-            # Search in ChromaDB collection
-            results = self.collection.query(
-                query_embeddings=query_embedding,
-                n_results=k,
-                include=['documents', 'metadatas', 'distances']
-            )
-            
-            # Process results
-            processed_results = []
-            if results['documents'] and results['documents'][0]:
-                for i, (doc, metadata, distance) in enumerate(zip(
-                    results['documents'][0], 
-                    results['metadatas'][0], 
-                    results['distances'][0]
-                )):
+    def _query_batch(self, query_embeddings: np.ndarray, k: int,
+                     where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+        """Run one nearest-neighbour query for every embedding against the ChromaDB collection"""
+        results = self.collection.query(
+            query_embeddings=query_embeddings.tolist(),
+            n_results=k,
+            where=self._chroma_where(where),
+            include=['documents', 'metadatas', 'distances']
+        )
+        
+        matches = []
+        for i in range(len(query_embeddings)):
+            query_matches = []
+            if results['documents'] and results['documents'][i]:
+                for doc, metadata, distance in zip(
+                    results['documents'][i], 
+                    results['metadatas'][i], 
+                    results['distances'][i]
+                ):
                     # Convert distance to similarity score (ChromaDB uses cosine distance)
                     # Cosine distance = 1 - cosine_similarity, so similarity = 1 - distance
-                    similarity_score = 1 - distance
-                    
-                    if similarity_score >= threshold:
-                        # Check if this is a priority document
-                        is_priority = False
-                        if priority_documents:
-                            doc_id = metadata.get('document_id', '')
-                            is_priority = any(priority_doc in doc_id for priority_doc in priority_documents)
-                        
-                        processed_results.append({
-                            'content': doc,
-                            'metadata': metadata,
-                            'similarity_score': float(similarity_score),
-                            'rank': i + 1,
-                            'is_priority': is_priority,
-                            'priority_boost': 1.2 if is_priority else 1.0  # Boost priority documents
-                        })
-            
-            # Sort results to prioritize uploaded documents
-            if priority_documents:
-                processed_results.sort(key=lambda x: (
-                    -x['is_priority'],  # Priority documents first
-                    -x['similarity_score'] * x['priority_boost']  # Then by boosted similarity
-                ))
-            
-            logger.info(f"ChromaDB search returned {len(processed_results)} results above threshold {threshold}")
-            return processed_results
-            
-        except Exception as e:
-            logger.error(f"Error in ChromaDB similarity search: {e}")
-            return []
+                    query_matches.append((doc, metadata, 1 - distance))
+            matches.append(query_matches)
+        
+        return matches
+    
+    @staticmethod
+    def _chroma_where(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """ChromaDB only accepts one top-level condition, so wrap several in $and"""
+        if not where:
+            return None
+        if len(where) > 1:
+            return {'$and': [{key: value} for key, value in where.items()]}
+        if '$and' in where:
+            return {'$and': [ChromaDBVectorStore._chroma_where(clause) for clause in where['$and']]}
+        return where
     
     def get_document_count(self) -> int:
         """Get the number of documents in the store"""
@@ -233,34 +116,17 @@ class ChromaDBVectorStore:
             logger.error(f"Error getting document count: {e}")
             return 0
     
-    def rebuild_index(self, knowledge_base_path: str):
-        """Rebuild the entire index from knowledge base"""
-        try:
-            logger.info("Rebuilding ChromaDB vector store index...")
-            
-            # Clear existing collection
-            self.client.delete_collection(name=self.collection_name)
-            
-            # Recreate collection
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
-            
-            # Load documents
-            loader = DocumentLoader(knowledge_base_path)
-            documents = loader.load_all_documents()
-            
-            if documents:
-                # Add documents to index
-                self.add_documents(documents)
-                logger.info(f"Rebuilt ChromaDB index with {len(documents)} documents")
-            else:
-                logger.warning("No documents found in knowledge base")
-                
-        except Exception as e:
-            logger.error(f"Error rebuilding ChromaDB index: {e}")
-            raise
+    def reset_collection(self):
+        """Drop every chunk by recreating the collection"""
+        # Clear existing collection
+        self.client.delete_collection(name=self.collection_name)
+        
+        # Recreate collection
+        self.collection = self.client.create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+        self._lexical_clear()
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
@@ -269,8 +135,10 @@ class ChromaDBVectorStore:
                 'total_documents': self.get_document_count(),
                 'collection_name': self.collection_name,
                 'embedding_dimension': self.embedding_manager.dimension,
+                'backend': self.backend_name,
                 'store_path': str(self.store_path),
-                'chromadb_version': chromadb.__version__
+                'chromadb_version': chromadb.__version__,
+                'query_cache': self.embedding_manager.query_cache.get_statistics() if self.embedding_manager.query_cache else None
             }
         except Exception as e:
             logger.error(f"Error getting ChromaDB statistics: {e}")
@@ -282,7 +150,9 @@ class ChromaDBVectorStore:
     def delete_documents(self, document_ids: List[str]) -> bool:
         """Delete specific documents from the store"""
         try:
-            self.collection.delete(ids=document_ids)
+            for start in range(0, len(document_ids), self.write_batch_size):
+                self.collection.delete(ids=document_ids[start:start + self.write_batch_size])
+            self._lexical_remove(document_ids)
             logger.info(f"Deleted {len(document_ids)} documents from ChromaDB")
             return True
         except Exception as e:
@@ -302,6 +172,7 @@ class ChromaDBVectorStore:
                 embeddings=new_embedding,
                 metadatas=[new_metadata]
             )
+            self._lexical_upsert([document_id], [new_content], [new_metadata])
             
             logger.info(f"Updated document {document_id} in ChromaDB")
             return True
@@ -335,6 +206,7 @@ class ChromaDBVectorStore:
             if results['ids']:
                 # Delete the documents
                 self.collection.delete(ids=results['ids'])
+                self._lexical_remove(results['ids'])
                 logger.info(f"Deleted {len(results['ids'])} documents with {metadata_key}={metadata_value}")
                 return True
             else:
@@ -345,6 +217,25 @@ class ChromaDBVectorStore:
             logger.error(f"Error deleting documents by metadata: {e}")
             return False
     
+    def delete_documents_by_metadata_values(self, metadata_key: str, metadata_values: List[str]) -> int:
+        """Delete chunks whose metadata value is any of metadata_values with one $in filter"""
+        try:
+            if not metadata_values:
+                return 0
+            results = self.collection.get(
+                where={metadata_key: {'$in': list(metadata_values)}},
+                include=[]
+            )
+            ids = results['ids']
+            for start in range(0, len(ids), self.write_batch_size):
+                self.collection.delete(ids=ids[start:start + self.write_batch_size])
+            self._lexical_remove(ids)
+            logger.info(f"Deleted {len(ids)} documents matching {len(metadata_values)} values of {metadata_key}")
+            return len(ids)
+        except Exception as e:
+            logger.error(f"Error deleting documents by metadata values: {e}")
+            return 0
+    
     def get_documents_by_metadata(self, metadata_key: str, metadata_value: str) -> List[Dict[str, Any]]:
         """Get documents that match specific metadata criteria"""
         try:
@@ -370,5 +261,43 @@ class ChromaDBVectorStore:
             logger.error(f"Error getting documents by metadata: {e}")
             return []
 
-# For backward compatibility, create an alias
-FAISSVectorStore = ChromaDBVectorStore
+def create_vector_store(config, embedding_manager: EmbeddingManager) -> VectorStore:
+    """Build the vector store backend selected by config.VECTOR_STORE_BACKEND"""
+    common = {
+        'collection_name': config.CHROMADB_COLLECTION_NAME,
+        'embedding_batch_size': config.EMBEDDING_BATCH_SIZE,
+        'write_batch_size': config.VECTOR_STORE_WRITE_BATCH_SIZE,
+        'ingest_batch_size': config.INGEST_BATCH_SIZE
+    }
+    
+    if config.VECTOR_STORE_BACKEND == 'chromadb':
+        vector_store = ChromaDBVectorStore(config.VECTOR_STORE_PATH, embedding_manager, **common)
+    elif config.VECTOR_STORE_BACKEND == 'numpy':
+        vector_store = NumpyVectorStore(
+            config.NUMPY_STORE_PATH,
+            embedding_manager,
+            dtype=config.NUMPY_STORE_DTYPE,
+            quantization=config.NUMPY_STORE_QUANTIZATION,
+            rescore_multiplier=config.NUMPY_STORE_RESCORE_MULTIPLIER,
+            **common
+        )
+    elif config.VECTOR_STORE_BACKEND == 'faiss':
+        vector_store = FAISSVectorStore(
+            config.FAISS_STORE_PATH,
+            embedding_manager,
+            index_type=config.FAISS_INDEX_TYPE,
+            nlist=config.FAISS_NLIST,
+            nprobe=config.FAISS_NPROBE,
+            pq_m=config.FAISS_PQ_M,
+            pq_nbits=config.FAISS_PQ_NBITS,
+            hnsw_m=config.FAISS_HNSW_M,
+            ef_search=config.FAISS_EF_SEARCH,
+            **common
+        )
+    else:
+        raise ValueError(f"Unsupported vector store backend: {config.VECTOR_STORE_BACKEND}")
+    
+    if config.LEXICAL_INDEX_ENABLED:
+        vector_store.lexical_index = BM25Index(config.LEXICAL_INDEX_PATH, k1=config.BM25_K1, b=config.BM25_B,
+                                               min_match=config.LEXICAL_MIN_MATCH)
+    return vector_store
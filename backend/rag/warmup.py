@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ServiceWarmingUp(RuntimeError):
+    """Raised when a request gives up waiting for the background warm-up"""
+
+class ServiceWarmup:
+    """Initializes the RAG service once in a background thread
+
+    start() is single-flight: whichever caller comes first (app start-up or an
+    early request) launches the warm-up thread and every later caller joins
+    it. After initialization, a few warm-up queries go through the full
+    retrieval path to load model kernels, fill the query cache and page in
+    the index before the service is marked ready.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.service = None
+        self.state = 'not_started'
+        self.error = None
+        self.stages: Dict[str, float] = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self, service_factory: Callable[[], Any], warmup_queries: List[str] = None) -> bool:
+        """Launch the warm-up unless one is running or has succeeded; returns True if this call launched it"""
+        with self._lock:
+            if self._thread is not None and self.state != 'failed':
+                return False
+
+            self.state = 'warming'
+            self.error = None
+            self.stages = {}
+            self.started_at = time.time()
+            self.finished_at = None
+            self._ready.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(service_factory, list(warmup_queries or [])),
+                name='rag-warmup',
+                daemon=True
+            )
+            self._thread.start()
+            logger.info("RAG warm-up started in the background")
+            return True
+
+    def _run(self, service_factory: Callable[[], Any], warmup_queries: List[str]):
+        loop = asyncio.new_event_loop()
+        try:
+            stage_start = time.time()
+            service = service_factory()
+            loop.run_until_complete(service.initialize())
+            if not service.is_initialized:
+                raise RuntimeError(service.initialization_error or 'RAG service failed to initialize')
+            self.stages['initialize_seconds'] = round(time.time() - stage_start, 3)
+
+            # Warm-up queries only prime caches, so a failure must not discard an initialized service
+            stage_start = time.time()
+            try:
+                self._run_warmup_queries(service, warmup_queries)
+            except Exception as e:
+                self.stages['warmup_queries_error'] = str(e)
+                logger.error(f"RAG warm-up queries failed, serving without them: {e}")
+            self.stages['warmup_queries_seconds'] = round(time.time() - stage_start, 3)
+
+            self.service = service
+            self.state = 'ready'
+            logger.info(f"RAG warm-up complete: {self.stages}")
+
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            logger.error(f"RAG warm-up failed: {e}")
+
+        finally:
+            self.finished_at = time.time()
+            loop.close()
+            self._ready.set()
+
+    @staticmethod
+    def _run_warmup_queries(service, warmup_queries: List[str]):
+        """Prime the model, query cache and index pages with representative queries"""
+        if not warmup_queries:
+            return
+        vector_store = service.vector_store
+        vector_store.similarity_search_batch(warmup_queries, k=5, threshold=0.0)
+        for query in warmup_queries:
+            vector_store.lexical_search(query, k=5)
+        logger.info(f"Ran {len(warmup_queries)} warm-up queries")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the warm-up finishes or fails; False on timeout"""
+        return self._ready.wait(timeout)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == 'ready'
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'ready': self.is_ready,
+            'error': self.error,
+            'stages': dict(self.stages),
+            'elapsed_seconds': round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None
+        }
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk uploads: ZIP expansion, unsafe member paths, unsupported
+types and the file count and size limits
+"""
+
+import io
+import os
+import sys
+import tempfile
+import zipfile
+
+from werkzeug.datastructures import FileStorage
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.rag import _save_bulk_upload
+from utils.config import RAGConfig
+
+def zip_upload(members, filename='notices.zip'):
+    """A ZIP archive of (member name, text) pairs as an uploaded file"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, text in members:
+            archive.writestr(name, text)
+    buffer.seek(0)
+    return FileStorage(stream=buffer, filename=filename)
+
+def text_upload(filename, text):
+    return FileStorage(stream=io.BytesIO(text.encode('utf-8')), filename=filename)
+
+def reasons(skipped):
+    return {entry['filename']: entry['reason'] for entry in skipped}
+
+def test_zip_members_stay_in_upload_dir():
+    """Members are saved by base name only, repeats are numbered and unsupported types skipped"""
+    print("🧪 Testing ZIP expansion")
+    with tempfile.TemporaryDirectory() as directory:
+        upload_dir = os.path.join(directory, 'uploads')
+        os.makedirs(upload_dir)
+        saved, skipped = _save_bulk_upload([
+            zip_upload([('../../escape.txt', "Fee deadline"), ('rules/exam.txt', "Exam rules"),
+                        ('more/exam.txt', "More exam rules"), ('tool.exe', "binary"), ('empty/', "")]),
+            text_upload('timetable.md', "Lectures at 9am")
+        ], upload_dir)
+
+        assert [filename for _, filename in saved] == ['escape.txt', 'exam.txt', 'exam.txt', 'timetable.md']
+        assert sorted(os.listdir(upload_dir)) == ['escape.txt', 'exam.txt', 'exam_1.txt', 'timetable.md']
+        assert all(os.path.dirname(file_path) == upload_dir for file_path, _ in saved)
+        assert not os.path.exists(os.path.join(directory, 'escape.txt'))
+        assert reasons(skipped) == {'tool.exe': 'Unsupported file type: .exe'}
+    print("   ✅ Members written inside the upload directory only")
+
+def test_bulk_upload_limits():
+    """Files past the count limit or the total size limit are skipped, not saved"""
+    print("🧪 Testing bulk upload limits")
+    max_files, max_bytes = RAGConfig.BULK_UPLOAD_MAX_FILES, RAGConfig.BULK_UPLOAD_MAX_BYTES
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            RAGConfig.BULK_UPLOAD_MAX_FILES = 2
+            saved, skipped = _save_bulk_upload([zip_upload([(f'notice_{i}.txt', "Notice") for i in range(4)])], directory)
+            assert len(saved) == 2 and len(os.listdir(directory)) == 2
+            assert reasons(skipped) == {f'notice_{i}.txt': 'More than 2 files' for i in (2, 3)}
+
+        with tempfile.TemporaryDirectory() as directory:
+            RAGConfig.BULK_UPLOAD_MAX_FILES = max_files
+            RAGConfig.BULK_UPLOAD_MAX_BYTES = 100
+            # Declared sizes count against the limit before a member is extracted
+            saved, skipped = _save_bulk_upload([
+                zip_upload([('small.txt', "a" * 60), ('large.txt', "b" * 1000)]),
+                text_upload('fits.txt', "c" * 40),
+                text_upload('over.txt', "d" * 10)
+            ], directory)
+            assert [filename for _, filename in saved] == ['small.txt', 'fits.txt']
+            assert sorted(os.listdir(directory)) == ['fits.txt', 'small.txt']
+            assert set(reasons(skipped)) == {'large.txt', 'over.txt'}
+    finally:
+        RAGConfig.BULK_UPLOAD_MAX_FILES, RAGConfig.BULK_UPLOAD_MAX_BYTES = max_files, max_bytes
+    print("   ✅ Count and size limits enforced without writing skipped files")
+
+if __name__ == "__main__":
+    test_zip_members_stay_in_upload_dir()
+    test_bulk_upload_limits()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Test script for document loading: CSV row groups, streamed Excel sheets, the
+extraction cache for whole documents and PDF pages, and the shared parser
+process pools
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import Workbook
+
+from rag.document_loader import DocumentLoader, get_process_pool
+
+def write_pdf(file_path, page_texts):
+    """Write a PDF whose pages each draw their text from a form XObject named /Fm0
+
+    Every page has the same content stream ("/Fm0 Do"), so only the XObject
+    tells the pages apart, as in imported or stamped pages.
+    """
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+               3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    page_ids = []
+    content = b"q /Fm0 Do Q"
+    for i, text in enumerate(page_texts):
+        form_id, page_id, content_id = 4 + 3 * i, 5 + 3 * i, 6 + 3 * i
+        form = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode('latin-1')
+        objects[form_id] = (b"<< /Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+                            b"/Length %d >>\nstream\n" % len(form) + form + b"\nendstream")
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            b"/Resources << /XObject << /Fm0 %d 0 R >> >> /Contents %d 0 R >>" % (form_id, content_id))
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        page_ids.append(page_id)
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[2] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(output)
+        output += b"%d 0 obj\n" % object_id + objects[object_id] + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in sorted(objects):
+        output += b"%010d 00000 n \n" % offsets[object_id]
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(file_path).write_bytes(bytes(output))
+
+def page_texts(document):
+    return [section['content'].split('\n', 1)[1].strip() for section in document['sections']]
+
+def test_csv_row_groups():
+    """CSV rows are packed into header-led groups within the size budget, skipping missing cells"""
+    print("🧪 Testing CSV row grouping")
+    with tempfile.TemporaryDirectory() as directory:
+        timetable = Path(directory) / 'timetable.csv'
+        rows = [f"{day},{room},{course}" for day, room, course in
+                [("Monday", "B204", "CS101"), ("Tuesday", "", "CS102")] + [("Friday", f"L{i}", f"EE{i:03d}") for i in range(40)]]
+        timetable.write_text("day,room,course\n" + "\n".join(rows) + "\n", encoding='utf-8')
+
+        loader = DocumentLoader(directory, table_row_group_chars=300, extraction_cache_path=None)
+        document = loader.load_document(timetable)
+        sections = document['sections']
+        assert document['metadata']['rows'] == 42 and len(sections) > 1
+        assert all(section['content'].startswith("Columns: day | room | course\n") for section in sections)
+        assert all(len(section['content']) <= 300 for section in sections)
+
+        lines = [line for section in sections for line in section['content'].split("\n")[1:]]
+        assert lines[:2] == ["day: Monday | room: B204 | course: CS101", "day: Tuesday | course: CS102"]
+        assert len(lines) == 42
+        # Groups cover consecutive 1-based row ranges
+        assert sections[0]['metadata']['row_start'] == 1 and sections[-1]['metadata']['row_end'] == 42
+        assert all(after['metadata']['row_start'] == before['metadata']['row_end'] + 1
+                   for before, after in zip(sections, sections[1:]))
+
+        assert DocumentLoader(directory, table_row_group_chars=0, extraction_cache_path=None).load_document(timetable)['sections'] is None
+    print("   ✅ Rows grouped under their header within the budget")
+
+def test_excel_sheets_streamed_in_full():
+    """Every row of every sheet is read, well past the old 100-row cap, in per-sheet row groups"""
+    print("🧪 Testing streamed Excel ingestion")
+    with tempfile.TemporaryDirectory() as directory:
+        workbook_path = Path(directory) / 'rooms.xlsx'
+        workbook = Workbook()
+        rooms = workbook.active
+        rooms.title = 'Rooms'
+        rooms.append(['room', 'capacity'])
+        for i in range(250):
+            rooms.append([f"R{i}", 30 + i % 5])
+        labs = workbook.create_sheet('Labs')
+        labs.append(['lab', None])
+        labs.append(['L3', 24])
+        workbook.save(workbook_path)
+
+        document = DocumentLoader(directory, table_row_group_chars=500, extraction_cache_path=None).load_document(workbook_path)
+        assert document['metadata']['sheets'] == ['Rooms', 'Labs'] and document['metadata']['rows'] == 251
+        sections = document['sections']
+        rows = [line for section in sections if section['metadata']['sheet'] == 'Rooms'
+                for line in section['content'].split("\n")[1:]]
+        assert len(rows) == 250 and rows[-1] == "room: R249 | capacity: 34"
+        assert sections[-1]['content'] == "Sheet: Labs | Columns: lab | Unnamed: 1\nlab: L3 | Unnamed: 1: 24"
+        # Only the sheet outlines go into 'content'; the rows live in the sections
+        assert 'R249' not in document['content']
+    print("   ✅ All rows streamed into per-sheet row groups")
+
+def test_document_cache_keys():
+    """Parsed documents are reused by content hash and reparsed when the content or table settings change"""
+    print("🧪 Testing document extraction cache keys")
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, 'extraction_cache.db')
+        timetable = Path(directory) / 'timetable.csv'
+        timetable.write_text("day,room\nMonday,B204\nTuesday,L3\n", encoding='utf-8')
+        copy = Path(directory) / 'timetable_copy.csv'
+        copy.write_text(timetable.read_text(encoding='utf-8'), encoding='utf-8')
+
+        loader = DocumentLoader(directory, extraction_cache_path=cache_path)
+        first = loader.load_document(timetable)
+        cache = loader.extraction_cache
+
+        # Identical content under another name is served from the cache with its own source
+        renamed = loader.load_document(copy)
+        assert (cache.document_hits, cache.document_misses) == (1, 1)
+        assert renamed['source'] == str(copy) and renamed['title'] == 'timetable_copy'
+        assert renamed['content'] == first['content']
+
+        timetable.write_text("day,room\nMonday,B205\n", encoding='utf-8')
+        assert 'B205' in loader.load_document(timetable)['content']
+        assert cache.document_misses == 2, "changed file was served stale text"
+
+        # Row grouping is part of the key, so other settings parse again
+        regrouped = DocumentLoader(directory, table_row_group_chars=0, extraction_cache_path=cache_path)
+        regrouped.load_document(copy)
+        assert (regrouped.extraction_cache.document_hits, regrouped.extraction_cache.document_misses) == (0, 1)
+    print("   ✅ Cache hits only for the same content and loader settings")
+
+def test_pdf_pages_with_identical_streams():
+    """Pages that differ only in their XObjects never share cached text"""
+    print("🧪 Testing PDF page cache keys")
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, 'extraction_cache.db')
+        first_pdf = os.path.join(directory, 'notices.pdf')
+        second_pdf = os.path.join(directory, 'rooms.pdf')
+        write_pdf(first_pdf, ["Fee deadline March 15", "Exam hall B204"])
+        write_pdf(second_pdf, ["Library closed Sunday", "Lab L3 opens 9am"])
+
+        loader = DocumentLoader(directory, pdf_workers=1, extraction_cache_path=cache_path)
+        assert page_texts(loader._load_pdf(Path(first_pdf))) == ["Fee deadline March 15", "Exam hall B204"]
+
+        # A second loader over the same cache reads the pages back from it
+        loader = DocumentLoader(directory, pdf_workers=1, extraction_cache_path=cache_path)
+        assert page_texts(loader._load_pdf(Path(first_pdf))) == ["Fee deadline March 15", "Exam hall B204"]
+        assert loader.extraction_cache.hits == 2
+
+        # Another file with the same page streams is extracted, not served another file's text
+        assert page_texts(loader._load_pdf(Path(second_pdf))) == ["Library closed Sunday", "Lab L3 opens 9am"]
+        assert loader.extraction_cache.misses == 2
+    print("   ✅ Cached page text stays with its own file and page")
+
+def test_parser_pools_are_spawned_and_reused():
+    """File and page parsing run in long-lived spawned pools shared across loads"""
+    print("🧪 Testing parser process pools")
+    with tempfile.TemporaryDirectory() as directory:
+        notices = []
+        for i in range(3):
+            notices.append(Path(directory) / f"notice_{i}.txt")
+            notices[-1].write_text(f"Notice {i}: the library closes early on Friday.", encoding='utf-8')
+        pdf_path = os.path.join(directory, 'rooms.pdf')
+        write_pdf(pdf_path, ["Exam hall B204", "Lab L3 opens 9am", "Library closed Sunday"])
+
+        loader = DocumentLoader(directory, pdf_workers=2, pdf_parallel_min_pages=1, extraction_cache_path=None)
+        documents = loader.load_documents(notices, workers=2)
+        assert [document['source'] for document in documents] == [str(path) for path in notices]
+        pool = get_process_pool(2)
+        assert pool._mp_context.get_start_method() == 'spawn'
+
+        # Page extraction and the next load run in the same pool instead of starting a new one
+        assert page_texts(loader._load_pdf(Path(pdf_path))) == ["Exam hall B204", "Lab L3 opens 9am", "Library closed Sunday"]
+        assert len(loader.load_documents(notices, workers=2)) == 3
+        assert get_process_pool(2) is pool
+    print("   ✅ Spawned pool reused across loads and PDF pages")
+
+if __name__ == "__main__":
+    test_csv_row_groups()
+    test_excel_sheets_streamed_in_full()
+    test_document_cache_keys()
+    test_pdf_pages_with_identical_streams()
+    test_parser_pools_are_spawned_and_reused()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the embedding caches: persistent chunk embedding cache hits,
+misses and eviction, and query embedding cache keys
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag.embedding_cache import EmbeddingCache, QueryEmbeddingCache
+
+def test_embedding_cache_keys():
+    """Chunk embeddings are keyed by model and whitespace-normalized text, and survive a reopen"""
+    print("🧪 Testing persistent embedding cache keys")
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, 'embedding_cache.sqlite3')
+        cache = EmbeddingCache(cache_path, max_entries=3)
+        texts = ["Fee deadline is March 15.", "Exam hall B204"]
+        cache.put_many('model-a', texts, np.array([[1, 0], [0, 1]], dtype=np.float32))
+
+        found = cache.get_many('model-a', ["Fee deadline  is\nMarch 15.", "Exam hall b204", "Exam hall B204"])
+        assert found[0].tolist() == [1, 0] and found[1] is None and found[2].tolist() == [0, 1]
+        assert cache.get_many('model-b', texts) == [None, None], "another model's embedding was served"
+        assert (cache.hits, cache.misses) == (2, 3)
+
+        # Past max_entries the least recently used entry goes
+        cache.get_many('model-a', ["Exam hall B204"])
+        cache.put_many('model-a', ["Library hours", "Lab L3"], np.zeros((2, 2), dtype=np.float32))
+        assert cache.evictions == 1
+
+        reopened = EmbeddingCache(cache_path, max_entries=3)
+        assert [embedding is not None for embedding in reopened.get_many('model-a', texts)] == [False, True]
+    print("   ✅ Hits only for the same model and text, entries kept across restarts")
+
+def test_query_cache_keys():
+    """Query embeddings are keyed by model and whitespace-normalized text, keeping case"""
+    print("🧪 Testing query embedding cache keys")
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=3600)
+    embedding = np.ones(4, dtype=np.float32)
+
+    assert cache.get('model-a', "US visa office") is None
+    cache.put('model-a', "US visa office", embedding)
+    assert cache.get('model-a', "  US visa\n office ") is embedding
+    # Cased models embed "US" and "us" differently, as do other models
+    assert cache.get('model-a', "us visa office") is None
+    assert cache.get('model-b', "US visa office") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    # Least recently used queries are evicted past max_entries
+    cache.put('model-a', "library hours", embedding)
+    cache.get('model-a', "US visa office")
+    cache.put('model-a', "exam rules", embedding)
+    assert cache.get('model-a', "library hours") is None
+    assert cache.get('model-a', "US visa office") is embedding
+
+    cache.ttl_seconds = 0
+    assert cache.get('model-a', "US visa office") is None, "expired query embedding was served"
+    print("   ✅ Hits only for the same model and text up to whitespace")
+
+if __name__ == "__main__":
+    test_embedding_cache_keys()
+    test_query_cache_keys()
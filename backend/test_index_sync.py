@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental knowledge base sync: only changed files are
+re-embedded, removed files lose their chunks and unchanged files are skipped
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag.index_sync import KnowledgeBaseSync
+from rag.session_index import EphemeralVectorStore
+from test_session_uploads import HashEmbedder
+
+def write(directory, name, text):
+    file_path = Path(directory) / name
+    file_path.write_text(text, encoding='utf-8')
+    return file_path
+
+def sources(store):
+    return sorted({os.path.basename(metadata['source']) for metadata in store._metadatas})
+
+def test_incremental_sync():
+    """A second sync re-embeds only the changed file and drops the removed one"""
+    print("🧪 Testing incremental knowledge base sync")
+    with tempfile.TemporaryDirectory() as directory:
+        knowledge_base = os.path.join(directory, 'knowledge')
+        os.makedirs(knowledge_base)
+        write(knowledge_base, 'library.txt', "The library opens at 8am and closes at 10pm. " * 10)
+        fees = write(knowledge_base, 'fees.txt', "Fee payment deadline is March 15th. " * 10)
+        hostel = write(knowledge_base, 'hostel.txt', "Hostel allotment starts in July. " * 10)
+
+        embedder = HashEmbedder()
+        store = EphemeralVectorStore(embedder, "knowledge_base")
+        sync = KnowledgeBaseSync(store, knowledge_base, os.path.join(directory, 'kb_manifest.json'),
+                                 chunk_size=200, chunk_overlap=0)
+
+        summary = sync.sync()
+        assert summary['added_or_updated'] == 3 and summary['unchanged'] == 0
+        assert sources(store) == ['fees.txt', 'hostel.txt', 'library.txt']
+        library_chunks = len(store.get_documents_by_metadata('title', 'library'))
+
+        # Touching a file without changing it needs no re-embedding either
+        os.utime(hostel, (hostel.stat().st_atime, hostel.stat().st_mtime + 10))
+        fees.write_text("Fee payment deadline moved to March 22nd. " * 10, encoding='utf-8')
+        embedded = embedder.texts_embedded
+        summary = sync.sync()
+        assert summary['added_or_updated'] == 1 and summary['unchanged'] == 2 and summary['removed'] == 0
+        assert embedder.texts_embedded - embedded == summary['chunks_written']
+        fees_chunks = store.get_documents_by_metadata('title', 'fees')
+        assert fees_chunks and all('March 22nd' in chunk['content'] for chunk in fees_chunks)
+
+        hostel.unlink()
+        embedded = embedder.texts_embedded
+        summary = sync.sync()
+        assert summary['removed'] == 1 and summary['added_or_updated'] == 0 and summary['unchanged'] == 2
+        assert embedder.texts_embedded == embedded, "unchanged files were embedded again"
+        assert sources(store) == ['fees.txt', 'library.txt']
+        assert len(store.get_documents_by_metadata('title', 'library')) == library_chunks
+    print("   ✅ Only changed files re-embedded, removed files dropped")
+
+if __name__ == "__main__":
+    test_incremental_sync()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Test script for the knowledge retrieval agent: reciprocal rank fusion, lexical
+routing of identifier queries, the lexical score floor, persistence of the BM25
+index and searching the session's upload index next to the global index, also
+from the task-based pipeline
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.retrieval_agent import KnowledgeRetrievalAgent
+from agents.task_decomposer import TaskDecomposer, TaskType
+from agents.task_executor import TaskExecutor
+from rag.lexical_index import BM25Index
+from rag.session_index import EphemeralVectorStore, SessionIndexes
+from utils.config import RAGConfig
+from test_session_uploads import HashEmbedder, make_service, upload
+
+class CountingEmbedder(HashEmbedder):
+    """HashEmbedder that counts query encodings"""
+
+    def __init__(self):
+        super().__init__()
+        self.query_batches = 0
+
+    def embed_queries(self, queries):
+        self.query_batches += 1
+        return super().embed_queries(queries)
+
+def make_agent():
+    """Agent over an in-memory global index and per-session upload indexes"""
+    embedder = CountingEmbedder()
+    knowledge_base = EphemeralVectorStore(embedder, "knowledge_base")
+    knowledge_base.add_documents([
+        {'content': "The library opens at 8am and closes at 10pm.", 'source': 'library.txt', 'title': 'Library', 'category': 'facilities'},
+        {'content': "Course CS101 covers programming fundamentals.", 'source': 'courses.txt', 'title': 'Courses', 'category': 'academics'}
+    ])
+    session_indexes = SessionIndexes(embedder)
+    session_indexes.add_documents([{
+        'content': "My hostel allotment letter for block C.",
+        'source': 'allotment.txt',
+        'title': 'Allotment',
+        'category': 'uploaded',
+        'metadata': {'session_id': 'session-a', 'document_id': 'uploaded_allotment', 'source_type': 'uploaded'}
+    }])
+    return KnowledgeRetrievalAgent(knowledge_base, session_indexes), embedder
+
+def retrieve(agent, query, **input_data):
+    return asyncio.run(agent.process({'query': query, 'max_results': 5, 'threshold': -1.0, **input_data}))
+
+def search_result(source, similarity_score, **extra):
+    return {
+        'content': f"chunk of {source}",
+        'metadata': {'source': source, 'chunk_index': 0, 'category': 'general'},
+        'similarity_score': similarity_score,
+        'priority_boost': 1.0,
+        'rank': 0,
+        **extra
+    }
+
+def test_rank_fusion():
+    """Chunks are ordered by summed reciprocal ranks across the fused lists"""
+    print("🧪 Testing reciprocal rank fusion")
+    agent, _ = make_agent()
+    lexical = [search_result('z.txt', 0.0, lexical_score=9.0), search_result('x.txt', 0.0, lexical_score=4.5)]
+    vector = [search_result('x.txt', 0.42), search_result('y.txt', 0.40)]
+
+    fused = agent._fuse_results([lexical, vector])
+    assert [item['metadata']['source'] for item in fused] == ['x.txt', 'z.txt', 'y.txt']
+    assert [item['rank'] for item in fused] == [1, 2, 3]
+
+    k = RAGConfig.RRF_K
+    x = fused[0]
+    assert abs(x['fusion_score'] - (1.0 / (k + 2) + 1.0 / (k + 1))) < 1e-12
+    # The vector hit supplies the cosine similarity, the BM25 score is kept
+    assert x['similarity_score'] == 0.42 and x['lexical_score'] == 4.5
+    # A chunk only the lexical index found has no similarity to report
+    assert fused[1]['similarity_score'] == 0.0
+    print("   ✅ Fused order and scores follow reciprocal rank fusion")
+
+def test_identifier_query_skips_embedding():
+    """Identifier lookups are answered by the lexical index without encoding the query"""
+    print("🧪 Testing lexical routing of identifier queries")
+    agent, embedder = make_agent()
+
+    result = retrieve(agent, "CS101", retrieval_mode='hybrid')
+    assert result['search_metadata']['retrieval_mode'] == 'lexical'
+    assert result['search_results'][0]['source'] == 'courses.txt'
+    assert result['search_results'][0]['similarity_score'] == 0.0
+    assert embedder.query_batches == 0, "identifier query was embedded"
+
+    result = retrieve(agent, "when does the library open", retrieval_mode='hybrid')
+    assert result['search_metadata']['retrieval_mode'] == 'hybrid'
+    assert embedder.query_batches == 1
+    assert all('fusion_score' in item for item in result['search_results'])
+    print("   ✅ Identifier query served lexically, others fused")
+
+def test_weak_keyword_matches():
+    """A chunk sharing one common word with the query is no lexical hit, and BM25 alone never means high confidence"""
+    print("🧪 Testing the lexical score floor")
+    agent, _ = make_agent()
+
+    assert agent.vector_store.lexical_search("library fee refund policy deadline") == []
+    hits = agent.vector_store.lexical_search("library opens 8am")
+    assert [hit['metadata']['source'] for hit in hits] == ['library.txt']
+    assert hits[0]['similarity_score'] == 0.0 and hits[0]['lexical_score'] > 0
+
+    result = retrieve(agent, "CS101", retrieval_mode='lexical')
+    assert all(item['relevance_score'] <= 0.8 for item in result['search_results'])
+    assert result['information_sufficiency'].get('confidence') != 'high'
+    print("   ✅ Weak keyword matches dropped, lexical hits scored conservatively")
+
+def test_lexical_index_persistence():
+    """The BM25 index reloads from disk, and a flush writes only the changed chunks"""
+    print("🧪 Testing lexical index persistence")
+    with tempfile.TemporaryDirectory() as directory:
+        index_path = os.path.join(directory, 'bm25_index.db')
+        index = BM25Index(index_path)
+        index.add([f'chunk_{i}' for i in range(100)], [f"Notice {i} about room R{i}" for i in range(100)],
+                  [{'source': f'notice_{i}.txt'} for i in range(100)])
+        index.flush()
+
+        writes = index._connection.total_changes
+        index.add(['chunk_new'], ["Exam hall B204 seating plan"], [{'source': 'exam.txt'}])
+        index.remove(['chunk_7'])
+        index.flush()
+        assert index._connection.total_changes - writes == 2, "flush rewrote unchanged chunks"
+
+        reloaded = BM25Index(index_path)
+        assert reloaded.get_document_count() == 100
+        assert reloaded.search("B204")[0][2] == {'source': 'exam.txt'}
+        assert reloaded.search("R7") == []
+        assert reloaded.search("R8")[0][0] == 'chunk_8'
+
+        reloaded.clear()
+        reloaded.flush()
+        assert BM25Index(index_path).get_document_count() == 0
+    print("   ✅ Index reloaded, flushes stay incremental")
+
+def test_session_fan_out():
+    """A session's uploads are searched alongside the knowledge base, with one query encoding"""
+    print("🧪 Testing retrieval fan-out to the session index")
+    agent, embedder = make_agent()
+
+    result = retrieve(agent, "where is my hostel", session_id='session-a', retrieval_mode='vector')
+    sources = {item['source'] for item in result['search_results']}
+    assert sources == {'library.txt', 'courses.txt', 'allotment.txt'}
+    assert embedder.query_batches == 1, "the query was encoded once per index"
+
+    # Other sessions, and requests without a session, never see the upload
+    for input_data in ({'session_id': 'session-b'}, {}):
+        result = retrieve(agent, "where is my hostel", retrieval_mode='vector', **input_data)
+        assert 'allotment.txt' not in {item['source'] for item in result['search_results']}
+    print("   ✅ Session uploads searched next to the knowledge base")
+
+def test_task_pipeline_searches_uploads():
+    """Retrieval tasks carry the session ID and search that session's uploads"""
+    print("🧪 Testing session uploads in the task pipeline")
+    service = make_service()
+    service.vector_store = EphemeralVectorStore(service.embedding_manager, "knowledge_base")
+    service.vector_store.add_documents([
+        {'content': "The library opens at 8am and closes at 10pm.", 'source': 'library.txt', 'title': 'Library', 'category': 'facilities'}
+    ])
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            upload(service, directory, 'session-a', 'allotment.txt', "My hostel allotment letter for block C. " * 12)
+            executor = TaskExecutor()
+            executor.set_rag_service(service)
+
+            for session_id, expect_upload in (('session-a', True), ('session-b', False)):
+                tasks = asyncio.run(TaskDecomposer().decompose_query("tell me about my hostel allotment", session_id=session_id))
+                task = next(task for task in tasks if task.task_type == TaskType.KNOWLEDGE_RETRIEVAL)
+                assert task.parameters['session_id'] == session_id
+                params = {**executor._prepare_task_parameters(task), 'threshold': -1.0}
+
+                asyncio.run(executor._initialize_agents())
+                result = asyncio.run(executor._execute_knowledge_retrieval(params))
+                sources = {os.path.basename(item['source']) for item in result['search_results']}
+                assert ('session-a_allotment.txt' in sources) == expect_upload
+        print("   ✅ Retrieval tasks see only their own session's uploads")
+    finally:
+        service.shutdown()
+
+if __name__ == "__main__":
+    test_rank_fusion()
+    test_identifier_query_skips_embedding()
+    test_weak_keyword_matches()
+    test_lexical_index_persistence()
+    test_session_fan_out()
+    test_task_pipeline_searches_uploads()
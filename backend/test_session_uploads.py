@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test script for session uploads: content-hash deduplication, reference release,
+expiry of idle sessions' uploads and LRU eviction of session indexes
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag.rag_service import RAGService
+from rag.ingestion_queue import IngestionQueue
+from rag.upload_registry import UploadRegistry
+from rag.session_index import SessionIndexes
+from rag.upload_sweeper import UploadSweeper
+from utils.memory import MemoryManager
+
+CONTENT = "Fee payment deadline for the spring semester is March 15th. " * 12
+
+class HashEmbedder:
+    """Deterministic stand-in for EmbeddingManager, so no model has to be loaded"""
+
+    dimension = 16
+    model_name = 'hash-embedder'
+
+    def __init__(self):
+        self.texts_embedded = 0
+
+    def embed_text(self, text):
+        seed = int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+
+    def embed_batch(self, texts, batch_size=32):
+        self.texts_embedded += len(texts)
+        return np.array([self.embed_text(text) for text in texts])
+
+    def embed_queries(self, queries):
+        return np.array([self.embed_text(query) for query in queries])
+
+def make_service(max_sessions=256, max_bytes=256 * 1024 * 1024):
+    """RAG service with only the upload pipeline wired up"""
+    service = RAGService()
+    service.embedding_manager = HashEmbedder()
+    service.upload_registry = UploadRegistry()
+    service.session_indexes = SessionIndexes(
+        service.embedding_manager,
+        max_sessions=max_sessions,
+        max_bytes=max_bytes,
+        on_evict=service._on_session_index_evicted
+    )
+    service.ingestion_queue = IngestionQueue(
+        service.session_indexes,
+        chunk_size=200,
+        chunk_overlap=0,
+        workers=1,
+        coalesce_wait_ms=0,
+        on_finish=service._on_upload_finished
+    )
+    service.memory_manager = MemoryManager()
+    # Sweeps are triggered by the tests, not a background thread
+    service.upload_sweeper = UploadSweeper(
+        service.upload_registry,
+        service.session_indexes,
+        ttl=3600,
+        interval=0,
+        session_activity=service._session_activity
+    )
+    service.is_initialized = True
+    return service
+
+def upload(service, directory, session_id, filename, content=CONTENT):
+    """Submit a file for the session and wait until its ingestion finished"""
+    file_path = os.path.join(directory, f"{session_id}_{filename}")
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    result = service.submit_upload(file_path, session_id, filename)
+    if not result['deduplicated']:
+        assert service.ingestion_queue.get_job(result['job_id']).wait(timeout=30), "ingestion timed out"
+    return result
+
+def session_chunks(service, session_id):
+    store = service.session_indexes.get_session(session_id)
+    return store.get_document_count() if store else 0
+
+def backdate_reference(service, document_id, session_id, seconds):
+    """Pretend the session last touched its reference to the upload seconds earlier"""
+    with service.upload_registry._lock:
+        service.upload_registry._documents[document_id]['sessions'][session_id]['last_active'] -= seconds
+
+def test_deduplication_across_sessions():
+    """The same content uploaded in two sessions is embedded once and copied"""
+    print("🧪 Testing upload deduplication across sessions")
+    service = make_service()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            first = upload(service, directory, 'session-a', 'fees.txt')
+            embedded = service.embedding_manager.texts_embedded
+            assert not first['deduplicated']
+            assert embedded > 0 and session_chunks(service, 'session-a') == embedded
+
+            second = upload(service, directory, 'session-b', 'fees-copy.txt')
+            assert second['deduplicated']
+            assert second['document_id'] == first['document_id']
+            assert service.embedding_manager.texts_embedded == embedded, "duplicate upload was embedded again"
+            assert session_chunks(service, 'session-b') == session_chunks(service, 'session-a')
+            # Each session's copy names that session, not the first uploader
+            for session_id in ('session-a', 'session-b'):
+                chunks = service.session_indexes.get_session(session_id).get_documents_by_metadata('meta_document_id', first['document_id'])
+                assert {chunk['metadata']['meta_session_id'] for chunk in chunks} == {session_id}
+
+            entry = service.upload_registry.get(first['document_id'])
+            assert set(entry['sessions']) == {'session-a', 'session-b'}
+            assert service.upload_registry.get_session_documents('session-b')[0]['filename'] == 'fees-copy.txt'
+            assert service.upload_registry.dedup_hits == 1
+
+            other = upload(service, directory, 'session-b', 'timetable.txt', "Lectures start at 9am on weekdays. " * 12)
+            assert not other['deduplicated'] and other['document_id'] != first['document_id']
+        print("   ✅ Duplicate upload reused the indexed chunks")
+    finally:
+        service.shutdown()
+
+def test_release_references():
+    """Removing an upload drops one session's reference until the last one goes"""
+    print("🧪 Testing upload reference release")
+    service = make_service()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            document_id = upload(service, directory, 'session-a', 'fees.txt')['document_id']
+            upload(service, directory, 'session-b', 'fees.txt')
+            chunks = session_chunks(service, 'session-b')
+
+            result = asyncio.run(service.remove_uploaded_document(document_id, 'session-a'))
+            assert result['success'] and result['remaining_references'] == 1
+            assert result['chunks_removed'] == chunks
+            assert session_chunks(service, 'session-a') == 0
+            assert session_chunks(service, 'session-b') == chunks
+
+            result = asyncio.run(service.remove_uploaded_document(document_id, 'session-a'))
+            assert not result['success'], "a released reference was removed twice"
+
+            result = asyncio.run(service.remove_uploaded_document(document_id, 'session-b'))
+            assert result['success'] and result['remaining_references'] == 0
+            assert session_chunks(service, 'session-b') == 0
+            assert service.upload_registry.get(document_id) is None
+        print("   ✅ References released one session at a time")
+    finally:
+        service.shutdown()
+
+def test_sweeper_expires_idle_sessions():
+    """An idle session loses its copy while an active session keeps the shared upload"""
+    print("🧪 Testing expiry of idle sessions' uploads")
+    service = make_service()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            document_id = upload(service, directory, 'session-idle', 'fees.txt')['document_id']
+            upload(service, directory, 'session-active', 'fees.txt')
+            chunks = session_chunks(service, 'session-active')
+            for session_id in ('session-idle', 'session-active'):
+                backdate_reference(service, document_id, session_id, 7200)
+            # Only the active session is still in conversation memory
+            service.memory_manager.get_session('session-active')
+
+            result = service.upload_sweeper.sweep()
+            assert result['references_expired'] == 1
+            assert result['documents_deleted'] == 0
+            assert result['chunks_reclaimed'] == chunks
+            assert session_chunks(service, 'session-idle') == 0
+            assert session_chunks(service, 'session-active') == chunks
+            assert set(service.upload_registry.get(document_id)['sessions']) == {'session-active'}
+
+            result = service.upload_sweeper.sweep(ttl=0)
+            assert result['references_expired'] == 1 and result['documents_deleted'] == 1
+            assert result['upload_bytes_reclaimed'] == len(CONTENT)
+            assert session_chunks(service, 'session-active') == 0
+            assert service.upload_registry.get(document_id) is None
+            assert service.upload_sweeper.get_statistics()['sweeps'] == 2
+        print("   ✅ Idle session expired, active session kept its reference")
+    finally:
+        service.shutdown()
+
+def test_lru_eviction_releases_references():
+    """Going over max_sessions evicts the least recently used session index"""
+    print("🧪 Testing LRU eviction of session indexes")
+    service = make_service(max_sessions=2)
+    evicted = []
+
+    def on_evict(session_id, document_ids):
+        evicted.append((session_id, sorted(document_ids)))
+        service._on_session_index_evicted(session_id, document_ids)
+
+    service.session_indexes.on_evict = on_evict
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            documents = {}
+            for session_id in ('session-a', 'session-b'):
+                documents[session_id] = upload(service, directory, session_id, 'notice.txt', f"Notice for {session_id}. " * 12)['document_id']
+            # Searching session-a makes session-b the least recently used
+            assert service.session_indexes.get_session('session-a') is not None
+            upload(service, directory, 'session-c', 'notice.txt', "Notice for session-c. " * 12)
+
+            assert evicted == [('session-b', [documents['session-b']])]
+            assert service.session_indexes.get_session('session-b') is None
+            assert service.session_indexes.get_session('session-a') is not None
+            assert service.upload_registry.get(documents['session-b']) is None
+            assert service.upload_registry.get_session_documents('session-b') == []
+            assert service.session_indexes.get_statistics()['sessions_evicted'] == 1
+
+            # The evicted content is ingested again on its next upload
+            again = upload(service, directory, 'session-b', 'notice.txt', "Notice for session-b. " * 12)
+            assert not again['deduplicated'] and session_chunks(service, 'session-b') > 0
+        print("   ✅ Least recently used session evicted and its references released")
+    finally:
+        service.shutdown()
+
+if __name__ == "__main__":
+    test_deduplication_across_sessions()
+    test_release_references()
+    test_sweeper_expires_idle_sessions()
+    test_lru_eviction_releases_references()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process vector store backends: exact NumPy search, its
+int8 and binary quantized variants with rescoring, and the FAISS index types
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag.numpy_vector_store import NumpyVectorStore
+from rag.faiss_vector_store import FAISSVectorStore, faiss
+from test_session_uploads import HashEmbedder
+
+NOTICES = [
+    {
+        'content': f"Notice {i}: room R{i} is booked for the {topic} meeting.",
+        'source': f"notice_{i}.txt",
+        'title': f"Notice {i}",
+        'category': 'events' if i % 2 else 'academics'
+    }
+    for i, topic in enumerate(["exam", "library", "hostel", "sports", "placement", "fees"] * 8)
+]
+
+def check_store(make_store, label):
+    """Exact-text queries find their own chunk, filters apply, and the store survives a reopen"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        store.add_documents(NOTICES)
+        store.flush()
+        assert store.get_document_count() == len(NOTICES)
+
+        queries = [NOTICES[i]['content'] for i in (0, 7, 41)]
+        for notice, results in zip((0, 7, 41), store.similarity_search_batch(queries, k=3, threshold=-1.0)):
+            assert results[0]['metadata']['source'] == f"notice_{notice}.txt", label
+            assert results[0]['similarity_score'] > 0.999, label
+
+        filtered = store.similarity_search(NOTICES[7]['content'], k=5, threshold=-1.0, filters={'category': 'academics'})
+        assert filtered and all(result['metadata']['category'] == 'academics' for result in filtered), label
+
+        assert store.delete_documents_by_metadata('source', 'notice_7.txt')
+        store.flush()
+
+        reopened = make_store(directory)
+        assert reopened.get_document_count() == len(NOTICES) - 1, label
+        top = reopened.similarity_search(NOTICES[41]['content'], k=1, threshold=-1.0)[0]
+        assert top['metadata']['source'] == "notice_41.txt", label
+        assert all(result['metadata']['source'] != "notice_7.txt"
+                   for result in reopened.similarity_search(NOTICES[7]['content'], k=5, threshold=-1.0)), label
+
+def test_numpy_store():
+    """Exact matrix search, also with quantized codes rescored against full precision"""
+    print("🧪 Testing NumPy vector store backends")
+    for dtype, quantization in (('float32', 'none'), ('float16', 'none'), ('float32', 'int8'), ('float32', 'binary')):
+        check_store(lambda directory: NumpyVectorStore(directory, HashEmbedder(), dtype=dtype, quantization=quantization,
+                                                       rescore_multiplier=4),
+                    f"numpy {dtype} {quantization}")
+    print("   ✅ Plain and quantized NumPy stores return exact top hits")
+
+def test_faiss_store():
+    """Flat, IVF and HNSW FAISS indexes, the IVF one trained once enough vectors arrived"""
+    print("🧪 Testing FAISS vector store backends")
+    if faiss is None:
+        print("   ⚠️ faiss-cpu not installed, skipping")
+        return
+    for index_type in ('flat', 'ivf_flat', 'hnsw'):
+        check_store(lambda directory: FAISSVectorStore(directory, HashEmbedder(), index_type=index_type, nlist=4, nprobe=4),
+                    f"faiss {index_type}")
+    print("   ✅ FAISS indexes return the exact top hits and reload from disk")
+
+if __name__ == "__main__":
+    test_numpy_store()
+    test_faiss_store()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the background warm-up: single-flight start, requests gated
+until the service is ready, and retrying after a failed initialization
+"""
+
+import os
+import sys
+import threading
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag.warmup import ServiceWarmup
+
+class RecordingStore:
+    """Vector store stand-in recording the warm-up queries it serves"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.queries = []
+
+    def similarity_search_batch(self, queries, k=5, threshold=0.0):
+        if self.fail:
+            raise RuntimeError("index unavailable")
+        self.queries.extend(queries)
+        return [[] for _ in queries]
+
+    def lexical_search(self, query, k=5):
+        return []
+
+class BlockingService:
+    """RAG service stand-in whose initialize waits until the test releases it"""
+
+    def __init__(self, succeed=True, store=None):
+        self.succeed = succeed
+        self.release = threading.Event()
+        self.initialize_calls = 0
+        self.is_initialized = False
+        self.initialization_error = None
+        self.vector_store = store or RecordingStore()
+
+    async def initialize(self):
+        self.initialize_calls += 1
+        self.release.wait(timeout=10)
+        self.is_initialized = self.succeed
+        if not self.succeed:
+            self.initialization_error = "model download failed"
+
+def test_single_flight_and_gating():
+    """Later callers join the running warm-up and only see the service once queries have run"""
+    print("🧪 Testing warm-up gating")
+    warmup = ServiceWarmup()
+    service = BlockingService()
+
+    assert warmup.start(lambda: service, ["attendance requirements"])
+    assert not warmup.start(lambda: service, ["attendance requirements"]), "a second warm-up was launched"
+    assert not warmup.wait(timeout=0.05) and not warmup.is_ready and warmup.service is None
+    assert warmup.get_status()['state'] == 'warming'
+
+    service.release.set()
+    assert warmup.wait(timeout=10)
+    assert warmup.is_ready and warmup.service is service
+    assert service.initialize_calls == 1
+    assert service.vector_store.queries == ["attendance requirements"]
+    assert not warmup.start(lambda: service), "a finished warm-up was run again"
+    print("   ✅ One warm-up shared by every caller, ready only after its queries")
+
+def test_failed_warmup_can_retry():
+    """A failed initialization is reported and the next start launches a new attempt"""
+    print("🧪 Testing warm-up retry after failure")
+    warmup = ServiceWarmup()
+    failing = BlockingService(succeed=False)
+    failing.release.set()
+
+    assert warmup.start(lambda: failing)
+    assert warmup.wait(timeout=10)
+    assert warmup.get_status()['state'] == 'failed' and warmup.error == "model download failed"
+    assert not warmup.is_ready and warmup.service is None
+
+    # Failing warm-up queries only cost the cache priming, not the service
+    service = BlockingService(store=RecordingStore(fail=True))
+    service.release.set()
+    assert warmup.start(lambda: service, ["exam rules"]), "a failed warm-up blocked the retry"
+    assert warmup.wait(timeout=10) and warmup.is_ready
+    assert warmup.get_status()['stages']['warmup_queries_error'] == "index unavailable"
+    print("   ✅ Failure reported and the retry served without warm-up queries")
+
+if __name__ == "__main__":
+    test_single_flight_and_gating()
+    test_failed_warmup_can_retry()
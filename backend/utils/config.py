@@ -3,6 +3,13 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Data paths resolve against the backend directory, not the working directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def backend_path(*parts: str) -> str:
+    """Absolute path of a location inside the backend directory"""
+    return os.path.join(BACKEND_DIR, *parts)
+
 class RAGConfig:
     """Configuration settings for the RAG system"""
     
@@ -12,28 +19,103 @@ class RAGConfig:
     # Model Settings
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
     LLM_MODEL = "llama-3.1-8b-instant"  # Groq model
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')  # torch or onnx (requires onnxruntime)
+    EMBEDDING_ONNX_PATH = backend_path('data', 'onnx_models')  # Exported models are cached here
+    EMBEDDING_ONNX_QUANTIZE = os.getenv('EMBEDDING_ONNX_QUANTIZE', 'true').lower() == 'true'  # Dynamic int8 weights
+    EMBEDDING_ONNX_THREADS = int(os.getenv('EMBEDDING_ONNX_THREADS', 0))  # 0 lets ONNX Runtime decide
     
     # Vector Store Settings
-    VECTOR_STORE_PATH = "data/vector_store"
+    VECTOR_STORE_BACKEND = os.getenv('VECTOR_STORE_BACKEND', 'chromadb')  # chromadb, numpy or faiss
+    VECTOR_STORE_PATH = backend_path('data', 'vector_store')
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
+    TABLE_ROW_GROUP_CHARS = 1000  # CSV/Excel rows are packed into chunks of this size with the header repeated (0 splits tables as plain text)
+    EMBEDDING_BATCH_SIZE = 64  # Chunks per model forward pass during ingestion
+    VECTOR_STORE_WRITE_BATCH_SIZE = 1000  # Chunks per collection.add call
+    INGEST_BATCH_SIZE = 512  # Chunks held in memory between chunking and upsert
+    
+    # Embedding Cache Settings
+    EMBEDDING_CACHE_ENABLED = True
+    EMBEDDING_CACHE_PATH = backend_path('data', 'embedding_cache.sqlite3')
+    EMBEDDING_CACHE_MAX_ENTRIES = 200000  # LRU eviction beyond this many cached vectors
+    QUERY_CACHE_SIZE = 1024  # In-memory query embeddings kept for repeated questions (0 disables)
+    QUERY_CACHE_TTL = 3600  # Seconds before a cached query embedding expires
+    EMBEDDING_MICRO_BATCH_SIZE = int(os.getenv('EMBEDDING_MICRO_BATCH_SIZE', 32))  # Texts per coalesced request batch (0 disables)
+    EMBEDDING_MICRO_BATCH_WAIT_MS = float(os.getenv('EMBEDDING_MICRO_BATCH_WAIT_MS', 5))  # Max time a request waits for company
     
     # ChromaDB Settings
     CHROMADB_COLLECTION_NAME = "documents"
-    CHROMADB_PERSIST_DIRECTORY = "data/vector_store"
+    CHROMADB_PERSIST_DIRECTORY = backend_path('data', 'vector_store')
     CHROMADB_DISTANCE_METRIC = "cosine"
     
+    # NumPy Vector Store Settings
+    NUMPY_STORE_PATH = backend_path('data', 'numpy_store')
+    NUMPY_STORE_DTYPE = "float32"  # float16 halves memory at a small precision cost
+    NUMPY_STORE_QUANTIZATION = os.getenv('NUMPY_STORE_QUANTIZATION', 'none')  # none, int8 (4x smaller) or binary (32x smaller)
+    NUMPY_STORE_RESCORE_MULTIPLIER = 10  # Quantized candidates rescored exactly per requested result
+    
+    # FAISS Vector Store Settings (requires faiss-cpu)
+    FAISS_STORE_PATH = backend_path('data', 'faiss_store')
+    FAISS_INDEX_TYPE = os.getenv('FAISS_INDEX_TYPE', 'flat')  # flat, ivf_flat, ivf_pq or hnsw
+    FAISS_NLIST = 100  # IVF clusters
+    FAISS_NPROBE = 10  # IVF clusters scanned per query
+    FAISS_PQ_M = 16  # PQ sub-quantizers, must divide the embedding dimension
+    FAISS_PQ_NBITS = 8  # Bits per PQ code
+    FAISS_HNSW_M = 32  # HNSW graph degree
+    FAISS_EF_SEARCH = 64  # HNSW search breadth
+    
+    # Lexical Retrieval Settings
+    LEXICAL_INDEX_ENABLED = True
+    LEXICAL_INDEX_PATH = backend_path('data', 'vector_store', 'bm25_index.db')  # BM25 chunk terms, kept in step with the vector store
+    BM25_K1 = 1.5  # Term frequency saturation
+    BM25_B = 0.75  # Chunk length normalization
+    LEXICAL_MIN_MATCH = 0.5  # Share of a query's idf weight a lexical hit must contain
+    RETRIEVAL_MODE = os.getenv('RETRIEVAL_MODE', 'hybrid')  # vector, lexical or hybrid
+    RRF_K = 60  # Reciprocal rank fusion constant
+    
+    # Warm-up Settings
+    WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', 'true').lower() == 'true'  # Load models and indexes when the app starts
+    WARMUP_REQUEST_TIMEOUT = 120  # Seconds a request waits for an in-progress warm-up before getting a 503
+    WARMUP_QUERIES = [
+        "attendance requirements",
+        "leave application procedure",
+        "academic calendar for the semester",
+        "exam rules and regulations"
+    ]
+    
     # Memory Settings
     MAX_CONVERSATION_HISTORY = 10
     SESSION_TIMEOUT = 3600  # 1 hour
     
     # Knowledge Base Settings
-    KNOWLEDGE_BASE_PATH = "data/knowledge"
+    KNOWLEDGE_BASE_PATH = backend_path('data', 'knowledge')
+    KNOWLEDGE_BASE_MANIFEST_PATH = backend_path('data', 'vector_store', 'kb_manifest.json')  # Per-file state for incremental sync
+    DOCUMENT_LOADER_WORKERS = int(os.getenv('DOCUMENT_LOADER_WORKERS', os.cpu_count() or 1))  # Parser processes for ingestion
+    PDF_PAGE_WORKERS = int(os.getenv('PDF_PAGE_WORKERS', os.cpu_count() or 1))  # Processes extracting pages of a single large PDF
+    PDF_PARALLEL_MIN_PAGES = 16  # Smaller PDFs are extracted in-process
+    EXTRACTION_CACHE_ENABLED = True
+    EXTRACTION_CACHE_PATH = backend_path('data', 'extraction_cache.sqlite3')  # Parsed documents by content hash and PDF page text by page content
+    EXTRACTION_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Least recently used extractions are evicted past this size
     SUPPORTED_FORMATS = ['.txt', '.json', '.csv', '.md', '.pdf', '.docx', '.doc', '.xlsx', '.xls', '.pptx', '.ppt']
     
+    # Upload Ingestion Settings
+    INGESTION_WORKERS = int(os.getenv('INGESTION_WORKERS', 2))  # Background threads parsing and embedding uploads
+    INGESTION_COALESCE_MAX_FILES = 16  # Uploads queued together are embedded and written in one batch
+    INGESTION_COALESCE_MAX_BYTES = 4 * 1024 * 1024  # Stop gathering uploads into a batch past this many bytes
+    INGESTION_COALESCE_WAIT_MS = 50  # How long a worker waits for more uploads to join its batch
+    INGESTION_JOB_TTL = 3600  # Seconds finished job statuses stay queryable
+    BULK_UPLOAD_MAX_FILES = 500  # Files accepted from one multi-file or ZIP upload
+    BULK_UPLOAD_MAX_BYTES = 500 * 1024 * 1024  # Total uncompressed size accepted from one bulk upload
+    UPLOAD_TTL = int(os.getenv('UPLOAD_TTL', SESSION_TIMEOUT))  # A session's uploads expire once it is idle this long
+    UPLOAD_SWEEP_INTERVAL = int(os.getenv('UPLOAD_SWEEP_INTERVAL', 300))  # Seconds between sweeps deleting expired upload chunks (0 disables)
+    SESSION_INDEX_MAX_SESSIONS = int(os.getenv('SESSION_INDEX_MAX_SESSIONS', 256))  # In-memory upload indexes kept before evicting the least recently used
+    SESSION_INDEX_MAX_BYTES = int(os.getenv('SESSION_INDEX_MAX_BYTES', 256 * 1024 * 1024))  # Total embedding and text bytes across session upload indexes
+    
     # Agent Settings
     MAX_RETRIEVAL_RESULTS = 5
     SIMILARITY_THRESHOLD = 0.7
+    PRIORITY_DOCUMENT_BOOST = 1.2  # Score multiplier for session uploads when merging with global results
+    PRIORITY_DOCUMENT_K = 5  # Chunks fetched from the query restricted to session uploads
     
     # Response Settings
     MAX_RESPONSE_LENGTH = 1000